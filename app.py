@@ -1,41 +1,59 @@
 print(">>> IMPORT START <<<")
 
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse, JSONResponse, HTMLResponse
+from fastapi.responses import StreamingResponse, JSONResponse, HTMLResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import time
+import asyncio
+import hmac
 import json
 import os
 import sys
-import uuid
 import logging
 import re
 import traceback
-from functools import wraps
+from contextlib import asynccontextmanager
 from html import escape
-from datetime import timedelta
 from logging.handlers import RotatingFileHandler
 from typing import Generator, Optional
 
 print(">>> FASTAPI IMPORTS OK <<<")
 
-from groq_client import groq_response_streaming
-from web_search import search_web, fetch_page
-from response_formatter import format_response
-from response_quality import check_response
-from connectivity import check_connectivity, is_online
+from model_router import routed_response_streaming, get_routing_stats
+from request_classifier import classifier
+from sse_writer import SSEWriter, sse_event, text_frame
+import browse_pipeline
+import groq_client
+import ollama_client
+from browse_pipeline import BrowsePipeline, record_browse_timing, get_browse_stats
+from response_formatter import StreamingFormatter
+from response_quality import StreamingQualityChecker
+from web_verifier import web_verifier
+from preference_cache import preference_cache
+from token_cache import token_cache
+from password_hasher import HasherBusy, password_hasher
+from guest_reaper import guest_reaper
+from upstream_registry import upstreams, OPEN, CLOSED
+from connectivity import check_connectivity, get_connectivity_checker
+from stream_tracker import stream_tracker
+from stream_pump import StreamPump, get_pump_stats
+from replay_buffer import replay_buffer, parse_last_event_id
+from request_coalescer import request_coalescer, normalize_query
+from tracing import start_trace, render_metrics, get_stage_metrics
+from config import Config
 from auth import (
     create_guest_session,
-    register_user,
-    login_user,
-    get_current_user_from_request,
-    create_token,
-    get_user_preferences,
-    update_user_preferences
+    materialize_guest,
+    register_user_async,
+    login_user_async,
+    verify_token,
+    revoke_token,
+    get_user_preferences
 )
 from database import (
+    engine,
     init_db,
     save_message,
     get_chat_list,
@@ -55,52 +73,6 @@ print(">>> SECURITY IMPORTS OK <<<")
 # =========================
 # ENVIRONMENT VALIDATION
 # =========================
-class Config:
-    """Centralized configuration with validation"""
-    REQUIRED_ENV = {}  # No required env vars for development
-    
-    OPTIONAL_ENV = {
-        'SECRET_KEY': (str, None),
-        'DATABASE_URL': (str, None),
-        'DEBUG': (bool, False),
-        'LOG_LEVEL': (str, 'INFO'),
-        'ALLOWED_ORIGINS': (str, ''),
-        'RATE_LIMIT_ENABLED': (bool, True),
-        'RENDER_EXTERNAL_URL': (str, ''),
-    }
-    
-    @classmethod
-    def validate(cls):
-        config = {}
-        errors = []
-        
-        # Check required
-        for var, var_type in cls.REQUIRED_ENV.items():
-            value = os.getenv(var)
-            if not value:
-                errors.append(f"{var} is required")
-            else:
-                try:
-                    config[var] = var_type(value)
-                except ValueError:
-                    errors.append(f"{var} must be of type {var_type.__name__}")
-        
-        # Check optional with defaults
-        for var, (var_type, default) in cls.OPTIONAL_ENV.items():
-            value = os.getenv(var, default)
-            try:
-                if var_type == bool:
-                    config[var] = str(value).lower() in ('true', '1', 'yes')
-                else:
-                    config[var] = var_type(value) if value else default
-            except ValueError:
-                config[var] = default
-        
-        if errors:
-            raise RuntimeError(f"Configuration errors: {', '.join(errors)}")
-        
-        return config
-
 try:
     config = Config.validate()
 except RuntimeError as e:
@@ -112,7 +84,66 @@ print(">>> CONFIG OK <<<")
 # =========================
 # APP SETUP WITH SECURITY
 # =========================
-app = FastAPI(title="AI Assistant")
+def warm_up():
+    """
+    Post-start warm-up, off the event loop: import the search stack
+    (ddgs + bs4) and open a pooled Groq connection so the first real
+    request doesn't pay for either.
+    """
+    start = time.monotonic()
+    try:
+        import web_search  # noqa: F401
+    except ImportError as e:
+        logger.warning(f"Web search unavailable: {e}")
+    from groq_client import warm_connection
+    warmed = warm_connection()
+    logger.info(f"Warm-up done in {time.monotonic() - start:.2f}s (groq connection: {warmed})")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the database and start background services with the event loop, stop them on shutdown"""
+    try:
+        init_db()
+        logger.info("Database initialized successfully")
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {e}")
+        raise
+    guest_reaper.start()
+
+    connectivity = get_connectivity_checker()
+    connectivity.start_monitoring()
+    upstreams.start_probes()
+    # Not awaited: the app starts serving while this runs
+    asyncio.get_running_loop().run_in_executor(None, warm_up)
+    yield
+
+    # Shutdown: the server has stopped accepting connections and waited out
+    # its graceful period; give stragglers a last deadline, then save what
+    # they have so far (run_server.py sizes gunicorn's kill deadline for this)
+    remaining = await stream_tracker.drain(config['STREAM_DRAIN_TIMEOUT'])
+    if remaining:
+        flushed = stream_tracker.flush_pending()
+        logger.warning(f"[SHUTDOWN] {remaining} stream(s) cut off, saved {flushed} partial answer(s)")
+
+    guest_reaper.stop()
+    upstreams.stop_probes()
+    await connectivity.stop_monitoring()
+    for step in (
+        groq_client.close_session,
+        ollama_client.close_session,
+        browse_pipeline.shutdown,
+        web_verifier.shutdown,
+        password_hasher.shutdown,
+        engine.dispose,
+    ):
+        try:
+            step()
+        except Exception as e:
+            logger.error(f"[SHUTDOWN] {step.__qualname__} failed: {e}")
+    logger.info("[SHUTDOWN] Complete")
+
+app = FastAPI(title="AI Assistant", lifespan=lifespan)
 
 print(">>> APP INSTANCE OK <<<")
 
@@ -213,22 +244,8 @@ def sanitize_input(text, max_length=5000):
 
 print(">>> INPUT VALIDATION OK <<<")
 
-# =========================
-# DATABASE INITIALIZATION
-# =========================
-try:
-    init_db()
-    logger.info("Database initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize database: {e}")
-    raise
-
-print(">>> DATABASE OK <<<")
 
-# Auto-detect connectivity
-startup_connectivity = check_connectivity()
-current_mode = {"online": startup_connectivity["online"]}
-logger.info(f"Initial connectivity status: {startup_connectivity['status']}")
+# Connectivity is probed by the background monitor started in lifespan()
 logger.info(f"Mode: [GROQ - Ultra-Fast Cloud Inference]")
 
 print(">>> CONNECTIVITY OK <<<")
@@ -248,14 +265,120 @@ def is_browsing_query(text: str) -> bool:
     """Determine if a query needs web search (opposite of is_short_conversational)"""
     return not is_short_conversational(text)
 
+def new_sse_writer(event_type: str = 'text') -> SSEWriter:
+    """SSE writer using the configured flush policy"""
+    return SSEWriter(
+        flush_ms=config['SSE_FLUSH_MS'],
+        flush_bytes=config['SSE_FLUSH_BYTES'],
+        event_type=event_type
+    )
+
+def new_quality_checker(query: str) -> Optional[StreamingQualityChecker]:
+    """Incremental quality checker for a streamed answer (None when disabled)"""
+    if not config['STREAM_QUALITY_CHECKS']:
+        return None
+    return StreamingQualityChecker(query)
+
+ANONYMOUS_USER = "debug-user"   # requests without a valid token share this owner
+
+def request_user_id(req: Request, create: bool = False) -> Optional[str]:
+    """
+    users.id the request acts as (ANONYMOUS_USER without a valid token).
+    Token-only guests get their row only when `create` is set, so read
+    routes return None for a guest who hasn't saved anything yet.
+    """
+    auth_header = req.headers.get("Authorization", "")
+    token_user, _ = verify_token(auth_header[7:]) if auth_header.startswith("Bearer ") else (None, False)
+    if not token_user:
+        return ANONYMOUS_USER
+    return materialize_guest(token_user, create=create)
+
+def new_stream_formatter(auth_header: str) -> Optional[StreamingFormatter]:
+    """Formatter with the signed-in user's preferences (None for anonymous requests)"""
+    if not config['STREAM_FORMATTING'] or not auth_header.startswith("Bearer "):
+        return None
+    user_id, _ = verify_token(auth_header[7:])
+    if not user_id:
+        return None
+    try:
+        return StreamingFormatter(get_user_preferences(user_id))
+    except Exception as e:
+        logger.warning(f"[ASK] Could not load preferences for user {user_id}: {e}")
+        return None
+
+def stream_frames(
+    stream,
+    writer: SSEWriter,
+    checker: Optional[StreamingQualityChecker] = None,
+    formatter: Optional[StreamingFormatter] = None
+) -> Generator[str, None, None]:
+    """Push model chunks through the writer, yielding coalesced SSE frames"""
+    sample_rate = config['STREAM_LOG_SAMPLE_RATE']
+    log_chunks = sample_rate > 0 and logger.isEnabledFor(logging.DEBUG)
+
+    for chunk in stream:
+        if log_chunks and writer.chunks % sample_rate == 0:
+            logger.debug(f"[GROQ] chunk #{writer.chunks}: {chunk!r}")
+        # Formatting holds text back until its line is complete
+        frame = writer.write(formatter.feed(chunk) if formatter else chunk)
+        if frame:
+            yield frame
+        if checker:
+            # Quality events go out right behind the text they refer to
+            for event in checker.feed(chunk):
+                yield writer.event('quality', **event)
+
+    if formatter:
+        frame = writer.write(formatter.finish())
+        if frame:
+            yield frame
+    frame = writer.flush()
+    if frame:
+        yield frame
+    logger.info(f"[GROQ] streamed {writer.chunks} chunks in {writer.frames} frames")
+
+    if checker:
+        for event in checker.finish():
+            yield sse_event('quality', **event)
+        logger.info(
+            f"[QUALITY] confidence={checker.confidence_level} "
+            f"penalties={checker.penalties:.2f} issues={len(checker.issues)}"
+        )
+
+async def joined_frames(flight, req: Request, chat_id: str, user_id, trace):
+    """A coalesced /ask: the shared stream from its first frame, then the answer saved to this chat too"""
+    started = time.monotonic()
+    first_frame_at = None
+    # Tracked like any other stream, so draining waits for it and a shutdown flush saves its copy
+    active = stream_tracker.open(chat_id, user_id, save_message)
+    try:
+        async for frame in flight.pump.frames(req, join=True):
+            if first_frame_at is None:
+                first_frame_at = time.monotonic()
+                trace.record("time_to_first_frame", started, first_frame_at)
+            if flight.stream is not None:
+                active.writer = flight.stream.writer   # the browsing path starts a new writer for the answer
+            yield frame
+        if flight.pump.done:
+            with trace.span("save_answer"):
+                await asyncio.to_thread(active.save, flight.transcript())
+    finally:
+        active.close()
+        trace.finish()
+
+def trace_stream(trace, stream_started: float, writer: SSEWriter):
+    """Time to first token from the model, then the rest of the token stream"""
+    if writer.first_frame_at is None:
+        return
+    trace.record("time_to_first_token", stream_started, writer.first_frame_at)
+    trace.record("token_stream", writer.first_frame_at, chunks=writer.chunks, frames=writer.frames)
+
 print(">>> UTILITY FUNCTIONS OK <<<")
 
 # =========================
 # ROUTES
 # =========================
 
-from fastapi.responses import HTMLResponse
-
 @app.get("/")
 async def home(request: Request):
     """Serve home page using Jinja2 template"""
@@ -267,6 +390,7 @@ async def home(request: Request):
 async def ask(req: Request):
     """Streaming POST endpoint - returns SSE stream for frontend consumption"""
     logger.info(">>> /ask HIT (POST) <<<")
+    trace = start_trace("ask")
 
     try:
         raw_body = await req.body()
@@ -274,102 +398,205 @@ async def ask(req: Request):
             data = json.loads(raw_body.decode("utf-8-sig")) or {}
         except Exception:
             logger.warning("[ASK] Invalid JSON body received")
+            trace.finish(outcome="invalid_json")
             def error_gen():
-                yield f"data: {json.dumps({'type': 'error', 'text': 'Invalid JSON'})}\n\n"
+                yield sse_event('error', text='Invalid JSON')
             return StreamingResponse(error_gen(), media_type="text/event-stream")
 
-        user_input = sanitize_input(data.get("message", ""), max_length=5000)
-        chat_id = sanitize_input(data.get("chat_id", "default"), max_length=100)
+        with trace.span("sanitize_input"):
+            user_input = sanitize_input(data.get("message", ""), max_length=5000)
+            chat_id = sanitize_input(data.get("chat_id", "default"), max_length=100)
 
         if not user_input:
+            trace.finish(outcome="empty")
             def empty_gen():
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                yield sse_event('done')
             return StreamingResponse(empty_gen(), media_type="text/event-stream")
 
-        user_id = "debug-user"
-        save_message(chat_id, user_id, "user", user_input)
+        auth_header = req.headers.get("Authorization", "")
+        # Token-only guests get a users row here, with their first saved message
+        user_id = request_user_id(req, create=True)
+
+        # Draining worker: refuse before anything is saved, the client retries elsewhere
+        if not stream_tracker.admit():
+            trace.finish(outcome="draining")
+            def draining_gen():
+                yield sse_event('error', text='Server is restarting, please retry')
+            return StreamingResponse(
+                draining_gen(), media_type="text/event-stream", status_code=503, headers={"Retry-After": "1"}
+            )
+
+        with trace.span("save_user_message"):
+            save_message(chat_id, user_id, "user", user_input)
         logger.info(f"[ASK] Input: {user_input}")
 
+        # Single-flight: the same question (same formatting) already being answered is shared
+        formatter = new_stream_formatter(auth_header)
+        coalesce_key = (normalize_query(user_input), formatter.signature() if formatter else None)
+        flight = request_coalescer.join(coalesce_key) if config['COALESCE_REQUESTS'] else None
+        if flight is not None:
+            logger.info(f"[ASK] Joining in-flight generation ({flight.joiners} joined)")
+            trace.set(path="coalesced")
+            return StreamingResponse(
+                joined_frames(flight, req, chat_id, user_id, trace), media_type="text/event-stream"
+            )
+
+        with trace.span("classify"):
+            try:
+                category = classifier.classify(user_input)
+            except Exception:
+                category = "general"
+
         def generate() -> Generator[str, None, None]:
             """Generator for streaming SSE response"""
+            started = time.monotonic()
+            active = stream_tracker.open(chat_id, user_id, save_message)
+            if flight is not None:
+                flight.stream = active   # joiners save this answer too
             try:
                 # Immediate heartbeat
-                yield f"data: {json.dumps({'type': 'status', 'text': '[stream open]'})}\n\n"
+                yield sse_event('status', text='[stream open]')
                 
                 # 🚀 FAST PATH — NO BROWSING
                 if is_short_conversational(user_input):
                     logger.info("[ASK] Conversational -> Groq only")
-                    stream = groq_response_streaming(user_input)
+                    trace.set(path="conversational")
+                    stream_started = time.monotonic()
+                    stream = routed_response_streaming(user_input, category=category)
                     if stream is None:
-                        yield f"data: {json.dumps({'type': 'text', 'text': '[Groq API not available]'})}\n\n"
+                        yield text_frame('[Groq API not available]')
                     else:
-                        full_text = ""
-                        for chunk in stream:
-                            logger.info(f"[GROQ] chunk: {chunk}")
-                            full_text += chunk
-                            yield f"data: {json.dumps({'type': 'text', 'text': chunk})}\n\n"
-                        if full_text:
-                            save_message(chat_id, user_id, "assistant", full_text)
+                        writer = active.writer = new_sse_writer()
+                        yield from stream_frames(
+                            stream, writer, new_quality_checker(user_input), formatter
+                        )
+                        trace_stream(trace, stream_started, writer)
+                        with trace.span("save_answer"):
+                            active.save()
                 else:
-                    # 🌍 BROWSING PATH
+                    # 🌍 BROWSING PATH - search, fetches and Groq warm-up run concurrently
                     logger.info("[ASK] Browsing query detected")
-                    search_results = search_web(user_input, max_results=3)
-
-                    if not search_results:
-                        msg = "I couldn't find relevant information."
-                        yield f"data: {json.dumps({'type': 'text', 'text': msg})}\n\n"
+                    trace.set(path="browsing")
+                    pipeline = BrowsePipeline(user_input, max_results=3, trace=trace).start()
+
+                    if config['BROWSE_DRAFT']:
+                        # Search-free draft from the fast model while sources load
+                        draft_writer = new_sse_writer(event_type='draft')
+                        draft = routed_response_streaming(user_input, category='draft')
+                        try:
+                            for chunk in draft:
+                                frame = draft_writer.write(chunk)
+                                if frame:
+                                    yield frame
+                                if pipeline.done:
+                                    break
+                        finally:
+                            draft.close()
+                        frame = draft_writer.flush()
+                        if frame:
+                            yield frame
+
+                    with trace.span("browse_wait"):
+                        builder = pipeline.wait(timeout=config['BROWSE_TIMEOUT'])
+                    timings = dict(pipeline.timings)
+
+                    if not pipeline.search_results:
+                        yield text_frame("I couldn't find relevant information.")
+                    elif not builder:
+                        yield text_frame("I found sources but couldn't extract content.")
                     else:
-                        extracted = []
-                        for r in search_results:
-                            try:
-                                url = r.get("url") or r.get("link")
-                                if not url:
-                                    continue
-                                content = fetch_page(url)
-                                if content:
-                                    extracted.append(content[:800])
-                            except Exception as e:
-                                logger.warning(f"[BROWSE] Failed to fetch: {e}")
-                                continue
-
-                        if not extracted:
-                            msg = "I found sources but couldn't extract content."
-                            yield f"data: {json.dumps({'type': 'text', 'text': msg})}\n\n"
-                        else:
-                            context = "\n---\n".join(extracted)
-                            logger.info("[GROQ] starting streaming for browsing query")
-                            stream = groq_response_streaming(f"Answer using these sources:\n{context}\n\nQuestion: {user_input}")
-                            if stream is None:
-                                yield f"data: {json.dumps({'type': 'text', 'text': '[Groq API not available]'})}\n\n"
-                            else:
-                                full_text = ""
-                                for chunk in stream:
-                                    logger.info(f"[GROQ] chunk: {chunk}")
-                                    full_text += chunk
-                                    yield f"data: {json.dumps({'type': 'text', 'text': chunk})}\n\n"
-                                if full_text:
-                                    save_message(chat_id, user_id, "assistant", full_text)
+                        with trace.span("build_context") as span:
+                            packed = builder.build(user_input, budget_tokens=config['CONTEXT_TOKEN_BUDGET'])
+                            span["tokens"] = packed['tokens']
+                        logger.info(
+                            f"[GROQ] starting streaming for browsing query "
+                            f"({len(builder)} pages, {packed['passages_used']}/{packed['passages_considered']} passages, "
+                            f"~{packed['tokens']} tokens)"
+                        )
+                        stream_started = time.monotonic()
+                        stream = routed_response_streaming(
+                            f"Answer using these sources:\n{packed['context']}\n\nQuestion: {user_input}",
+                            category=category
+                        )
+                        writer = active.writer = new_sse_writer()
+                        yield from stream_frames(
+                            stream, writer, new_quality_checker(user_input), formatter
+                        )
+                        trace_stream(trace, stream_started, writer)
+                        with trace.span("save_answer"):
+                            active.save()
+                        if writer.first_frame_at is not None:
+                            timings["time_to_first_token"] = writer.first_frame_at - started
+
+                    timings["total"] = time.monotonic() - started
+                    record_browse_timing(timings.get("time_to_first_token"), timings["total"])
+                    logger.info(
+                        "[BROWSE] ttft=%.3fs total=%.3fs",
+                        timings.get("time_to_first_token", timings["total"]),
+                        timings["total"]
+                    )
+                    yield sse_event('timing', timings={k: round(v, 3) for k, v in timings.items()})
                 
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                yield sse_event('done')
             
+            except GeneratorExit:
+                # Closed by the pump: the client went away, the upstream stream is closed with us
+                active.abandon()
+                trace.set(outcome="abandoned")
+                raise
             except Exception as e:
                 logger.error(f"[ERROR] Streaming error: {e}", exc_info=True)
-                yield f"data: {json.dumps({'type': 'error', 'text': str(e)})}\n\n"
-
-        return StreamingResponse(generate(), media_type="text/event-stream")
+                trace.set(outcome="error", error=type(e).__name__)
+                yield sse_event('error', text=str(e))
+            finally:
+                active.close()
+                trace.finish()
+
+        # Resumable: frames carry "<stream id>:<n>" ids, see /ask/resume
+        stream_id = replay_buffer.new_stream_id() if config['STREAM_RESUME_GRACE'] else None
+        pump = StreamPump(
+            generate(),
+            max_buffered=config['STREAM_BUFFER_FRAMES'],
+            stream_id=stream_id,
+            grace=config['STREAM_RESUME_GRACE'],
+        )
+        if stream_id:
+            replay_buffer.add(pump)
+        if config['COALESCE_REQUESTS']:
+            flight = request_coalescer.lead(coalesce_key, pump)
+        return StreamingResponse(pump.frames(req), media_type="text/event-stream")
 
     except Exception:
         logger.error("[ASK] Fatal error", exc_info=True)
+        trace.finish(outcome="fatal_error")
         def error_gen():
-            yield f"data: {json.dumps({'type': 'error', 'text': 'Internal server error'})}\n\n"
+            yield sse_event('error', text='Internal server error')
         return StreamingResponse(error_gen(), media_type="text/event-stream", status_code=500)
 
+@app.get("/ask/resume")
+async def ask_resume(req: Request):
+    """
+    Reattach to an /ask stream after a dropped connection: replays the
+    frames after Last-Event-ID, then continues with the live answer
+    """
+    parsed = parse_last_event_id(req.headers.get("Last-Event-ID") or req.query_params.get("last_event_id", ""))
+    pump = replay_buffer.get(parsed[0]) if parsed else None
+    if pump is None or not pump.can_resume(parsed[1]):
+        # Expired, evicted, cancelled or served by another worker: the client has to ask again
+        def gone_gen():
+            yield sse_event('error', text='Stream expired, please ask again')
+        return StreamingResponse(gone_gen(), media_type="text/event-stream", status_code=410)
+
+    logger.info(f"[ASK] Resuming stream {parsed[0]} after frame {parsed[1]}")
+    return StreamingResponse(pump.frames(req, after=parsed[1]), media_type="text/event-stream")
+
+
 @app.get("/chats")
 async def chats_list(req: Request):
     """Get list of chats for current user"""
     try:
-        user_id = "debug-user"
-        chat_list = get_chat_list(user_id)
+        user_id = request_user_id(req)
+        chat_list = get_chat_list(user_id) if user_id else []
         return JSONResponse({"chats": chat_list})
     except Exception as e:
         logger.error(f"[CHATS] Error: {e}", exc_info=True)
@@ -380,8 +607,8 @@ async def chats_list(req: Request):
 async def chat_history(chat_id: str, req: Request):
     """Get chat history"""
     try:
-        user_id = "debug-user"
-        messages = get_chat_history(chat_id, user_id)
+        user_id = request_user_id(req)
+        messages = get_chat_history(chat_id, user_id) if user_id else []
         return JSONResponse({"messages": messages})
     except Exception as e:
         logger.error(f"[HISTORY] Error: {e}", exc_info=True)
@@ -392,8 +619,9 @@ async def chat_history(chat_id: str, req: Request):
 async def delete_chat_endpoint(chat_id: str, req: Request):
     """Delete a chat"""
     try:
-        user_id = "debug-user"
-        delete_chat(chat_id, user_id)
+        user_id = request_user_id(req)
+        if user_id:
+            delete_chat(chat_id, user_id)
         return JSONResponse({"status": "deleted"})
     except Exception as e:
         logger.error(f"[DELETE] Error: {e}", exc_info=True)
@@ -417,22 +645,156 @@ async def set_mode(req: Request):
         return JSONResponse({"mode": "online"})
 
 
-@app.get("/status/connectivity")
-async def connectivity_status():
-    """Get connectivity status"""
+async def read_json(req: Request) -> dict:
     try:
-        online = is_online()
-        return JSONResponse({
-            "online": online,
-            "status": "Online (Using Groq Cloud Inference)" if online else "Offline",
-            "mode": "[GROQ - Ultra-Fast Cloud Inference]"
-        })
+        return await req.json() or {}
     except Exception:
-        return JSONResponse({
-            "online": True,
-            "status": "Online (Using Groq Cloud Inference)",
-            "mode": "[GROQ - Ultra-Fast Cloud Inference]"
-        })
+        return {}
+
+
+@app.post("/auth/guest")
+async def guest_session():
+    """Guest token - no database write until the guest saves a chat"""
+    return JSONResponse(create_guest_session())
+
+
+@app.post("/auth/login")
+async def login(req: Request):
+    """Password login - hashing runs on the password pool, not the event loop"""
+    data = await read_json(req)
+    username, password = data.get("username", ""), data.get("password", "")
+    if not username or not password:
+        return JSONResponse({"error": "Username and password are required"}, status_code=400)
+    try:
+        result, error = await login_user_async(username, password)
+    except HasherBusy:
+        return JSONResponse({"error": "Too many login attempts, try again shortly"}, status_code=429)
+    if error:
+        return JSONResponse({"error": error}, status_code=401)
+    return JSONResponse(result)
+
+
+@app.post("/auth/signup")
+async def signup(req: Request):
+    """Create an account - hashing runs on the password pool, not the event loop"""
+    data = await read_json(req)
+    username, email, password = data.get("username", ""), data.get("email", ""), data.get("password", "")
+    if not username or not email or not password:
+        return JSONResponse({"error": "Username, email and password are required"}, status_code=400)
+    try:
+        result, error = await register_user_async(username, email, password)
+    except HasherBusy:
+        return JSONResponse({"error": "Too many signups, try again shortly"}, status_code=429)
+    if error:
+        return JSONResponse({"error": error}, status_code=400)
+    return JSONResponse(result)
+
+
+@app.post("/auth/logout")
+async def logout(req: Request):
+    """Revoke the bearer token so it stops verifying before its exp"""
+    auth_header = req.headers.get("Authorization", "")
+    revoked = auth_header.startswith("Bearer ") and revoke_token(auth_header[7:])
+    return JSONResponse({"status": "ok", "revoked": bool(revoked)})
+
+
+@app.get("/status/connectivity")
+async def connectivity_status():
+    """Get connectivity status (cached by the background monitor)"""
+    return JSONResponse({**check_connectivity(), "mode": "[GROQ - Ultra-Fast Cloud Inference]"})
+
+
+@app.get("/status/connectivity/stream")
+async def connectivity_stream(req: Request):
+    """SSE channel: current status, then one 'connectivity' event per change"""
+    async def events():
+        async for status in get_connectivity_checker().changes():
+            if await req.is_disconnected():
+                break
+            # None is a heartbeat - an SSE comment keeps proxies from timing out
+            yield sse_event('connectivity', **status) if status else ": ping\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/status/verification/{verification_id}")
+async def verification_status(verification_id: str):
+    """Result of a background web verification (pending until it finishes)"""
+    result = web_verifier.result(verification_id)
+    if result is None:
+        return JSONResponse({"error": "Unknown verification id"}, status_code=404)
+    return JSONResponse(result)
+
+
+@app.get("/status/browsing")
+async def browsing_status():
+    """Browsing-query time-to-first-token vs total time"""
+    return JSONResponse(get_browse_stats())
+
+
+@app.get("/status/routing")
+async def routing_status():
+    """Per-route model latency/token cost and current rate-limit headroom"""
+    return JSONResponse(get_routing_stats())
+
+
+@app.get("/status/preferences")
+async def preferences_status():
+    """Preference cache hit/miss counts"""
+    return JSONResponse(preference_cache.get_stats())
+
+
+@app.get("/status/upstreams")
+async def upstreams_status():
+    """Circuit state, rolling latency and error rate per upstream (Groq, DDG, Ollama)"""
+    return JSONResponse(upstreams.snapshot())
+
+
+@app.post("/admin/upstreams/{name}")
+async def set_upstream_state(name: str, req: Request):
+    """Force an upstream's circuit open (drain) or closed (reset)"""
+    token = config['ADMIN_TOKEN']
+    if not token or not hmac.compare_digest(req.headers.get("X-Admin-Token", ""), token):
+        return JSONResponse({"error": "Forbidden"}, status_code=403)
+    if name not in upstreams.snapshot():
+        return JSONResponse({"error": f"Unknown upstream: {name}"}, status_code=404)
+    data = await read_json(req)
+    state = data.get("state")
+    if state not in (OPEN, CLOSED):
+        return JSONResponse({"error": "state must be 'open' or 'closed'"}, status_code=400)
+    upstream = upstreams.get(name)
+    upstream.force(state)
+    logger.info(f"[ADMIN] {name} circuit forced {state}")
+    return JSONResponse({name: upstream.snapshot()})
+
+
+@app.get("/status/streams")
+async def stream_status():
+    """Active /ask streams, drain and abandon counters, backpressure stalls, resumes, coalescing"""
+    return JSONResponse({
+        **stream_tracker.get_stats(),
+        "pump": get_pump_stats(),
+        "replay": replay_buffer.get_stats(),
+        "coalescing": request_coalescer.get_stats(),
+    })
+
+
+@app.get("/metrics")
+async def metrics():
+    """Per-stage /ask latency histograms and p50/p95/p99 (Prometheus text format)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/status/latency")
+async def latency_status():
+    """The same stage percentiles as JSON"""
+    return JSONResponse(get_stage_metrics().get_stats())
+
+
+@app.get("/status/auth")
+async def auth_status():
+    """Verified-token cache hit/miss counts, denylist size and guest cleanup"""
+    return JSONResponse({**token_cache.get_stats(), "guest_reaper": guest_reaper.get_stats()})
 
 
 print(">>> ROUTES OK <<<")
@@ -452,7 +814,6 @@ if __name__ == "__main__":
         )
     except Exception as e:
         print(f">>> ERROR RUNNING: {e} <<<", file=sys.stderr)
-        import traceback
         traceback.print_exc()
     finally:
         print(">>> AFTER RUN <<<")
@@ -1,15 +1,28 @@
 """Authentication helpers for user login/signup/logout"""
 import jwt
+import logging
 import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import request, jsonify, session
+from sqlalchemy.exc import IntegrityError
 from database import SessionLocal
-from models import User, UserPreferences
+from models import RevokedToken, User, UserPreferences
+from preference_cache import preference_cache
+from token_cache import token_cache, token_digest
+from password_hasher import password_hasher
+
+logger = logging.getLogger(__name__)
 
 
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-prod")
 ALGORITHM = "HS256"
+# How stale a worker's copy of the shared denylist may get, in seconds
+REVOCATION_SYNC_INTERVAL = float(os.getenv("TOKEN_REVOCATION_SYNC", "5"))
+REVOCATION_SYNC_OVERLAP = timedelta(seconds=2)   # re-read recent rows: commits land out of order
 
 
 def create_token(user_id, is_guest=False):
@@ -22,17 +35,113 @@ def create_token(user_id, is_guest=False):
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
+_revocation_sync = {"next": 0.0, "since": None}
+_revocation_sync_lock = threading.Lock()
+
+
+def sync_revocations(force=False):
+    """
+    Pull revocations other workers stored since the last sync into this
+    worker's token cache (at most every REVOCATION_SYNC_INTERVAL seconds)
+    """
+    now = time.monotonic()
+    if not force and now < _revocation_sync["next"]:
+        return
+    with _revocation_sync_lock:
+        if not force and now < _revocation_sync["next"]:
+            return
+        _revocation_sync["next"] = now + REVOCATION_SYNC_INTERVAL
+        since = _revocation_sync["since"]
+        db = SessionLocal()
+        try:
+            query = db.query(RevokedToken).filter(RevokedToken.expires_at > datetime.utcnow())
+            if since is not None:
+                query = query.filter(RevokedToken.revoked_at >= since - REVOCATION_SYNC_OVERLAP)
+            rows = query.all()
+        except Exception as e:
+            logger.warning(f"[AUTH] Revocation sync failed: {e}")
+            return
+        finally:
+            db.close()
+
+        for row in rows:
+            digest = bytes.fromhex(row.digest)
+            if not token_cache.is_revoked(digest):
+                token_cache.revoke(digest, _epoch(row.expires_at), propagate=False)
+            if since is None or row.revoked_at > since:
+                since = row.revoked_at
+        _revocation_sync["since"] = since or datetime.utcnow()
+
+
+def _epoch(naive_utc):
+    return (naive_utc - datetime(1970, 1, 1)).total_seconds()
+
+
+def _store_revocation(digest, exp):
+    """Persist a revocation for every worker; False if it could not be stored"""
+    db = SessionLocal()
+    try:
+        # Rows past their exp are useless to everyone: drop them while we're here
+        db.query(RevokedToken).filter(RevokedToken.expires_at <= datetime.utcnow()).delete()
+        db.merge(RevokedToken(
+            digest=digest.hex(),
+            expires_at=datetime.utcfromtimestamp(exp),
+            revoked_at=datetime.utcnow(),
+        ))
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[AUTH] Could not store revocation: {e}")
+        return False
+    finally:
+        db.close()
+
+
 def verify_token(token):
     """Verify JWT token and return user_id, None if invalid"""
+    if not token:
+        return None, False
+    # Logouts on other workers: the cache below must not outlive them
+    sync_revocations()
+    # Fast path: this exact token was verified recently and hasn't expired
+    digest = token_digest(token)
+    cached = token_cache.get(digest)
+    if cached:
+        return cached
+    if token_cache.is_revoked(digest):
+        return None, False
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("user_id"), payload.get("is_guest", False)
     except:
         return None, False
+    user_id, is_guest = payload.get("user_id"), payload.get("is_guest", False)
+    if user_id:
+        token_cache.put(digest, user_id, is_guest, payload.get("exp"))
+    return user_id, is_guest
+
+
+def revoke_token(token):
+    """
+    Deny a token until it expires (e.g. on logout), on every worker.
+    Returns False if it was already invalid or the revocation could not be stored
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except:
+        return False
+    digest = token_digest(token)
+    # Tokens always carry an exp (create_token); it bounds how long the row is kept
+    exp = payload.get("exp") or time.time() + token_cache.max_age
+    token_cache.revoke(digest, exp)
+    return _store_revocation(digest, exp)
 
 
 def get_current_user_from_request():
     """Extract user_id and is_guest from request (token or session)"""
+    # Flask helpers for main.py; imported here so the FastAPI app never loads Flask
+    from flask import request, session
     # Try token first
     auth_header = request.headers.get("Authorization", "")
     if auth_header.startswith("Bearer "):
@@ -54,51 +163,116 @@ def require_auth(f):
     def decorated(*args, **kwargs):
         user_id, is_guest = get_current_user_from_request()
         if not user_id:
+            from flask import jsonify
             return jsonify({"error": "Unauthorized"}), 401
         return f(*args, user_id=user_id, is_guest=is_guest, **kwargs)
     return decorated
 
 
+GUEST_PREFIX = "guest_"
+GUEST_EMAIL_DOMAIN = "guest.local"
+MAX_CACHED_GUESTS = 10000
+
+# guest id -> users.id for guests whose row has been materialized
+_guest_rows = OrderedDict()
+_guest_rows_lock = threading.Lock()
+
+
+def is_guest_id(user_id):
+    """Token-only guest identity (legacy guest tokens carry a users.id instead)"""
+    return isinstance(user_id, str) and user_id.startswith(GUEST_PREFIX)
+
+
 def create_guest_session():
-    """Create a guest user and token"""
+    """Issue a guest token - no database row until the guest saves a chat"""
+    guest_id = f"{GUEST_PREFIX}{secrets.token_hex(8)}"
+    return {
+        "user_id": guest_id,
+        "is_guest": True,
+        "token": create_token(guest_id, is_guest=True),
+        "username": "Guest"
+    }
+
+
+def materialize_guest(guest_id, create=True):
+    """
+    users.id for a token-only guest, creating the row on first use.
+    With create=False (read-only routes) a guest without a row yet gets None.
+    """
+    if not is_guest_id(guest_id):
+        return guest_id
+    with _guest_rows_lock:
+        row_id = _guest_rows.get(guest_id)
+    if row_id is not None:
+        return row_id
+
     db = SessionLocal()
     try:
-        # Create temporary guest user
-        guest = User(
-            username=f"guest_{datetime.utcnow().timestamp()}",
-            email=f"guest_{datetime.utcnow().timestamp()}@guest.local",
-            password_hash="",
-            is_active=True
+        # Both the guest name and the guest email: a registered account can hold neither
+        guest_row = db.query(User.id).filter(
+            User.username == guest_id, User.email == f"{guest_id}@{GUEST_EMAIL_DOMAIN}"
         )
-        db.add(guest)
-        db.commit()
-        db.refresh(guest)
-        
-        token = create_token(guest.id, is_guest=True)
-        return {
-            "user_id": guest.id,
-            "is_guest": True,
-            "token": token,
-            "username": "Guest"
-        }
+        row_id = guest_row.scalar()
+        if row_id is None and not create:
+            return None
+        if row_id is None:
+            guest = User(
+                username=guest_id,
+                email=f"{guest_id}@{GUEST_EMAIL_DOMAIN}",
+                password_hash="",
+                is_active=True
+            )
+            db.add(guest)
+            try:
+                db.commit()
+                row_id = guest.id
+            except IntegrityError:
+                # Another request for the same guest got there first
+                db.rollback()
+                row_id = guest_row.scalar()
     finally:
         db.close()
 
+    if row_id is None:
+        return None   # the name is held by a non-guest account (created before names were reserved)
+    with _guest_rows_lock:
+        _guest_rows[guest_id] = row_id
+        while len(_guest_rows) > MAX_CACHED_GUESTS:
+            _guest_rows.popitem(last=False)
+    return row_id
 
-def register_user(username, email, password):
-    """Register new user account"""
+
+def forget_guests(guest_ids):
+    """Drop cached row ids (called by the reaper after deleting the rows)"""
+    with _guest_rows_lock:
+        for guest_id in guest_ids:
+            _guest_rows.pop(guest_id, None)
+
+
+def _session_payload(user_id, username, is_guest=False):
+    return {
+        "user_id": user_id,
+        "is_guest": is_guest,
+        "token": create_token(user_id, is_guest=is_guest),
+        "username": username
+    }
+
+
+def _user_exists(username, email):
     db = SessionLocal()
     try:
-        # Check if user exists
-        existing = db.query(User).filter(
+        return db.query(User.id).filter(
             (User.username == username) | (User.email == email)
-        ).first()
-        if existing:
-            return None, "User already exists"
-        
-        # Create user
-        user = User(username=username, email=email)
-        user.set_password(password)
+        ).first() is not None
+    finally:
+        db.close()
+
+
+def _create_user(username, email, password_hash):
+    """Insert the account and its default preferences"""
+    db = SessionLocal()
+    try:
+        user = User(username=username, email=email, password_hash=password_hash)
         db.add(user)
         db.commit()
         db.refresh(user)
@@ -108,49 +282,101 @@ def register_user(username, email, password):
         db.add(prefs)
         db.commit()
         
-        token = create_token(user.id, is_guest=False)
-        return {
-            "user_id": user.id,
-            "is_guest": False,
-            "token": token,
-            "username": username
-        }, None
+        return _session_payload(user.id, username), None
     except Exception as e:
         return None, str(e)
     finally:
         db.close()
 
 
+def _reserved_for_guests(username, email):
+    """Guest rows are found (and reaped) by name and email domain, so real accounts can't use either"""
+    if username.strip().lower().startswith(GUEST_PREFIX):
+        return "Username is reserved"
+    if email.strip().lower().endswith(f"@{GUEST_EMAIL_DOMAIN}"):
+        return "Email domain is reserved"
+    return None
+
+
+def register_user(username, email, password):
+    """Register new user account (raises HasherBusy when the password pool is full)"""
+    reserved = _reserved_for_guests(username, email)
+    if reserved:
+        return None, reserved
+    # Check before paying for the hash; the unique constraints catch races
+    if _user_exists(username, email):
+        return None, "User already exists"
+    return _create_user(username, email, password_hasher.hash(password))
+
+
+async def register_user_async(username, email, password):
+    """register_user() for async routes: the hash is awaited on the password pool"""
+    reserved = _reserved_for_guests(username, email)
+    if reserved:
+        return None, reserved
+    if _user_exists(username, email):
+        return None, "User already exists"
+    return _create_user(username, email, await password_hasher.hash_async(password))
+
+
 def login_user(username, password):
-    """Authenticate user"""
+    """Authenticate user (raises HasherBusy when the password pool is full)"""
     db = SessionLocal()
     try:
         user = db.query(User).filter(User.username == username).first()
         if not user or not user.check_password(password):
             return None, "Invalid username or password"
         
-        token = create_token(user.id, is_guest=False)
-        return {
-            "user_id": user.id,
-            "is_guest": False,
-            "token": token,
-            "username": username
-        }, None
+        # Upgrade hashes made with an older method/work factor
+        if password_hasher.needs_rehash(user.password_hash):
+            user.set_password(password)
+            db.commit()
+        
+        return _session_payload(user.id, username), None
     finally:
         db.close()
 
 
-def get_user_preferences(user_id):
-    """Get user preferences or create default"""
+async def login_user_async(username, password):
+    """login_user() for async routes: hashing is awaited on the password pool"""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if not user or not await password_hasher.verify_async(user.password_hash, password):
+            return None, "Invalid username or password"
+        
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = await password_hasher.hash_async(password)
+            db.commit()
+        
+        return _session_payload(user.id, username), None
+    finally:
+        db.close()
+
+
+DEFAULT_PREFERENCES = {
+    "response_format": "formatted",
+    "use_lists": True,
+    "use_numbered": True,
+    "use_bullets": True,
+    "use_emojis": True,
+    "preferred_tone": "professional",
+    "preferred_language": "English",
+    "custom_system_prompt": None,
+    "specializations": {},
+}
+
+
+def _load_user_preferences(user_id):
+    """Read preferences from the database (defaults if the user has no row yet)"""
+    if is_guest_id(user_id):
+        return dict(DEFAULT_PREFERENCES, specializations={})
     db = SessionLocal()
     try:
         prefs = db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
         if not prefs:
-            # Create default preferences if not exists
-            prefs = UserPreferences(user_id=user_id)
-            db.add(prefs)
-            db.commit()
-            db.refresh(prefs)
+            # Reads don't write: the row is created on the first update
+            return dict(DEFAULT_PREFERENCES, specializations={})
         
         return {
             "response_format": prefs.response_format,
@@ -167,8 +393,15 @@ def get_user_preferences(user_id):
         db.close()
 
 
+def get_user_preferences(user_id):
+    """Get user preferences (cached for PREFS_CACHE_TTL seconds)"""
+    return preference_cache.get_or_load(user_id, _load_user_preferences)
+
+
 def update_user_preferences(user_id, preferences):
     """Update user preferences"""
+    if is_guest_id(user_id):
+        return {"error": "Sign up to save preferences"}
     db = SessionLocal()
     try:
         prefs = db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
@@ -216,3 +449,5 @@ def update_user_preferences(user_id, preferences):
         return {"error": str(e)}
     finally:
         db.close()
+        # Also on failure: the row may have changed before the error
+        preference_cache.invalidate(user_id)
@@ -0,0 +1,148 @@
+"""
+Staged browsing pipeline for /ask.
+Search, page fetches and the Groq connection warm-up run concurrently;
+fetched pages feed a context builder as they arrive.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from groq_client import warm_connection
+from context_budget import pack_context
+from tracing import NULL_TRACE
+
+CONTEXT_TOKEN_BUDGET = 600   # default prompt budget for retrieved passages
+FETCH_DEADLINE = 8.0         # seconds to wait for all page fetches
+
+# Separate pools so pipeline threads never wait on fetches queued behind them
+_pipeline_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="browse")
+_fetch_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fetch")
+
+
+class ContextBuilder:
+    """Collects fetched pages as they arrive and packs the most relevant passages"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = []
+
+    def add_page(self, url: str, title: str, content: str):
+        with self._lock:
+            self.pages.append({"url": url, "title": title, "content": content})
+
+    def build(self, query: str, budget_tokens: int = CONTEXT_TOKEN_BUDGET) -> Dict:
+        """Rank passages against the query and pack them into the token budget"""
+        with self._lock:
+            pages = list(self.pages)
+        return pack_context(query, pages, budget_tokens)
+
+    def __len__(self):
+        return len(self.pages)
+
+
+class BrowsePipeline:
+    """
+    Runs search -> parallel fetch in the background while the caller is free
+    to do other work (e.g. stream a draft). Call start() then wait().
+    """
+
+    def __init__(self, query: str, max_results: int = 3, trace=NULL_TRACE):
+        self.query = query
+        self.max_results = max_results
+        self.trace = trace
+        self.builder = ContextBuilder()
+        self.search_results: List[Dict] = []
+        self.timings: Dict[str, float] = {}
+        self._started = 0.0
+        self._done = threading.Event()
+        self._future = None
+
+    def start(self) -> "BrowsePipeline":
+        self._started = time.monotonic()
+        # Warm the Groq connection while DDG is busy (a no-op if it was used recently)
+        _fetch_executor.submit(warm_connection)
+        self._future = _pipeline_executor.submit(self._run)
+        return self
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> ContextBuilder:
+        """Block until search and fetches finish (or time out)"""
+        self._done.wait(timeout)
+        return self.builder
+
+    def _fetch(self, fetch_page, url: str):
+        with self.trace.span("fetch_page", url=url) as span:
+            content = fetch_page(url)
+            span["chars"] = len(content) if content else 0
+            return content
+
+    def _run(self):
+        try:
+            try:
+                # Imported here so ddgs/bs4 stay off the startup path (app warms them after start)
+                from web_search import search_web, fetch_page
+                with self.trace.span("search_web") as span:
+                    self.search_results = search_web(self.query, max_results=self.max_results) or []
+                    span["results"] = len(self.search_results)
+            except Exception:
+                self.search_results = []
+            self.timings["search"] = time.monotonic() - self._started
+
+            futures = {}
+            for result in self.search_results:
+                url = result.get("url") or result.get("link")
+                if url:
+                    futures[_fetch_executor.submit(self._fetch, fetch_page, url)] = result
+
+            try:
+                for future in as_completed(futures, timeout=FETCH_DEADLINE):
+                    result = futures[future]
+                    try:
+                        content = future.result()
+                    except Exception:
+                        continue
+                    if content:
+                        self.builder.add_page(result.get("url") or result.get("link"), result.get("title", ""), content)
+            except TimeoutError:
+                pass  # use whatever arrived in time
+
+            self.timings["fetch"] = time.monotonic() - self._started
+        finally:
+            self._done.set()
+
+
+# =========================
+# TIMING STATS
+# =========================
+
+_stats_lock = threading.Lock()
+_stats = {"queries": 0, "total_ttft": 0.0, "total_time": 0.0}
+
+
+def record_browse_timing(ttft: Optional[float], total: float):
+    """Record time-to-first-token and total time for one browsing query"""
+    with _stats_lock:
+        _stats["queries"] += 1
+        _stats["total_ttft"] += ttft or total
+        _stats["total_time"] += total
+
+
+def get_browse_stats() -> Dict:
+    with _stats_lock:
+        queries = _stats["queries"] or 1
+        return {
+            "queries": _stats["queries"],
+            "avg_time_to_first_token": round(_stats["total_ttft"] / queries, 3),
+            "avg_total_time": round(_stats["total_time"] / queries, 3),
+        }
+
+
+def shutdown():
+    """Stop the pipeline and fetch pools (worker shutdown)"""
+    _pipeline_executor.shutdown(wait=False, cancel_futures=True)
+    _fetch_executor.shutdown(wait=False, cancel_futures=True)
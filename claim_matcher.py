@@ -0,0 +1,82 @@
+"""
+Claim Matcher
+Splits an answer into claims and measures how much of each claim is backed
+by fetched source pages, using term sets built once per page.
+"""
+
+import re
+from typing import Dict, List
+
+from context_budget import term_set
+
+SUPPORT_THRESHOLD = 0.6      # share of a claim's terms a page must contain
+MIN_CLAIM_TERMS = 3          # shorter sentences ("Sure!", "Hope this helps.") aren't claims
+MAX_CLAIMS = 40              # cap work on very long answers
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_claims(text: str) -> List[Dict]:
+    """Sentences of the answer with their term sets"""
+    claims = []
+    for sentence in _SENTENCE_RE.split(text or ""):
+        sentence = sentence.strip()
+        terms = term_set(sentence)
+        if len(terms) >= MIN_CLAIM_TERMS:
+            claims.append({"text": sentence, "terms": terms})
+            if len(claims) >= MAX_CLAIMS:
+                break
+    return claims
+
+
+def build_page_index(pages: Dict[str, str]) -> Dict[str, frozenset]:
+    """Tokenize each page once: url -> term set"""
+    return {url: term_set(content) for url, content in pages.items() if content}
+
+
+def match_claims(claims: List[Dict], page_index: Dict[str, frozenset]) -> Dict:
+    """
+    Score every claim against every page.
+
+    Args:
+        claims: Output of split_claims()
+        page_index: Output of build_page_index()
+
+    Returns:
+        Dict with per-claim results (best source and overlap) and coverage
+        metrics for the whole answer
+    """
+    results = []
+    support_by_source = {url: 0 for url in page_index}
+
+    for claim in claims:
+        terms = claim["terms"]
+        best_url, best_overlap = None, 0
+        for url, page_terms in page_index.items():
+            overlap = len(terms & page_terms)
+            if overlap > best_overlap:
+                best_url, best_overlap = url, overlap
+
+        ratio = best_overlap / len(terms)
+        supported = ratio >= SUPPORT_THRESHOLD
+        if supported:
+            support_by_source[best_url] += 1
+        results.append({
+            "claim": claim["text"],
+            "source": best_url,
+            "overlap": round(ratio, 3),
+            "supported": supported,
+        })
+
+    total = len(results)
+    supported_count = sum(1 for r in results if r["supported"])
+    return {
+        "claims": results,
+        "coverage": {
+            "claims": total,
+            "supported": supported_count,
+            "coverage": round(supported_count / total, 3) if total else 0.0,
+            "mean_overlap": round(sum(r["overlap"] for r in results) / total, 3) if total else 0.0,
+            "support_by_source": support_by_source,
+        },
+    }
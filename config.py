@@ -0,0 +1,79 @@
+"""
+Configuration
+Environment settings shared by the app and the production launcher
+(run_server.py). Kept free of app imports so the launcher can read
+its server settings without loading the app in the master process.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class Config:
+    """Centralized configuration with validation"""
+    REQUIRED_ENV = {}  # No required env vars for development
+    
+    OPTIONAL_ENV = {
+        'SECRET_KEY': (str, None),
+        'DATABASE_URL': (str, None),
+        'DEBUG': (bool, False),
+        'LOG_LEVEL': (str, 'INFO'),
+        'ALLOWED_ORIGINS': (str, ''),
+        'RATE_LIMIT_ENABLED': (bool, True),
+        'RENDER_EXTERNAL_URL': (str, ''),
+        'SSE_FLUSH_MS': (int, 0),           # also flush when a chunk arrives N ms after the last frame, 0 = off
+        'SSE_FLUSH_BYTES': (int, 256),      # /ask text per frame, 0 = a frame per chunk
+        'STREAM_LOG_SAMPLE_RATE': (int, 0),  # log every Nth chunk at DEBUG, 0 = off
+        'BROWSE_DRAFT': (bool, False),       # stream a search-free draft while browsing
+        'BROWSE_TIMEOUT': (int, 20),
+        'CONTEXT_TOKEN_BUDGET': (int, 600),  # retrieved-passage budget per browsing prompt
+        'STREAM_QUALITY_CHECKS': (bool, True),  # emit 'quality' events while answers stream
+        'STREAM_FORMATTING': (bool, True),      # apply signed-in users' formatting preferences to streams
+        'ADMIN_TOKEN': (str, ''),               # X-Admin-Token for /admin endpoints (empty = disabled)
+        # Production server (run_server.py)
+        'HOST': (str, '0.0.0.0'),
+        'WEB_CONCURRENCY': (int, 0),        # worker processes, 0 = one per CPU
+        'WEB_KEEPALIVE': (int, 5),          # seconds an idle keep-alive connection stays open
+        'WEB_BACKLOG': (int, 2048),         # pending connections queued by the kernel
+        'WEB_GRACEFUL_TIMEOUT': (int, 30),  # seconds a stopping worker gets to finish open streams
+        'WEB_TIMEOUT': (int, 120),          # gunicorn: restart a worker silent for this long
+        'STREAM_BUFFER_FRAMES': (int, 32),  # frames an /ask stream may run ahead of a slow client
+        'STREAM_RESUME_GRACE': (int, 0),    # seconds a dropped /ask stream keeps generating for a resume, 0 = off (see DEPLOYMENT.md)
+        'COALESCE_REQUESTS': (bool, True),  # identical in-flight questions share one generation
+        'STREAM_DRAIN_TIMEOUT': (int, 5),   # extra seconds shutdown waits for streams the server's graceful period didn't finish
+    }
+    
+    @classmethod
+    def validate(cls):
+        config = {}
+        errors = []
+        
+        # Check required
+        for var, var_type in cls.REQUIRED_ENV.items():
+            value = os.getenv(var)
+            if not value:
+                errors.append(f"{var} is required")
+            else:
+                try:
+                    config[var] = var_type(value)
+                except ValueError:
+                    errors.append(f"{var} must be of type {var_type.__name__}")
+        
+        # Check optional with defaults
+        for var, (var_type, default) in cls.OPTIONAL_ENV.items():
+            value = os.getenv(var, default)
+            try:
+                if var_type == bool:
+                    config[var] = str(value).lower() in ('true', '1', 'yes')
+                else:
+                    config[var] = var_type(value) if value else default
+            except ValueError:
+                config[var] = default
+        
+        if errors:
+            raise RuntimeError(f"Configuration errors: {', '.join(errors)}")
+        
+        return config
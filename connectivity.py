@@ -1,87 +1,143 @@
 """Network connectivity detection module"""
+import asyncio
 import socket
-import threading
 import time
 from functools import wraps
 
+# Probe targets, tried concurrently - first to accept a connection wins
+PROBE_TARGETS = [("8.8.8.8", 53), ("1.1.1.1", 53), ("8.8.8.8", 80)]
+PROBE_TIMEOUT = 2
+
 
 class ConnectivityChecker:
     """Checks if device has internet connectivity"""
-    
+
     def __init__(self, check_interval=30):
         """
         Initialize connectivity checker
-        
+
         Args:
             check_interval: Seconds between checks (default 30)
         """
-        self.is_online = True  # Default to online
+        self.is_online = True  # Default to online until the first probe finishes
         self.check_interval = check_interval
         self.checking = False
-        
+        self._status = self._make_status(True, None, None)
+        self._changed = None  # asyncio.Event, replaced after every state change
+        self._task = None
+
     def check_internet(self):
         """
         Check if internet is available by attempting to reach reliable DNS servers
-        
+        (blocking - for scripts; the app reads the monitor's cached status)
+
         Returns:
             bool: True if internet available, False if offline
         """
-        try:
-            # Try to connect to Google's DNS server (fastest timeout)
-            # If this fails, try other methods
-            socket.create_connection(("8.8.8.8", 53), timeout=2)
-            return True
-        except (socket.error, socket.timeout):
-            pass
-        
-        try:
-            # Fallback: try to reach cloudflare DNS
-            socket.create_connection(("1.1.1.1", 53), timeout=2)
-            return True
-        except (socket.error, socket.timeout):
-            pass
-        
-        try:
-            # Another fallback: try HTTPS connection to a reliable server
-            socket.create_connection(("8.8.8.8", 80), timeout=2)
-            return True
-        except (socket.error, socket.timeout):
-            pass
-        
+        for host, port in PROBE_TARGETS:
+            try:
+                socket.create_connection((host, port), timeout=PROBE_TIMEOUT).close()
+                return True
+            except (socket.error, socket.timeout):
+                pass
+
         return False
-    
+
+    async def _probe_target(self, host, port):
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), PROBE_TIMEOUT)
+        writer.close()
+
+    async def probe(self):
+        """
+        Probe all targets concurrently without blocking the event loop
+
+        Returns:
+            tuple: (online, latency in ms of the first successful connection)
+        """
+        started = time.monotonic()
+        tasks = [asyncio.ensure_future(self._probe_target(host, port)) for host, port in PROBE_TARGETS]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    await next_done
+                    return True, round((time.monotonic() - started) * 1000, 1)
+                except (OSError, asyncio.TimeoutError):
+                    continue
+            return False, None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _make_status(self, online, latency_ms, checked_at):
+        return {
+            "online": online,
+            "status": "Online (Using Groq Cloud Inference)" if online else "Offline",
+            "checked_at": checked_at,
+            "latency_ms": latency_ms,
+        }
+
+    def _publish(self, online, latency_ms):
+        changed = online != self.is_online or self._status["checked_at"] is None
+        self.is_online = online
+        self._status = self._make_status(online, latency_ms, time.time())
+        if changed and self._changed is not None:
+            # Wake everyone waiting in changes(), then arm a fresh event
+            self._changed.set()
+            self._changed = asyncio.Event()
+
+    async def _monitor_loop(self):
+        """Background monitoring loop (runs as an asyncio task)"""
+        while self.checking:
+            try:
+                online, latency_ms = await self.probe()
+            except Exception as e:
+                print(f"Connectivity check error: {e}")
+                online, latency_ms = False, None
+            self._publish(online, latency_ms)
+            await asyncio.sleep(self.check_interval)
+
     def start_monitoring(self):
-        """Start background thread to monitor connectivity"""
+        """Start the monitor as a task on the running event loop"""
         if self.checking:
             return
-        
+
         self.checking = True
-        thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        thread.start()
-    
-    def stop_monitoring(self):
+        self._changed = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._monitor_loop())
+
+    async def stop_monitoring(self):
         """Stop monitoring connectivity"""
         self.checking = False
-    
-    def _monitor_loop(self):
-        """Background monitoring loop"""
-        while self.checking:
+        if self._task:
+            self._task.cancel()
             try:
-                self.is_online = self.check_internet()
-            except Exception as e:
-                print(f"Connectivity check error: {e}")
-                self.is_online = False
-            
-            time.sleep(self.check_interval)
-    
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def changes(self, heartbeat=25):
+        """
+        Async iterator of statuses: the current one first, then one per
+        online/offline change. Yields None every `heartbeat` seconds without
+        a change so the caller can keep the connection alive.
+        """
+        yield self.get_status()
+        while True:
+            changed = self._changed
+            if changed is None:
+                await asyncio.sleep(heartbeat)
+                yield None
+                continue
+            try:
+                await asyncio.wait_for(changed.wait(), heartbeat)
+                yield self.get_status()
+            except asyncio.TimeoutError:
+                yield None
+
     def get_status(self):
-        """Get current connectivity status"""
-        # Do a quick check instead of relying on background thread
-        self.is_online = self.check_internet()
-        return {
-            "online": self.is_online,
-            "status": "Online (Using Groq Cloud Inference)"
-        }
+        """Get current connectivity status (cached by the monitor)"""
+        return dict(self._status)
 
 
 # Global instance
@@ -94,13 +150,13 @@ def get_connectivity_checker():
 
 
 def check_connectivity():
-    """Quick check of current connectivity"""
+    """Last status published by the monitor"""
     return _connectivity_checker.get_status()
 
 
 def is_online():
     """Return True if device has internet, False otherwise"""
-    return _connectivity_checker.get_status()["online"]
+    return _connectivity_checker.is_online
 
 
 # Example usage in Flask
@@ -0,0 +1,175 @@
+"""
+Context Budgeter
+Splits fetched pages into passages, ranks them against the query with BM25
+and packs the best ones into a fixed token budget.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List
+
+CHARS_PER_TOKEN = 4          # same rough estimate used for routing/cost
+PASSAGE_CHARS = 400          # target passage size
+MIN_PASSAGE_CHARS = 60       # drop nav crumbs, cookie banners, etc.
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or "
+    "that the this to was were what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+# Byte table mapping everything except [a-z0-9] to a space
+_WORD_BYTES = bytes(c if (48 <= c <= 57 or 97 <= c <= 122) else 32 for c in range(256))
+
+
+def term_set(text: str) -> frozenset:
+    """
+    Distinct lowercase tokens without stopwords - same tokens as tokenize(),
+    split with bytes.translate (non-ASCII becomes '?', then a separator)
+    instead of a regex, which is about twice as fast on whole pages.
+    """
+    words = text.lower().encode("ascii", "replace").translate(_WORD_BYTES).decode("ascii").split()
+    return frozenset(words).difference(STOPWORDS)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def split_passages(text: str, target_chars: int = PASSAGE_CHARS) -> List[str]:
+    """Group sentences into passages of roughly target_chars"""
+    passages = []
+    current = []
+    size = 0
+
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        # Very long "sentences" (e.g. text without punctuation) are hard-wrapped
+        if len(sentence) > target_chars * 2 and current:
+            passages.append(" ".join(current))
+            current = []
+            size = 0
+        while len(sentence) > target_chars * 2:
+            cut = sentence.rfind(" ", 0, target_chars)
+            cut = cut if cut > 0 else target_chars
+            passages.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+
+        current.append(sentence)
+        size += len(sentence) + 1
+        if size >= target_chars:
+            passages.append(" ".join(current))
+            current = []
+            size = 0
+
+    if current:
+        passages.append(" ".join(current))
+
+    return [p for p in passages if len(p) >= MIN_PASSAGE_CHARS]
+
+
+def rank_passages(query: str, passages: List[Dict]) -> List[Dict]:
+    """
+    Score passages with BM25 against the query.
+
+    Args:
+        query: User question
+        passages: Dicts with at least a 'text' key
+
+    Returns:
+        The same dicts with a 'score' key, best first
+    """
+    query_terms = set(tokenize(query))
+    if not passages:
+        return []
+
+    docs = [tokenize(p["text"]) for p in passages]
+    avg_len = sum(len(d) for d in docs) / len(docs) or 1.0
+
+    doc_freq = Counter()
+    for doc in docs:
+        doc_freq.update(query_terms.intersection(doc))
+
+    n = len(docs)
+    idf = {t: math.log(1 + (n - doc_freq[t] + 0.5) / (doc_freq[t] + 0.5)) for t in query_terms}
+
+    for passage, doc in zip(passages, docs):
+        counts = Counter(doc)
+        norm = K1 * (1 - B + B * len(doc) / avg_len)
+        passage["score"] = sum(
+            idf[t] * counts[t] * (K1 + 1) / (counts[t] + norm)
+            for t in query_terms if counts[t]
+        )
+
+    return sorted(passages, key=lambda p: p["score"], reverse=True)
+
+
+def pack_context(query: str, pages: List[Dict], budget_tokens: int = 600) -> Dict:
+    """
+    Build a prompt context from fetched pages within a token budget.
+
+    Args:
+        query: User question
+        pages: Dicts with 'url', 'title' and 'content'
+        budget_tokens: Maximum estimated tokens for the whole context
+
+    Returns:
+        Dict with the context string, sources used and token accounting
+    """
+    passages = []
+    for page_index, page in enumerate(pages):
+        for position, text in enumerate(split_passages(page.get("content", ""))):
+            passages.append({"page": page_index, "position": position, "text": text})
+
+    ranked = rank_passages(query, passages)
+
+    chosen = []
+    used = 0
+    for passage in ranked:
+        cost = estimate_tokens(passage["text"])
+        if used + cost > budget_tokens:
+            continue
+        chosen.append(passage)
+        used += cost
+        if budget_tokens - used < MIN_PASSAGE_CHARS // CHARS_PER_TOKEN:
+            break
+
+    # Budget smaller than any passage: trim the best one rather than send nothing
+    if not chosen and ranked:
+        best = dict(ranked[0], text=ranked[0]["text"][:budget_tokens * CHARS_PER_TOKEN])
+        chosen.append(best)
+        used = estimate_tokens(best["text"])
+
+    # Keep passages in page/reading order so the context reads naturally
+    chosen.sort(key=lambda p: (p["page"], p["position"]))
+
+    sections = []
+    sources = []
+    for page_index in sorted({p["page"] for p in chosen}):
+        page = pages[page_index]
+        body = " ... ".join(p["text"] for p in chosen if p["page"] == page_index)
+        sections.append(f"[Source {len(sections) + 1}: {page.get('title') or 'Untitled'}]\n{body}")
+        sources.append(page.get("url", ""))
+
+    return {
+        "context": "\n---\n".join(sections),
+        "sources": sources,
+        "tokens": used,
+        "passages_considered": len(passages),
+        "passages_used": len(chosen),
+    }
@@ -1,9 +1,10 @@
 import os
-import json
 import time
 import requests
 from typing import Optional, Generator, Dict
 from dotenv import load_dotenv
+from sse_decoder import GroqSSEDecoder, coalesce_tokens
+from upstream_registry import upstreams, raise_for_server_error
 
 # ---------------------------------------
 # Environment
@@ -15,6 +16,27 @@ GROQ_API_URL = "https://api.groq.com/openai/v1"
 GROQ_MODEL = os.getenv("GROQ_MODEL", "mixtral-8x7b-32768")
 GROQ_ENABLED = os.getenv("GROQ_ENABLED", "true").lower() in ("true", "1", "yes")
 
+# Optional token coalescing for streams (0 = yield every token as it arrives).
+# Off by default: the delay bound is only checked when a token arrives, so a
+# batch can be held for as long as Groq pauses mid-answer
+STREAM_BATCH_CHARS = int(os.getenv("GROQ_STREAM_BATCH_CHARS", "0"))
+STREAM_BATCH_MS = int(os.getenv("GROQ_STREAM_BATCH_MS", "30"))
+
+# ---------------------------------------
+# Pooled HTTP session (keeps the TLS connection to Groq warm)
+# ---------------------------------------
+_session = requests.Session()
+_session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+# A connection used this recently is still open: warming it again is a wasted call
+WARM_IDLE_SECONDS = float(os.getenv("GROQ_WARM_IDLE", "30"))
+_last_used = 0.0   # time.monotonic() of the last answered request on the session
+
+
+def _mark_used():
+    global _last_used
+    _last_used = time.monotonic()
+
 # ---------------------------------------
 # Rate limiting (local safety guard)
 # ---------------------------------------
@@ -22,13 +44,17 @@ RATE_LIMIT_REQUESTS = 30
 RATE_LIMIT_WINDOW = 60
 _request_times: list[float] = []
 
+# Latest x-ratelimit-* headers reported by Groq (updated on every call)
+_upstream_limits: Dict[str, float] = {}
+
 # ---------------------------------------
 # Available models
 # ---------------------------------------
+# cost: USD per million tokens (blended input/output), used for route accounting
 AVAILABLE_MODELS = {
-    "llama-3.3-70b-versatile": {"speed": "very_fast", "capability": "very_high"},
-    "llama-3.1-8b-instant": {"speed": "ultra_fast", "capability": "medium"},
-    "mixtral-8x7b-32768": {"speed": "fast", "capability": "balanced"},
+    "llama-3.3-70b-versatile": {"speed": "very_fast", "capability": "very_high", "cost": 0.69},
+    "llama-3.1-8b-instant": {"speed": "ultra_fast", "capability": "medium", "cost": 0.065},
+    "mixtral-8x7b-32768": {"speed": "fast", "capability": "balanced", "cost": 0.24},
 }
 
 # ---------------------------------------
@@ -46,6 +72,38 @@ def _check_rate_limit() -> bool:
     return True
 
 
+def _record_upstream_limits(headers) -> None:
+    """Remember Groq's rate-limit headers so callers can see real headroom"""
+    for key in (
+        "x-ratelimit-limit-requests",
+        "x-ratelimit-remaining-requests",
+        "x-ratelimit-limit-tokens",
+        "x-ratelimit-remaining-tokens",
+    ):
+        value = headers.get(key)
+        if value is None:
+            continue
+        try:
+            _upstream_limits[key[len("x-ratelimit-"):]] = float(value)
+        except ValueError:
+            continue
+
+
+def _headroom() -> float:
+    """Fraction (0..1) of the tightest remaining budget, local or upstream"""
+    now = time.time()
+    active = [t for t in _request_times if now - t < RATE_LIMIT_WINDOW]
+    ratios = [max(0, RATE_LIMIT_REQUESTS - len(active)) / RATE_LIMIT_REQUESTS]
+
+    for kind in ("requests", "tokens"):
+        limit = _upstream_limits.get(f"limit-{kind}")
+        remaining = _upstream_limits.get(f"remaining-{kind}")
+        if limit and remaining is not None:
+            ratios.append(max(0.0, remaining) / limit)
+
+    return min(ratios)
+
+
 def get_rate_limit_status() -> Dict:
     now = time.time()
     active = [t for t in _request_times if now - t < RATE_LIMIT_WINDOW]
@@ -54,6 +112,8 @@ def get_rate_limit_status() -> Dict:
         "limit": RATE_LIMIT_REQUESTS,
         "remaining": max(0, RATE_LIMIT_REQUESTS - len(active)),
         "status": "OK" if len(active) < RATE_LIMIT_REQUESTS else "LIMITED",
+        "upstream": dict(_upstream_limits),
+        "headroom": round(_headroom(), 3),
     }
 
 
@@ -96,13 +156,20 @@ def groq_response(
         "Content-Type": "application/json",
     }
 
+    if not upstreams.allow("groq"):
+        return None  # circuit open: fail fast instead of waiting out the timeout
+
     try:
-        r = requests.post(
-            f"{GROQ_API_URL}/chat/completions",
-            json=payload,
-            headers=headers,
-            timeout=12,
-        )
+        with upstreams.track("groq"):
+            r = _session.post(
+                f"{GROQ_API_URL}/chat/completions",
+                json=payload,
+                headers=headers,
+                timeout=12,
+            )
+            raise_for_server_error(r)
+        _mark_used()
+        _record_upstream_limits(r.headers)
         r.raise_for_status()
         data = r.json()
 
@@ -157,37 +224,91 @@ def groq_response_streaming(
         "Content-Type": "application/json",
     }
 
+    if not upstreams.allow("groq"):
+        return  # circuit open: fail fast instead of waiting out the timeout
+
     try:
-        with requests.post(
-            f"{GROQ_API_URL}/chat/completions",
-            json=payload,
-            headers=headers,
-            timeout=12,
-            stream=True,
-        ) as r:
-            r.raise_for_status()
-
-            for line in r.iter_lines(decode_unicode=True):
-                if not line or not line.startswith("data: "):
-                    continue
-
-                data_str = line[6:]
-                if data_str == "[DONE]":
-                    break
-
-                try:
-                    data = json.loads(data_str)
-                    delta = data["choices"][0].get("delta", {})
-                    token = delta.get("content")
-                    if token:
-                        yield token
-                except Exception:
-                    continue
+        # Health is judged on time to response headers
+        with upstreams.track("groq"):
+            r = _session.post(
+                f"{GROQ_API_URL}/chat/completions",
+                json=payload,
+                headers=headers,
+                timeout=12,
+                stream=True,
+            )
+            raise_for_server_error(r)
+        _mark_used()
+    except Exception:
+        return
 
+    started = time.monotonic()
+    try:
+        with r:
+            _record_upstream_limits(r.headers)
+            if not r.ok:
+                return
+
+            tokens = GroqSSEDecoder().decode(r.iter_content(chunk_size=None))
+            if STREAM_BATCH_CHARS > 0:
+                tokens = coalesce_tokens(tokens, STREAM_BATCH_CHARS, STREAM_BATCH_MS / 1000)
+
+            for token in tokens:
+                yield token
+        _mark_used()   # connection back in the pool, idle and open
+
+    except requests.exceptions.RequestException as e:
+        # A stream that stalls or drops mid-answer counts against Groq too
+        upstreams.get("groq").record_failure(time.monotonic() - started, e)
     except Exception:
         return
 
 
+# ---------------------------------------
+# Connection warm-up
+# ---------------------------------------
+def warm_connection() -> bool:
+    """
+    Open (or refresh) a pooled connection to Groq so the next request
+    skips DNS + TCP + TLS setup. Safe to call from a background thread.
+    Skipped when the session answered a request in the last WARM_IDLE_SECONDS.
+    """
+    if not GROQ_API_KEY or not GROQ_ENABLED or not upstreams.available("groq"):
+        return False
+    if time.monotonic() - _last_used < WARM_IDLE_SECONDS:
+        return True
+
+    try:
+        _session.head(
+            f"{GROQ_API_URL}/models",
+            headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
+            timeout=3,
+        )
+        _mark_used()
+        return True
+    except Exception:
+        return False
+
+
+def close_session():
+    """Close pooled connections (worker shutdown)"""
+    _session.close()
+
+
+def _probe_groq() -> bool:
+    """Half-open probe for the circuit breaker: is the API answering at all?"""
+    r = _session.head(
+        f"{GROQ_API_URL}/models",
+        headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
+        timeout=3,
+    )
+    _mark_used()
+    return r.status_code < 500
+
+
+upstreams.register("groq", probe=_probe_groq)
+
+
 # ---------------------------------------
 # Diagnostics
 # ---------------------------------------
@@ -216,5 +337,6 @@ def get_groq_status() -> Dict:
         "default_model": GROQ_MODEL,
         "model_valid": validate_model(GROQ_MODEL),
         "rate_limit": get_rate_limit_status(),
+        "circuit": upstreams.get("groq").snapshot(),
         "api_status": api_check,
     }
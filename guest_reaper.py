@@ -0,0 +1,130 @@
+"""
+Guest Reaper
+Deletes materialized guest users (and their chats, messages and
+preferences) once they've been inactive past the retention period, in
+small batches so the users table stays bounded without long locks.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from models import Chat, Message, User, UserPreferences
+from auth import GUEST_EMAIL_DOMAIN, GUEST_PREFIX, forget_guests
+
+GUEST_RETENTION_DAYS = float(os.getenv("GUEST_RETENTION_DAYS", "30"))
+REAPER_INTERVAL = float(os.getenv("GUEST_REAPER_INTERVAL", "3600"))
+REAPER_BATCH_SIZE = int(os.getenv("GUEST_REAPER_BATCH_SIZE", "500"))
+REAPER_BATCH_PAUSE = 0.05    # let other writers in between batches
+
+logger = logging.getLogger(__name__)
+
+
+class GuestReaper:
+    """Periodic, batched deletion of guest data past retention"""
+
+    def __init__(
+        self,
+        retention_days: float = GUEST_RETENTION_DAYS,
+        interval: float = REAPER_INTERVAL,
+        batch_size: int = REAPER_BATCH_SIZE,
+    ):
+        self.retention = timedelta(days=retention_days)
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"runs": 0, "guests_deleted": 0, "last_run": None}
+
+    def _reap_batch(self, cutoff: datetime) -> int:
+        db = SessionLocal()
+        try:
+            # Guests with a message since the cutoff are still active
+            active = (
+                select(Chat.user_id)
+                .join(Message, Message.chat_id == Chat.id)
+                .where(Message.created_at >= cutoff)
+            )
+            # Only rows materialize_guest() creates: no password, guest name and domain
+            stale = (
+                db.query(User.id, User.username)
+                .filter(
+                    User.password_hash == "",
+                    User.username.startswith(GUEST_PREFIX, autoescape=True),
+                    User.email.like(f"%@{GUEST_EMAIL_DOMAIN}"),
+                    User.created_at < cutoff,
+                    User.id.not_in(active),
+                )
+                .limit(self.batch_size)
+                .all()
+            )
+            if not stale:
+                return 0
+
+            user_ids = [row.id for row in stale]
+            chat_ids = select(Chat.id).where(Chat.user_id.in_(user_ids))
+            db.query(Message).filter(Message.chat_id.in_(chat_ids)).delete(synchronize_session=False)
+            db.query(Chat).filter(Chat.user_id.in_(user_ids)).delete(synchronize_session=False)
+            db.query(UserPreferences).filter(UserPreferences.user_id.in_(user_ids)).delete(synchronize_session=False)
+            db.query(User).filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+            db.commit()
+
+            forget_guests(row.username for row in stale)
+            return len(stale)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def reap_once(self, now: Optional[datetime] = None) -> int:
+        """Delete all guests past retention, batch by batch. Returns the count"""
+        cutoff = (now or datetime.utcnow()) - self.retention
+        deleted = 0
+        while not self._stop.is_set():
+            count = self._reap_batch(cutoff)
+            deleted += count
+            if count < self.batch_size:
+                break
+            time.sleep(REAPER_BATCH_PAUSE)
+
+        self.stats["runs"] += 1
+        self.stats["guests_deleted"] += deleted
+        self.stats["last_run"] = datetime.utcnow().isoformat()
+        if deleted:
+            logger.info(f"[REAPER] Deleted {deleted} inactive guest users")
+        return deleted
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.reap_once()
+            except Exception as e:
+                logger.error(f"[REAPER] Guest cleanup failed: {e}")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="guest-reaper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats, retention_days=self.retention.days)
+
+
+# Global instance
+guest_reaper = GuestReaper()
+
+
+def get_guest_reaper():
+    """Get the global guest reaper instance"""
+    return guest_reaper
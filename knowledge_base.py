@@ -6,11 +6,11 @@ Handles document ingestion, embedding, and retrieval
 import os
 import json
 from pathlib import Path
-import PyPDF2
-from docx import Document
-import numpy as np
 from dotenv import load_dotenv
 
+# PyPDF2, python-docx and numpy are imported where they're used: most
+# processes never ingest a document or run a search
+
 load_dotenv()
 
 class KnowledgeBase:
@@ -57,6 +57,7 @@ class KnowledgeBase:
     def extract_text_from_pdf(self, filepath):
         """Extract text from PDF"""
         try:
+            import PyPDF2
             text = ""
             with open(filepath, 'rb') as file:
                 reader = PyPDF2.PdfReader(file)
@@ -70,6 +71,7 @@ class KnowledgeBase:
     def extract_text_from_docx(self, filepath):
         """Extract text from Word document"""
         try:
+            from docx import Document
             doc = Document(filepath)
             text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
             return text
@@ -166,6 +168,8 @@ class KnowledgeBase:
             )
             query_embedding = response.data[0].embedding
             
+            import numpy as np
+
             # Calculate similarity scores
             scores = {}
             for chunk_id, embedding in self.embeddings.items():
@@ -212,5 +216,20 @@ class KnowledgeBase:
         return custom
 
 
-# Create global instance
-kb = KnowledgeBase()
+# Global instance, created on first use (loading it reads the JSON files)
+_kb = None
+
+
+def get_kb():
+    """Get the global knowledge base instance"""
+    global _kb
+    if _kb is None:
+        _kb = KnowledgeBase()
+    return _kb
+
+
+def __getattr__(name):
+    # Keeps `from knowledge_base import kb` working without loading at import
+    if name == "kb":
+        return get_kb()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+SSE load test: open many concurrent /ask streams against a running server
+and report time-to-first-event, stream duration and throughput per worker.
+
+    python run_server.py                      # in another shell
+    python load_test_sse.py --clients 200 --workers 4
+
+Every stream is a real /ask request (and a real generation upstream), so
+keep --clients modest against a metered API key.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def one_stream(client, url, message, results):
+    start = time.monotonic()
+    first_event = None
+    events = 0
+    try:
+        async with client.stream("POST", url, json={"message": message, "chat_id": "load-test"}) as r:
+            if r.status_code != 200:
+                results.append({"ok": False, "error": f"HTTP {r.status_code}"})
+                return
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                events += 1
+                if first_event is None:
+                    first_event = time.monotonic() - start
+    except httpx.HTTPError as e:
+        results.append({"ok": False, "error": type(e).__name__})
+        return
+    results.append({"ok": True, "ttfe": first_event, "duration": time.monotonic() - start, "events": events})
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(args):
+    url = args.url.rstrip("/") + "/ask"
+    results = []
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    timeout = httpx.Timeout(args.timeout, connect=10)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        start = time.monotonic()
+        await asyncio.gather(*(one_stream(client, url, args.message, results) for _ in range(args.clients)))
+        elapsed = time.monotonic() - start
+
+    ok = [r for r in results if r["ok"]]
+    failed = [r for r in results if not r["ok"]]
+    print("=" * 70)
+    print(f"SSE LOAD TEST: {args.clients} concurrent streams, {args.workers} worker(s)")
+    print("=" * 70)
+    print(f"Completed: {len(ok)}  Failed: {len(failed)}  Wall time: {elapsed:.2f}s")
+    if failed:
+        errors = {}
+        for r in failed:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+        print(f"Errors: {errors}")
+    if not ok:
+        return
+
+    ttfe = [r["ttfe"] for r in ok if r["ttfe"] is not None]
+    durations = [r["duration"] for r in ok]
+    events = sum(r["events"] for r in ok)
+    if ttfe:
+        print(f"Time to first event: p50 {percentile(ttfe, 0.5) * 1000:.0f} ms, "
+              f"p95 {percentile(ttfe, 0.95) * 1000:.0f} ms")
+    print(f"Stream duration:     p50 {statistics.median(durations):.2f}s, p95 {percentile(durations, 0.95):.2f}s")
+    print(f"Throughput:          {len(ok) / elapsed:.1f} streams/s, {events / elapsed:.0f} events/s")
+    print(f"Per worker:          {len(ok) / elapsed / args.workers:.1f} streams/s, "
+          f"{events / elapsed / args.workers:.0f} events/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent streams")
+    parser.add_argument("--workers", type=int, default=1, help="server worker count, for the per-worker figures")
+    parser.add_argument("--message", default="Say hello in one sentence")
+    parser.add_argument("--timeout", type=float, default=120, help="per-stream read timeout (s)")
+    asyncio.run(run(parser.parse_args()))
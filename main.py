@@ -3,12 +3,10 @@ import requests
 from dotenv import load_dotenv
 import pickle
 from datetime import datetime
-from web_search import search_web, fetch_page
+from context_budget import pack_context
 from request_classifier import RequestClassifier
-from knowledge_base import kb
 from custom_rules import rules_engine
 from response_quality import check_response
-from math_solver import MathSolver
 from essay_writer import EssayWriter
 
 # =========================
@@ -19,6 +17,7 @@ OFFLINE_ENABLED = os.getenv('OFFLINE_ENABLED', 'false').lower() == 'true'
 GROQ_ENABLED = True  # Groq is the only inference engine
 
 # ---------- SETTINGS ----------
+SYNTHESIS_TOKEN_BUDGET = 900  # retrieved-passage budget for web search synthesis
 DATA_FOLDER = "data"
 TEST_URL = "https://www.google.com"
 
@@ -26,8 +25,17 @@ TEST_URL = "https://www.google.com"
 # INITIALIZE SYSTEMS
 # ========================
 classifier = RequestClassifier()
-math_solver = MathSolver()
 essay_writer = EssayWriter()
+_math_solver = None
+
+
+def get_math_solver():
+    """MathSolver on first math request - importing sympy takes longer than the rest of startup"""
+    global _math_solver
+    if _math_solver is None:
+        from math_solver import MathSolver
+        _math_solver = MathSolver()
+    return _math_solver
 
 def load_system_prompt(filename="system_prompt.txt"):
     """Load system prompt from external file"""
@@ -42,11 +50,11 @@ SYSTEM_PROMPT = load_system_prompt()
 
 
 # Lazy-load Groq client (ultra-fast cloud inference!)
-def get_groq_response(prompt, system_prompt=None):
-    """Safely call Groq with system prompt injection"""
+def get_groq_response(prompt, system_prompt=None, category=None):
+    """Safely call Groq with system prompt injection (model picked by the router)"""
     try:
-        from groq_client import groq_response
-        result = groq_response(prompt, system_prompt=system_prompt)
+        from model_router import routed_response
+        result = routed_response(prompt, system_prompt=system_prompt, category=category)
         if result is None:
             return "Sorry, I'm having trouble processing your request right now. Please try again in a moment."
         return result
@@ -56,23 +64,23 @@ def get_groq_response(prompt, system_prompt=None):
         print(f"  [GROQ TRACEBACK] {traceback.format_exc()}")
         return "Sorry, I'm having trouble processing your request right now. Please try again in a moment."
 
-def get_groq_response_streaming(prompt, system_prompt=None):
+def get_groq_response_streaming(prompt, system_prompt=None, category=None):
     """Stream response from Groq with system prompt injection (ultra-fast!)"""
     try:
-        from groq_client import groq_response_streaming
-        return groq_response_streaming(prompt, system_prompt=system_prompt)
+        from model_router import routed_response_streaming
+        return routed_response_streaming(prompt, system_prompt=system_prompt, category=category)
     except Exception as e:
         print(f"  Groq streaming unavailable: {e}")
         return []
 
 # Groq is the exclusive inference engine
-def get_ai_response(prompt, system_prompt=None, mode="online"):
+def get_ai_response(prompt, system_prompt=None, mode="online", category=None):
     """Get AI response from Groq (ultra-fast cloud inference)"""
-    return get_groq_response(prompt, system_prompt=system_prompt)
+    return get_groq_response(prompt, system_prompt=system_prompt, category=category)
 
-def get_ai_response_streaming(prompt, system_prompt=None, mode="online"):
+def get_ai_response_streaming(prompt, system_prompt=None, mode="online", category=None):
     """Stream AI response from Groq (ultra-fast cloud inference)"""
-    return get_groq_response_streaming(prompt, system_prompt=system_prompt)
+    return get_groq_response_streaming(prompt, system_prompt=system_prompt, category=category)
 
 # GREETING KEYWORDS (for detection only)
 GREETING_KEYWORDS = [
@@ -178,23 +186,23 @@ def handle_math_request(user_input):
     if "solve" in user_input.lower() and "equation" in user_input.lower():
         # Extract equation
         equation = user_input.lower().replace("solve", "").replace("equation", "").strip()
-        result = math_solver.solve_algebraic_equation(equation)
+        result = get_math_solver().solve_algebraic_equation(equation)
         return result, {"is_valid": True, "confidence_level": "HIGH", "issues": [], "sources_verified": False, "hallucinations_detected": False}
     
     elif "derivative" in user_input.lower():
         expr = user_input.lower().replace("derivative", "").replace("of", "").strip()
-        result = math_solver.compute_derivative(expr)
+        result = get_math_solver().compute_derivative(expr)
         return result, {"is_valid": True, "confidence_level": "HIGH", "issues": [], "sources_verified": False, "hallucinations_detected": False}
     
     elif "integral" in user_input.lower() or "integrate" in user_input.lower():
         expr = user_input.lower().replace("integral", "").replace("integrate", "").strip()
-        result = math_solver.compute_integral(expr)
+        result = get_math_solver().compute_integral(expr)
         return result, {"is_valid": True, "confidence_level": "HIGH", "issues": [], "sources_verified": False, "hallucinations_detected": False}
     
     else:
         # Use AI (Groq or Ollama) with math-specific system prompt
         math_system_prompt = """You are an expert mathematics tutor. Solve mathematical problems step by step, showing all work clearly. Use mathematical notation where appropriate. Explain concepts thoroughly."""
-        answer = get_ai_response(user_input, system_prompt=math_system_prompt)
+        answer = get_ai_response(user_input, system_prompt=math_system_prompt, category="math")
         return answer, {"is_valid": True, "confidence_level": "HIGH", "issues": [], "sources_verified": False, "hallucinations_detected": False}
 
 
@@ -212,7 +220,7 @@ def handle_essay_request(user_input):
 - Academic tone and vocabulary
 - Strong concluding synthesis"""
     
-    essay_content = get_ai_response(user_input, system_prompt=essay_system_prompt)
+    essay_content = get_ai_response(user_input, system_prompt=essay_system_prompt, category="essay")
     return essay_content, {"is_valid": True, "confidence_level": "HIGH", "issues": [], "sources_verified": False, "hallucinations_detected": False}
 
 
@@ -231,7 +239,7 @@ def handle_code_request(user_input):
 - Explain complex sections
 When debugging, identify root causes and provide fixes."""
     
-    answer = get_ai_response(user_input, system_prompt=code_system_prompt)
+    answer = get_ai_response(user_input, system_prompt=code_system_prompt, category="code")
     return answer, {"is_valid": True, "confidence_level": "HIGH", "issues": [], "sources_verified": False, "hallucinations_detected": False}
 
 
@@ -249,7 +257,7 @@ def handle_creative_request(user_input):
 - Proper structure and pacing
 - Creative and varied language"""
     
-    answer = get_ai_response(user_input, system_prompt=creative_system_prompt)
+    answer = get_ai_response(user_input, system_prompt=creative_system_prompt, category="creative")
     return answer, {"is_valid": True, "confidence_level": "HIGH", "issues": [], "sources_verified": False, "hallucinations_detected": False}
 
 
@@ -267,7 +275,7 @@ def handle_analysis_request(user_input):
 - Provide balanced pros and cons
 - Draw logical conclusions"""
     
-    answer = get_ai_response(user_input, system_prompt=analysis_system_prompt)
+    answer = get_ai_response(user_input, system_prompt=analysis_system_prompt, category="analysis")
     return answer, {"is_valid": True, "confidence_level": "HIGH", "issues": [], "sources_verified": False, "hallucinations_detected": False}
 
 
@@ -277,21 +285,23 @@ def handle_web_search_request(user_input):
     Fetches current information and synthesizes it intelligently
     """
     print("  [DOMAIN ROUTING] Web search needed - fetching live data")
+    from web_search import search_web, fetch_page  # ddgs + bs4, loaded on first search
     
     sources = search_web(user_input, max_results=5)
     
     if not sources:
         return "I couldn't retrieve live information.", {"is_valid": False, "confidence_level": "LOW", "issues": ["No sources found"], "sources_verified": False}
     
-    # Synthesize information from multiple sources
-    synthesized_data = ""
-    citations = []
-    
-    for i, src in enumerate(sources[:3], 1):  # Use top 3 sources
+    # Rank passages from the top 3 sources and pack the best into the prompt budget
+    pages = []
+    for src in sources[:3]:
         page_content = fetch_page(src["url"])
         if page_content:
-            synthesized_data += f"\n[Source {i}: {src.get('title', 'Untitled')}]\n{page_content[:1500]}\n"
-            citations.append(src["url"])
+            pages.append({"url": src["url"], "title": src.get("title", "Untitled"), "content": page_content})
+    
+    packed = pack_context(user_input, pages, budget_tokens=SYNTHESIS_TOKEN_BUDGET)
+    synthesized_data = packed["context"]
+    citations = packed["sources"]
     
     if not synthesized_data:
         return "Unable to fetch content from sources.", {"is_valid": False, "confidence_level": "LOW", "issues": ["Content fetch failed"], "sources_verified": False}
@@ -308,12 +318,12 @@ Create a coherent answer that combines information from all sources, avoiding re
     
     synthesis_system_prompt = """You are an information synthesis expert. Combine information from multiple sources into a clear, coherent answer. Eliminate redundancy and highlight key insights."""
     
-    answer = get_ai_response(synthesis_prompt, system_prompt=synthesis_system_prompt)
+    answer = get_ai_response(synthesis_prompt, system_prompt=synthesis_system_prompt, category="general")
     
     if citations:
         answer += "\n\nSources:\n" + "\n".join(citations)
     
-    quality_report = check_response(answer, sources=citations, response_type="web_search")
+    quality_report = check_response(answer, sources=citations, response_type="web_search", query=user_input)
     return answer, quality_report
 
 def comprehensive_response(user_input, mode="online"):
@@ -417,7 +427,7 @@ def comprehensive_response(user_input, mode="online"):
 - Be clear and concise"""
             
             answer = get_ai_response(user_input, system_prompt=general_system_prompt, mode=mode)
-            quality_report = check_response(answer, response_type="ollama")
+            quality_report = check_response(answer, response_type="ollama", query=user_input)
             return answer, quality_report
     
     except Exception as routing_error:
@@ -0,0 +1,222 @@
+"""
+Dynamic Model Router
+Picks a Groq model per request from the request class, prompt length and
+current rate-limit headroom (or local Ollama when Groq is unavailable), and
+records latency / token cost per route.
+"""
+
+import threading
+import time
+from typing import Dict, Generator, Optional
+
+from request_classifier import classifier
+from providers import (
+    LOCAL_MODEL,
+    FailoverStream,
+    complete_with_failover,
+    get_failover_stats,
+    groq_provider,
+    ollama_provider,
+)
+from groq_client import (
+    AVAILABLE_MODELS,
+    GROQ_MODEL,
+    get_rate_limit_status,
+    validate_model,
+)
+
+# =========================
+# ROUTING POLICY
+# =========================
+
+FAST_MODEL = "llama-3.1-8b-instant"
+STRONG_MODEL = "llama-3.3-70b-versatile"
+BALANCED_MODEL = GROQ_MODEL if validate_model(GROQ_MODEL) else "mixtral-8x7b-32768"
+
+# Cheapest last: stepping down walks towards the end of this list. Deduplicated
+# in order, since GROQ_MODEL (the balanced tier) may be one of the others
+STEP_DOWN_ORDER = list(dict.fromkeys([STRONG_MODEL, BALANCED_MODEL, FAST_MODEL]))
+
+CATEGORY_ROUTES = {
+    "greeting": FAST_MODEL,
+    "capabilities": FAST_MODEL,
+    "translation": FAST_MODEL,
+    "code": STRONG_MODEL,
+    "analysis": STRONG_MODEL,
+    "math": STRONG_MODEL,
+    "essay": STRONG_MODEL,
+    "draft": FAST_MODEL,  # search-free draft while browsing is in flight
+}
+
+SHORT_PROMPT_CHARS = 200     # short Q&A goes to the fast model
+LONG_PROMPT_CHARS = 2000     # long prompts (e.g. browsing context) need the strong model
+
+LOW_HEADROOM = 0.25          # step down one tier
+CRITICAL_HEADROOM = 0.10     # go straight to the cheapest model
+
+CHARS_PER_TOKEN = 4          # rough estimate, good enough for accounting
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for budget and cost accounting"""
+    return max(1, len(text or "") // CHARS_PER_TOKEN)
+
+
+class ModelRouter:
+    """Chooses a model per request and keeps per-route statistics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def route(self, prompt: str, category: Optional[str] = None) -> Dict:
+        """
+        Decide which model should serve a prompt.
+
+        Args:
+            prompt: Full prompt that will be sent to Groq
+            category: RequestClassifier category (classified here if omitted)
+
+        Returns:
+            Dict with model, category, reason and headroom
+        """
+        if category is None:
+            try:
+                category = classifier.classify(prompt)
+            except Exception:
+                category = "general"
+
+        length = len(prompt or "")
+        if category in CATEGORY_ROUTES:
+            model = CATEGORY_ROUTES[category]
+            reason = f"category:{category}"
+        elif length <= SHORT_PROMPT_CHARS:
+            model = FAST_MODEL
+            reason = "short_prompt"
+        elif length >= LONG_PROMPT_CHARS:
+            model = STRONG_MODEL
+            reason = "long_prompt"
+        else:
+            model = BALANCED_MODEL
+            reason = "default"
+
+        # Groq offline / circuit open / out of budget: route straight to local Ollama
+        groq_down = groq_provider.unavailable_reason()
+        if groq_down and ollama_provider.available():
+            return {
+                "model": LOCAL_MODEL,
+                "category": category,
+                "reason": f"groq_{groq_down}",
+                "headroom": 0.0,
+                "prompt_tokens": estimate_tokens(prompt),
+            }
+
+        headroom = get_rate_limit_status().get("headroom", 1.0)
+        if headroom <= CRITICAL_HEADROOM and model != FAST_MODEL:
+            model = FAST_MODEL
+            reason += "+critical_headroom"
+        elif headroom <= LOW_HEADROOM:
+            cheaper = STEP_DOWN_ORDER[min(STEP_DOWN_ORDER.index(model) + 1, len(STEP_DOWN_ORDER) - 1)]
+            if cheaper != model:
+                model = cheaper
+                reason += "+low_headroom"
+
+        return {
+            "model": model,
+            "category": category,
+            "reason": reason,
+            "headroom": headroom,
+            "prompt_tokens": estimate_tokens(prompt),
+        }
+
+    def record(self, decision: Dict, latency: float, first_token_latency: Optional[float], completion_tokens: int):
+        """Record the outcome of a routed call"""
+        model = decision["model"]
+        key = f"{decision['category']}->{model}"
+        tokens = decision.get("prompt_tokens", 0) + completion_tokens
+        cost = tokens / 1_000_000 * AVAILABLE_MODELS.get(model, {}).get("cost", 0.0)
+
+        with self._lock:
+            route = self.stats.setdefault(key, {
+                "calls": 0,
+                "errors": 0,
+                "total_latency": 0.0,
+                "total_first_token_latency": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost_usd": 0.0,
+            })
+            route["calls"] += 1
+            if not completion_tokens:
+                route["errors"] += 1
+            route["total_latency"] += latency
+            route["total_first_token_latency"] += first_token_latency or 0.0
+            route["prompt_tokens"] += decision.get("prompt_tokens", 0)
+            route["completion_tokens"] += completion_tokens
+            route["cost_usd"] += cost
+
+    def get_stats(self) -> Dict:
+        """Per-route averages for tuning the policy"""
+        with self._lock:
+            snapshot = {key: dict(value) for key, value in self.stats.items()}
+
+        for route in snapshot.values():
+            calls = route["calls"] or 1
+            route["avg_latency"] = round(route.pop("total_latency") / calls, 3)
+            route["avg_first_token_latency"] = round(route.pop("total_first_token_latency") / calls, 3)
+            route["cost_usd"] = round(route["cost_usd"], 6)
+        return snapshot
+
+
+# Global instance
+model_router = ModelRouter()
+
+
+def routed_response_streaming(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    category: Optional[str] = None,
+) -> Generator[str, None, None]:
+    """Stream using the routed model (failing over to Ollama), recording latency and tokens"""
+    decision = model_router.route(prompt, category)
+    start = time.time()
+    first_token_latency = None
+    completion_chars = 0
+    stream = FailoverStream(prompt, system_prompt, decision["model"])
+
+    try:
+        for token in stream:
+            if first_token_latency is None:
+                first_token_latency = time.time() - start
+            completion_chars += len(token)
+            yield token
+    finally:
+        if stream.failed_over:
+            decision = dict(decision, model=LOCAL_MODEL, reason=decision["reason"] + "+failover")
+        completion_tokens = max(1, completion_chars // CHARS_PER_TOKEN) if completion_chars else 0
+        model_router.record(decision, time.time() - start, first_token_latency, completion_tokens)
+
+
+def routed_response(
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    category: Optional[str] = None,
+) -> Optional[str]:
+    """Non-streaming call using the routed model (failing over to Ollama)"""
+    decision = model_router.route(prompt, category)
+    start = time.time()
+    result, provider = complete_with_failover(prompt, system_prompt, decision["model"])
+    if provider is ollama_provider and decision["model"] != LOCAL_MODEL:
+        decision = dict(decision, model=LOCAL_MODEL, reason=decision["reason"] + "+failover")
+    latency = time.time() - start
+    model_router.record(decision, latency, latency if result else None, estimate_tokens(result) if result else 0)
+    return result
+
+
+def get_routing_stats() -> Dict:
+    """Routing statistics plus the live rate-limit headroom"""
+    return {
+        "routes": model_router.get_stats(),
+        "rate_limit": get_rate_limit_status(),
+        "failover": get_failover_stats(),
+    }
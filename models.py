@@ -2,7 +2,7 @@ from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Bool
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_hasher import password_hasher
 
 
 class User(Base):
@@ -18,11 +18,13 @@ class User(Base):
     chats = relationship("Chat", back_populates="user", cascade="all, delete")
     preferences = relationship("UserPreferences", back_populates="user", uselist=False, cascade="all, delete")
 
+    # Hashing runs on the bounded password pool (may raise HasherBusy);
+    # async callers should await password_hasher.*_async instead
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
 
 
 class UserPreferences(Base):
@@ -79,3 +81,12 @@ class Message(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     chat = relationship("Chat", back_populates="messages")
+
+
+class RevokedToken(Base):
+    """Denylist shared by all workers (see auth.sync_revocations)"""
+    __tablename__ = "revoked_tokens"
+
+    digest = Column(String(32), primary_key=True)  # token_digest() hex, never the token itself
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, default=datetime.utcnow, index=True)
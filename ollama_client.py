@@ -1,13 +1,26 @@
 import os
 import requests
 import json
+from upstream_registry import upstreams, raise_for_server_error
 
-OLLAMA_URL = "http://127.0.0.1:11434/api/generate"
-MODEL = "phi"
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+OLLAMA_URL = f"{OLLAMA_HOST}/api/generate"
+OLLAMA_TAGS_URL = f"{OLLAMA_HOST}/api/tags"
+MODEL = os.getenv("OLLAMA_MODEL", "phi")
 
 # Enable Ollama by default - it's local and doesn't require API keys
 OLLAMA_ENABLED = os.getenv("OLLAMA_ENABLED", "true") == "true"
 
+# The daemon is local: a refused connection shows up at once, so only the
+# read (time to first byte / between chunks) gets a long timeout
+CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "60"))
+TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# Pooled keep-alive session to the daemon
+_session = requests.Session()
+_session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=8))
+
 def ollama_response(prompt, system_prompt=None):
     """Get response from Ollama (non-streaming)
     
@@ -30,8 +43,13 @@ def ollama_response(prompt, system_prompt=None):
         "stream": False
     }
 
+    if not upstreams.allow("ollama"):
+        return None
+
     try:
-        r = requests.post(OLLAMA_URL, json=payload, timeout=120)
+        with upstreams.track("ollama"):
+            r = _session.post(OLLAMA_URL, json=payload, timeout=TIMEOUT)
+            raise_for_server_error(r)
         r.raise_for_status()
         data = r.json()
         return data.get("response", "").strip() or "No response from Ollama"
@@ -70,19 +88,27 @@ def ollama_response_streaming(prompt, system_prompt=None):
         "stream": True
     }
 
+    if not upstreams.allow("ollama"):
+        return
+
     try:
-        r = requests.post(OLLAMA_URL, json=payload, timeout=120, stream=True)
-        r.raise_for_status()
-        
-        for line in r.iter_lines():
-            if line:
-                try:
-                    data = json.loads(line)
-                    response_text = data.get("response", "")
-                    if response_text:
-                        yield response_text
-                except json.JSONDecodeError:
-                    continue
+        with upstreams.track("ollama"):
+            r = _session.post(OLLAMA_URL, json=payload, timeout=TIMEOUT, stream=True)
+            raise_for_server_error(r)
+        # Closing the response hands the connection back to the pool,
+        # also when the consumer stops reading early
+        with r:
+            r.raise_for_status()
+            
+            for line in r.iter_lines():
+                if line:
+                    try:
+                        data = json.loads(line)
+                        response_text = data.get("response", "")
+                        if response_text:
+                            yield response_text
+                    except json.JSONDecodeError:
+                        continue
 
     except requests.exceptions.ConnectionError:
         return
@@ -90,3 +116,16 @@ def ollama_response_streaming(prompt, system_prompt=None):
         return
     except Exception as e:
         return
+
+
+def close_session():
+    """Close pooled connections to the daemon (worker shutdown)"""
+    _session.close()
+
+
+def _probe_ollama():
+    """Half-open probe for the circuit breaker: is the local server up?"""
+    return _session.get(OLLAMA_TAGS_URL, timeout=CONNECT_TIMEOUT).status_code < 500
+
+
+upstreams.register("ollama", probe=_probe_ollama)
@@ -0,0 +1,105 @@
+"""
+Password Hashing Pool
+Runs password hashing/verification on a small dedicated thread pool (the
+hash functions release the GIL), with a configurable work factor and a cap
+on queued work so a login burst can't starve streaming requests.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Method and work factor in the full form stored in hashes, so needs_rehash()
+# can compare. The default is werkzeug 3's (what existing accounts were hashed
+# with); hashes made with other parameters are upgraded on the next login.
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+
+
+class HasherBusy(Exception):
+    """Too many hashes queued - the caller should answer 429 / retry later"""
+
+
+class PasswordHasher:
+    """Bounded pool for generate_password_hash / check_password_hash"""
+
+    def __init__(
+        self,
+        method: str = PASSWORD_HASH_METHOD,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+    ):
+        self.method = method
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.stats = {"hashed": 0, "verified": 0, "rejected_busy": 0}
+
+    def _submit(self, fn, *args) -> Future:
+        # Running + queued work is capped; beyond that fail fast instead of queueing
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["rejected_busy"] += 1
+            raise HasherBusy("Password hashing is busy")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _hash(self, password: str) -> str:
+        with self._lock:
+            self.stats["hashed"] += 1
+        return generate_password_hash(password, method=self.method)
+
+    def _verify(self, pw_hash: str, password: str) -> bool:
+        with self._lock:
+            self.stats["verified"] += 1
+        if not pw_hash:
+            return False  # guest users have no password
+        return check_password_hash(pw_hash, password)
+
+    # Blocking API (runs on the pool, waits for the result)
+
+    def hash(self, password: str) -> str:
+        return self._submit(self._hash, password).result()
+
+    def verify(self, pw_hash: str, password: str) -> bool:
+        return self._submit(self._verify, pw_hash, password).result()
+
+    # Async API (the event loop stays free while the hash runs)
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(self._hash, password))
+
+    async def verify_async(self, pw_hash: str, password: str) -> bool:
+        return await asyncio.wrap_future(self._submit(self._verify, pw_hash, password))
+
+    def needs_rehash(self, pw_hash: str) -> bool:
+        """True when a stored hash was made with a different method/work factor"""
+        return bool(pw_hash) and pw_hash.split("$", 1)[0] != self.method
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, method=self.method, max_pending=self.max_pending)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+password_hasher = PasswordHasher()
+
+
+def get_password_hasher():
+    """Get the global password hasher instance"""
+    return password_hasher
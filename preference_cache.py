@@ -0,0 +1,130 @@
+"""
+User Preference Cache
+In-process read-through cache of user preferences with a short TTL, so
+personalizing a response doesn't cost a database round-trip.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+PREFS_CACHE_TTL = float(os.getenv("PREFS_CACHE_TTL", "60"))
+MAX_CACHED_USERS = int(os.getenv("PREFS_CACHE_MAX_USERS", "10000"))
+
+
+class PreferenceCache:
+    """
+    user_id -> preferences dict, expiring after `ttl` seconds.
+
+    Writes go through invalidate(); the TTL only bounds staleness when
+    another worker changed a user's preferences and nobody told us.
+    """
+
+    def __init__(self, ttl: float = PREFS_CACHE_TTL, max_entries: int = MAX_CACHED_USERS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # user_id -> (expires_at, preferences)
+        self._loading = {}              # user_id -> loads in flight
+        self._versions = {}             # user_id -> invalidations during those loads (dropped with the last one)
+        self._listeners: List[Callable] = []
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id) -> Optional[Dict]:
+        """Cached preferences or None when missing/expired"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self._entries.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return _copy(entry[1])
+
+    def get_or_load(self, user_id, loader: Callable[[object], Dict]) -> Dict:
+        """
+        Cached preferences, calling loader(user_id) on a miss. A load that
+        races with an invalidation is returned but not cached, so an update
+        can never be overwritten by the value read just before it.
+        """
+        cached = self.get(user_id)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            self.stats["misses"] += 1
+            self._loading[user_id] = self._loading.get(user_id, 0) + 1
+            version = self._versions.get(user_id, 0)
+
+        try:
+            preferences = loader(user_id)
+            with self._lock:
+                if self._versions.get(user_id, 0) == version:
+                    self._entries[user_id] = (time.monotonic() + self.ttl, preferences)
+                    self._entries.move_to_end(user_id)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        finally:
+            with self._lock:
+                self._loading[user_id] -= 1
+                if not self._loading[user_id]:
+                    del self._loading[user_id]
+                    self._versions.pop(user_id, None)
+        return _copy(preferences)
+
+    def invalidate(self, user_id, propagate: bool = True):
+        """
+        Drop a user's cached preferences. With propagate=True the
+        invalidation listeners are told as well; call with propagate=False
+        when handling an invalidation received from another worker.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if user_id in self._loading:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self.stats["invalidations"] += 1
+            listeners = list(self._listeners) if propagate else []
+
+        for listener in listeners:
+            try:
+                listener(user_id)
+            except Exception:
+                pass  # a broken channel must not fail the update; the TTL still applies
+
+    def add_invalidation_listener(self, listener: Callable[[object], None]):
+        """
+        Register a callback run with the user_id on every local invalidation,
+        e.g. one that publishes it to the other workers (Redis pub/sub,
+        Postgres NOTIFY, ...) whose subscribers call invalidate(user_id, propagate=False).
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            # In-flight loads must still see this as an invalidation
+            for user_id in self._loading:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), ttl=self.ttl)
+
+
+def _copy(preferences: Dict) -> Dict:
+    """Callers may modify what they get back; the cached dict stays intact"""
+    copied = dict(preferences)
+    if isinstance(copied.get("specializations"), dict):
+        copied["specializations"] = dict(copied["specializations"])
+    return copied
+
+
+# Global instance
+preference_cache = PreferenceCache()
+
+
+def get_preference_cache():
+    """Get the global preference cache instance"""
+    return preference_cache
@@ -0,0 +1,210 @@
+"""
+Inference Providers
+One streaming interface over Groq and the local Ollama daemon, with
+failover driven by connectivity, circuit state and rate-limit headroom.
+"""
+
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Generator, List, Optional
+
+import groq_client
+from connectivity import is_online
+from upstream_registry import upstreams
+from groq_client import get_rate_limit_status, groq_response, groq_response_streaming
+from ollama_client import MODEL as OLLAMA_MODEL, OLLAMA_ENABLED, ollama_response, ollama_response_streaming
+
+LOCAL_MODEL = f"ollama:{OLLAMA_MODEL}"
+
+logger = logging.getLogger(__name__)
+
+
+class Provider(ABC):
+    """Common interface: availability check plus streaming/one-shot completion"""
+
+    name = ""
+
+    @abstractmethod
+    def unavailable_reason(self) -> Optional[str]:
+        """Why this provider should be skipped right now (None = usable)"""
+
+    def available(self) -> bool:
+        return self.unavailable_reason() is None
+
+    @abstractmethod
+    def stream(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None) -> Generator[str, None, None]:
+        """Answer tokens as they arrive"""
+
+    @abstractmethod
+    def complete(self, prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None) -> Optional[str]:
+        """The whole answer in one call (None on failure)"""
+
+
+class GroqProvider(Provider):
+    name = "groq"
+
+    def unavailable_reason(self) -> Optional[str]:
+        if not groq_client.GROQ_ENABLED or not groq_client.GROQ_API_KEY:
+            return "disabled"
+        if not is_online():
+            return "offline"
+        if not upstreams.available("groq"):
+            return "circuit_open"
+        if get_rate_limit_status()["remaining"] <= 0:
+            return "rate_limited"
+        return None
+
+    def stream(self, prompt, system_prompt=None, model=None):
+        return groq_response_streaming(prompt, system_prompt=system_prompt, model=model)
+
+    def complete(self, prompt, system_prompt=None, model=None):
+        return groq_response(prompt, system_prompt=system_prompt, model=model)
+
+
+class OllamaProvider(Provider):
+    name = "ollama"
+
+    def unavailable_reason(self) -> Optional[str]:
+        if not OLLAMA_ENABLED:
+            return "disabled"
+        if not upstreams.available("ollama"):
+            return "circuit_open"
+        return None
+
+    def stream(self, prompt, system_prompt=None, model=None):
+        return ollama_response_streaming(prompt, system_prompt=system_prompt)
+
+    def complete(self, prompt, system_prompt=None, model=None):
+        return ollama_response(prompt, system_prompt=system_prompt)
+
+
+groq_provider = GroqProvider()
+ollama_provider = OllamaProvider()
+
+
+def provider_chain(model: Optional[str] = None) -> List[Provider]:
+    """Providers to try, in order, for a routed model"""
+    if model == LOCAL_MODEL:
+        return [ollama_provider]
+    return [groq_provider, ollama_provider]
+
+
+# =========================
+# FAILOVER
+# =========================
+
+class FailoverStats:
+    """How often we fail over and how long it takes to get a token from the fallback"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.failovers = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.paths: Dict[str, int] = {}
+
+    def record(self, path: str, latency: float):
+        with self._lock:
+            self.failovers += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.paths[path] = self.paths.get(path, 0) + 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "failovers": self.failovers,
+                "avg_failover_latency": round(self.total_latency / self.failovers, 3) if self.failovers else 0.0,
+                "max_failover_latency": round(self.max_latency, 3),
+                "paths": dict(self.paths),
+            }
+
+
+failover_stats = FailoverStats()
+
+
+class FailoverStream:
+    """
+    Iterate tokens from the first provider in the chain that produces any.
+    A provider that is unavailable is skipped without a call; one that ends
+    without a token (error, timeout, rate limit) hands over to the next.
+    Once a token has been sent there is no failover - it would duplicate text.
+
+    After iteration, `provider` is the provider that answered (None if none
+    did) and `failover_latency` the seconds from start to its first token
+    when it wasn't the first choice.
+    """
+
+    def __init__(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        model: Optional[str] = None,
+        chain: Optional[List[Provider]] = None,
+    ):
+        self.prompt = prompt
+        self.system_prompt = system_prompt
+        self.model = model
+        self.chain = chain if chain is not None else provider_chain(model)
+        self.provider: Optional[Provider] = None
+        self.skipped: List[str] = []
+        self.failover_latency: Optional[float] = None
+
+    @property
+    def failed_over(self) -> bool:
+        return bool(self.skipped) and self.provider is not None
+
+    def __iter__(self) -> Generator[str, None, None]:
+        start = time.monotonic()
+        for provider in self.chain:
+            reason = provider.unavailable_reason()
+            if reason:
+                self.skipped.append(f"{provider.name}:{reason}")
+                continue
+
+            produced = False
+            for token in provider.stream(self.prompt, self.system_prompt, self.model):
+                if not produced:
+                    produced = True
+                    self.provider = provider
+                    if self.skipped:
+                        self._record_failover(provider, time.monotonic() - start)
+                yield token
+            if produced:
+                return
+            self.skipped.append(f"{provider.name}:no_output")
+
+    def _record_failover(self, provider: Provider, latency: float):
+        self.failover_latency = latency
+        path = f"{self.skipped[0].split(':')[0]}->{provider.name}"
+        failover_stats.record(path, latency)
+        logger.warning(f"[FAILOVER] {path} after {latency:.2f}s ({', '.join(self.skipped)})")
+
+
+def complete_with_failover(prompt: str, system_prompt: Optional[str] = None, model: Optional[str] = None):
+    """
+    Non-streaming counterpart of FailoverStream.
+
+    Returns:
+        (text or None, provider that answered or None)
+    """
+    start = time.monotonic()
+    skipped = []
+    for provider in provider_chain(model):
+        reason = provider.unavailable_reason()
+        if reason:
+            skipped.append(provider.name)
+            continue
+        result = provider.complete(prompt, system_prompt, model)
+        if result:
+            if skipped:
+                failover_stats.record(f"{skipped[0]}->{provider.name}", time.monotonic() - start)
+            return result, provider
+        skipped.append(provider.name)
+    return None, None
+
+
+def get_failover_stats() -> Dict:
+    return failover_stats.get_stats()
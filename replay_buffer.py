@@ -0,0 +1,91 @@
+"""
+Replay Buffer
+Short-lived registry of resumable /ask streams by stream id, so a client
+reconnecting with Last-Event-ID ("<stream id>:<frame id>") is attached to
+the generation it lost instead of asking again. Streams are dropped a TTL
+after they go idle, and oldest-first once the total size passes a cap.
+"""
+
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+REPLAY_TTL = float(os.getenv("REPLAY_TTL", "120"))   # seconds an idle stream stays resumable
+REPLAY_MAX_BYTES = int(os.getenv("REPLAY_MAX_BYTES", str(32 * 1024 * 1024)))
+SWEEP_INTERVAL = 1.0
+
+
+def parse_last_event_id(value: str) -> Optional[Tuple[str, int]]:
+    """'<stream id>:<frame id>' -> (stream id, frame id), None if malformed"""
+    stream_id, _, frame_id = (value or "").strip().rpartition(":")
+    if not stream_id or not frame_id.isdigit():
+        return None
+    return stream_id, int(frame_id)
+
+
+class ReplayBuffer:
+    """stream id -> StreamPump, in creation order"""
+
+    def __init__(self, ttl: float = REPLAY_TTL, max_bytes: int = REPLAY_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._streams = OrderedDict()
+        self._last_sweep = 0.0
+        self.stats = {"registered": 0, "expired": 0, "evicted_for_memory": 0, "resume_hits": 0, "resume_misses": 0}
+
+    @staticmethod
+    def new_stream_id() -> str:
+        # Unguessable: knowing the id is what entitles a client to the stream
+        return secrets.token_urlsafe(12)
+
+    def add(self, pump):
+        with self._lock:
+            self._streams[pump.stream_id] = pump
+            self.stats["registered"] += 1
+        self.sweep()
+
+    def get(self, stream_id: str):
+        self.sweep()
+        with self._lock:
+            pump = self._streams.get(stream_id)
+            self.stats["resume_hits" if pump is not None else "resume_misses"] += 1
+            return pump
+
+    def sweep(self, force: bool = False):
+        """Drop idle streams past the TTL, then the oldest until under the memory cap"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_sweep < SWEEP_INTERVAL:
+                return
+            self._last_sweep = now
+            for stream_id, pump in list(self._streams.items()):
+                if not pump.consumers and now - pump.last_active > self.ttl:
+                    del self._streams[stream_id]
+                    self.stats["expired"] += 1
+            total = sum(pump.bytes for pump in self._streams.values())
+            while total > self.max_bytes and self._streams:
+                # Finished streams go first; a live one only stops being resumable
+                victim = next((sid for sid, p in self._streams.items() if p.done), None) or next(iter(self._streams))
+                total -= self._streams.pop(victim).bytes
+                self.stats["evicted_for_memory"] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(
+                self.stats,
+                streams=len(self._streams),
+                bytes=sum(pump.bytes for pump in self._streams.values()),
+            )
+
+
+# Global instance
+replay_buffer = ReplayBuffer()
+
+
+def get_replay_buffer():
+    """Get the global replay buffer instance"""
+    return replay_buffer
@@ -0,0 +1,87 @@
+"""
+Request Coalescing
+Single-flight for /ask: while a generation for a question is in flight,
+identical questions (after normalization, with the same formatting) attach
+to its stream instead of starting their own search, fetches and Groq call.
+Late joiners replay the stream from its first frame.
+"""
+
+import re
+import threading
+from typing import Dict, Hashable, Optional
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n.?!,;:"
+
+
+def normalize_query(text: str) -> str:
+    """Case, surrounding punctuation and runs of whitespace don't change the answer"""
+    return _WHITESPACE.sub(" ", text.lower()).strip(_EDGE_PUNCTUATION)
+
+
+class Flight:
+    """One in-flight generation and the stream whose transcript joiners save"""
+
+    def __init__(self, key: Hashable, pump):
+        self.key = key
+        self.pump = pump
+        self.stream = None   # leader's ActiveStream, set once its generator starts
+        self.joiners = 0
+
+    def transcript(self) -> str:
+        if self.stream is None or self.stream.writer is None:
+            return ""
+        return self.stream.writer.transcript
+
+    def joinable(self) -> bool:
+        # The whole stream must still be replayable from the first frame
+        return not self.pump.done and self.pump.can_resume(0)
+
+
+class RequestCoalescer:
+    """key -> Flight for generations still running"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Flight] = {}
+        self.stats = {"leaders": 0, "joined": 0}
+
+    def join(self, key: Hashable) -> Optional[Flight]:
+        """The in-flight generation for `key`, if a new subscriber can still join it"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                return None
+            if not flight.joinable():
+                del self._flights[key]
+                return None
+            flight.joiners += 1
+            self.stats["joined"] += 1
+            return flight
+
+    def lead(self, key: Hashable, pump) -> Flight:
+        """Register a new generation for `key`"""
+        with self._lock:
+            # Finished flights are otherwise only dropped when their key comes up again
+            for stale in [k for k, f in self._flights.items() if f.pump.done]:
+                del self._flights[stale]
+            flight = self._flights[key] = Flight(key, pump)
+            self.stats["leaders"] += 1
+            return flight
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(
+                self.stats,
+                in_flight=sum(1 for f in self._flights.values() if not f.pump.done),
+                upstream_calls_saved=self.stats["joined"],
+            )
+
+
+# Global instance
+request_coalescer = RequestCoalescer()
+
+
+def get_request_coalescer():
+    """Get the global request coalescer instance"""
+    return request_coalescer
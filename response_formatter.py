@@ -1,10 +1,6 @@
 """Format responses based on user preferences"""
 import re
-from response_quality import (
-    check_response_quality,
-    CONFIDENCE_LEVELS,
-    add_confidence_marker
-)
+from response_quality import add_confidence_marker
 
 
 def format_response(text, preferences=None, confidence_level=None, sources=None):
@@ -45,167 +41,286 @@ def format_response(text, preferences=None, confidence_level=None, sources=None)
     use_bullets = preferences.get("use_bullets", True)
     use_emojis = preferences.get("use_emojis", True)
     
-    formatted = text
+    formatted = _format_lines(text, use_lists, use_numbered, use_bullets, use_emojis)
     
-    # Step 1: Structure paragraphs into clearer sections
-    if use_lists:
-        formatted = _structure_into_lists(formatted, use_numbered, use_bullets)
-    
-    # Step 2: Add visual separators for better readability
-    formatted = _add_visual_separators(formatted)
-    
-    # Step 3: Emphasize key points
-    formatted = _emphasize_key_points(formatted)
-    
-    # Step 4: Add emojis if requested
-    if use_emojis:
-        formatted = _add_relevant_emojis(formatted)
-    
-    # Step 5: Add confidence markers and sources
+    # Add confidence markers and sources
     if include_confidence and confidence_level:
         formatted = add_confidence_marker(formatted, confidence_level, sources)
     
     return formatted
 
 
-def _structure_into_lists(text, use_numbered=True, use_bullets=True):
+# =========================
+# FORMATTING RULES
+# =========================
+# All patterns are compiled once; _format_lines() applies every rule in a
+# single pass over the lines.
+
+# Lines that are already list items
+LIST_ITEM_RE = re.compile(r'^[\d]+[\.\)]\s+|^[-•]\s+')
+
+# Long sentences are broken into list items at commas and conjunctions
+SPLIT_MIN_CHARS = 120
+SPLIT_HINTS = (',', 'and', 'also', 'additionally')
+SPLIT_RE = re.compile(r',\s+|(?<=\w)\s+(?:and|also|additionally|furthermore|moreover)\s+')
+
+# Short capitalised lines are treated as headers, long paragraphs get air
+HEADER_MAX_CHARS = 60
+PARAGRAPH_MIN_CHARS = 150
+
+# Key words get emphasis: (words, replacement template)
+EMPHASIS_RULES = [
+    (('important', 'critical', 'must', 'required', 'note', 'remember', 'key'), '**{}**'),
+    (('warning', 'caution', 'attention'), '⚠️ {}'),
+    (('success', 'completed', 'done', 'finished'), '✅ {}'),
+]
+
+# Lines mentioning a topic get its emoji (in this order, once per line)
+EMOJI_RULES = [
+    (r'step[\s\d]+', '📍'),
+    (r'example', '💡'),
+    (r'note', '📝'),
+    (r'code', '💻'),
+    (r'question', '❓'),
+    (r'answer', '✅'),
+    (r'error', '❌'),
+    (r'warning', '⚠️'),
+    (r'tip', '💡'),
+    (r'important', '⭐'),
+    (r'summary', '📊'),
+    (r'list', '📋'),
+    (r'check', '✓'),
+    (r'number', '🔢'),
+]
+
+
+def _compile_emphasis(rules):
+    groups = [f"({'|'.join(words)})" for words, _ in rules]
+    return re.compile(r'\b(?:' + '|'.join(groups) + r')\b', re.IGNORECASE), [t for _, t in rules]
+
+
+def _compile_emojis(rules):
+    # Marker groups go last so every alternative starts with a literal and
+    # the case-sensitive variant (for lowercased lines) can skip ahead fast
+    alternatives = '|'.join(f"{pattern}(?P<e{i}>)" for i, (pattern, _) in enumerate(rules))
+    return re.compile(alternatives), re.compile(alternatives, re.IGNORECASE), [emoji for _, emoji in rules]
+
+
+EMPHASIS_RE, EMPHASIS_TEMPLATES = _compile_emphasis(EMPHASIS_RULES)
+EMOJI_LOWER_RE, EMOJI_RE, EMOJIS = _compile_emojis(EMOJI_RULES)
+
+# Characters IGNORECASE matches against ASCII letters (or whose lowercase
+# form changes length) - lines with them can't be searched lowercased
+CASE_FOLD_HAZARDS_RE = re.compile("[İıſK]")
+
+
+def _emphasize(match):
+    index = match.lastindex
+    return EMPHASIS_TEMPLATES[index - 1].format(match.group(index))
+
+
+def _emphasize_key_points(line):
+    """Make key points stand out with emphasis markers"""
+    return EMPHASIS_RE.sub(_emphasize, line)
+
+
+def _add_relevant_emojis(line):
+    """Prefix a line with the emojis of the topics it mentions"""
+    # No two topics can start at the same character, so stepping one
+    # character past each hit finds every topic, overlapping ones included
+    if line.isascii() or not CASE_FOLD_HAZARDS_RE.search(line):
+        search, subject = EMOJI_LOWER_RE.search, line.lower()
+    else:
+        search, subject = EMOJI_RE.search, line
+
+    found = set()
+    pos = 0
+    while True:
+        match = search(subject, pos)
+        if match is None:
+            break
+        found.add(int(match.lastgroup[1:]))
+        pos = match.start() + 1
+
+    for index in sorted(found):
+        emoji = EMOJIS[index]
+        if emoji not in line:  # Don't add duplicate emojis
+            line = emoji + ' ' + line
+    return line
+
+
+def _structure_line(line, use_numbered=True, use_bullets=True):
     """
-    Convert dense paragraphs into lists where appropriate.
-    Intelligently breaks up long text into digestible chunks.
+    Lines for one input line: long sentences become list items, everything
+    else is kept as-is (blank lines are normalised to "").
     """
-    lines = text.split('\n')
-    result = []
-    
-    for line in lines:
-        stripped = line.strip()
-        
-        # Skip empty lines but preserve spacing
-        if not stripped:
-            result.append("")
-            continue
-        
-        # Check if line is already formatted as a list item
-        if re.match(r'^[\d]+[\.\)]\s+', stripped) or re.match(r'^[-•]\s+', stripped):
-            result.append(line)
-            continue
-        
-        # Break up long sentences into logical chunks
-        if len(stripped) > 120 and any(word in stripped.lower() for word in [',', 'and', 'also', 'additionally']):
-            # Split by common conjunctions
-            parts = re.split(r',\s+|(?<=\w)\s+(?:and|also|additionally|furthermore|moreover)\s+', stripped)
+    stripped = line.strip()
+    if not stripped:
+        return [""]
+    if LIST_ITEM_RE.match(stripped):
+        return [line]
+
+    if len(stripped) > SPLIT_MIN_CHARS:
+        lowered = stripped.lower()
+        if any(hint in lowered for hint in SPLIT_HINTS):
+            parts = SPLIT_RE.split(stripped)
             if len(parts) > 1:
-                # Format as bullet points
+                items = []
                 for i, part in enumerate(parts):
                     part = part.strip()
                     if part:
                         if use_bullets:
-                            result.append(f"• {part}")
+                            items.append(f"• {part}")
                         elif use_numbered:
-                            result.append(f"{i+1}. {part}")
+                            items.append(f"{i+1}. {part}")
                         else:
-                            result.append(f"- {part}")
-                continue
-        
-        # Otherwise keep the line as-is
-        result.append(line)
-    
-    return '\n'.join(result)
+                            items.append(f"- {part}")
+                return items
 
+    return [line]
 
-def _format_list(items, use_numbered=True, use_bullets=True):
-    """Format list items with appropriate prefix"""
-    if not items:
-        return []
-    
-    formatted = []
-    for i, item in enumerate(items, 1):
-        if use_numbered and i == 1:  # First item can be numbered
-            formatted.append(f"1. {item}")
-        elif use_numbered and len(items) > 1:
-            formatted.append(f"{i}. {item}")
-        elif use_bullets:
-            formatted.append(f"• {item}")
-        else:
-            formatted.append(f"- {item}")
-    
-    return formatted
 
+def _format_lines(text, use_lists=True, use_numbered=True, use_bullets=True, use_emojis=True):
+    """
+    Structure, space out, emphasize and decorate the text in one pass.
+
+    Lines are structured first; a line's spacing depends on the line after
+    it, so each structured line is finished (emphasis, emojis) once its
+    successor is known.
+    """
+    if use_lists:
+        lines = (item for line in text.split('\n') for item in _structure_line(line, use_numbered, use_bullets))
+    else:
+        lines = iter(text.split('\n'))
 
-def _add_visual_separators(text):
-    """Add headers and line breaks for better readability"""
-    lines = text.split('\n')
     result = []
-    
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        result.append(line)
-        
-        # Add separator after potential headers/section titles
-        if stripped and len(stripped) < 60 and stripped[0].isupper():
-            # Check if it looks like a header
-            if i + 1 < len(lines) and lines[i + 1].strip():
-                # Add blank line for spacing
-                result.append("")
-        
-        # Break up very long paragraphs with line breaks
-        if len(stripped) > 150 and '.' in stripped:
-            # Check if next line exists and isn't already separated
-            if i + 1 < len(lines) and lines[i + 1].strip():
-                # Insert line break for readability
-                result.append("")
-    
+    append = result.append
+
+    def finish(line):
+        line = _emphasize_key_points(line)
+        append(_add_relevant_emojis(line) if use_emojis else line)
+
+    current = next(lines)
+    for following in lines:
+        finish(current)
+        if following.strip() and _needs_gap(current.strip()):
+            append("")
+        current = following
+    finish(current)
+
     return '\n'.join(result)
 
 
-def _emphasize_key_points(text):
-    """Make key points stand out with emphasis markers"""
-    # Emphasize common important words
-    important_patterns = [
-        (r'\b(important|critical|must|required|note|remember|key)\b', r'**\1**'),
-        (r'\b(warning|caution|attention)\b', r'⚠️ \1'),
-        (r'\b(success|completed|done|finished)\b', r'✅ \1'),
-    ]
-    
-    result = text
-    for pattern, replacement in important_patterns:
-        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
-    
-    return result
-
-
-def _add_relevant_emojis(text):
-    """Add relevant emojis to enhance readability"""
-    emoji_map = {
-        r'step[\s\d]+': '📍',
-        r'example': '💡',
-        r'note': '📝',
-        r'code': '💻',
-        r'question': '❓',
-        r'answer': '✅',
-        r'error': '❌',
-        r'warning': '⚠️',
-        r'tip': '💡',
-        r'important': '⭐',
-        r'summary': '📊',
-        r'list': '📋',
-        r'check': '✓',
-        r'number': '🔢',
-    }
-    
-    result = text
-    
-    for pattern, emoji in emoji_map.items():
-        # Only add emoji if not already present in line
-        lines = result.split('\n')
-        new_lines = []
-        for line in lines:
-            if re.search(pattern, line, re.IGNORECASE):
-                if emoji not in line:  # Don't add duplicate emojis
-                    line = emoji + ' ' + line
-            new_lines.append(line)
-        result = '\n'.join(new_lines)
-    
-    return result
+def _needs_gap(stripped):
+    """Blank line after headers and very long paragraphs (if more text follows)"""
+    return bool(
+        (stripped and len(stripped) < HEADER_MAX_CHARS and stripped[0].isupper())
+        or (len(stripped) > PARAGRAPH_MIN_CHARS and '.' in stripped)
+    )
+
+
+# =========================
+# STREAMING
+# =========================
+
+MAX_STREAM_LINE_CHARS = 4000   # longer lines are passed through unformatted
+
+
+class StreamingFormatter:
+    """
+    Incremental format_response() for streamed answers.
+
+    Chunks are buffered up to the next newline; each completed line is
+    formatted and emitted straight away. The one piece of lookahead the
+    rules need - whether a blank line goes between two lines - is settled
+    when the next line arrives. The fragments joined together equal
+    format_response() without the confidence marker, which belongs at the
+    top (streamed answers carry confidence in quality events instead).
+    """
+
+    def __init__(self, preferences=None, max_line_chars=MAX_STREAM_LINE_CHARS):
+        preferences = preferences or {}
+        self.plain = preferences.get("response_format", "formatted") == "plain"
+        self.use_lists = preferences.get("use_lists", True)
+        self.use_numbered = preferences.get("use_numbered", True)
+        self.use_bullets = preferences.get("use_bullets", True)
+        self.use_emojis = preferences.get("use_emojis", True)
+        self.max_line_chars = max_line_chars
+        self._pending = []        # pieces of the current line
+        self._pending_size = 0
+        self._previous = None     # stripped text of the last line emitted (None before the first)
+        self._passthrough = False # current line overflowed and is streamed as-is
+
+    def signature(self):
+        """The preferences that change the output - equal signatures format identically"""
+        return (self.plain, self.use_lists, self.use_numbered, self.use_bullets, self.use_emojis, self.max_line_chars)
+
+    def feed(self, chunk):
+        """Add a chunk; returns the formatted text that is ready ("" if none)"""
+        if self.plain or not chunk:
+            return chunk or ""
+
+        output = []
+        while chunk:
+            newline = chunk.find('\n')
+            if newline < 0:
+                self._buffer(chunk, output)
+                break
+            self._buffer(chunk[:newline], output)
+            chunk = chunk[newline + 1:]
+            self._end_line(output)
+        return "".join(output)
+
+    def finish(self):
+        """Format whatever is left (the last line)"""
+        if self.plain:
+            return ""
+        output = []
+        self._end_line(output)
+        return "".join(output)
+
+    def _buffer(self, piece, output):
+        if self._passthrough:
+            output.append(piece)
+            return
+        self._pending.append(piece)
+        self._pending_size += len(piece)
+        if self._pending_size > self.max_line_chars:
+            # Too long to hold back - send it unformatted
+            text = "".join(self._pending)
+            self._pending, self._pending_size = [], 0
+            output.append(self._separator(text) + text)
+            self._previous = ""
+            self._passthrough = True
+
+    def _end_line(self, output):
+        if self._passthrough:
+            self._passthrough = False
+            return
+
+        line = "".join(self._pending)
+        self._pending, self._pending_size = [], 0
+
+        if self.use_lists:
+            items = _structure_line(line, self.use_numbered, self.use_bullets)
+        else:
+            items = [line]
+
+        for item in items:
+            separator = self._separator(item)
+            item = _emphasize_key_points(item)
+            if self.use_emojis:
+                item = _add_relevant_emojis(item)
+            output.append(separator + item)
+
+    def _separator(self, line):
+        """What goes between the previous line and this one"""
+        previous, self._previous = self._previous, line.strip()
+        if previous is None:
+            return ""
+        if self._previous and _needs_gap(previous):
+            return "\n\n"
+        return "\n"
 
 
 def apply_tone(text, tone="professional"):
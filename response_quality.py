@@ -3,16 +3,16 @@ Response Quality & Fact-Checking Module
 Validates responses for accuracy, sources, and confidence levels
 """
 
+import importlib.util
 import re
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-# Import web search for verification
-try:
-    from web_search import search_web, fetch_page
-    WEB_SEARCH_AVAILABLE = True
-except ImportError:
-    WEB_SEARCH_AVAILABLE = False
+from claim_matcher import build_page_index, match_claims, split_claims
+
+# Web search (ddgs + bs4) is imported by web_verifier on first use;
+# here we only check that it could be
+WEB_SEARCH_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ("ddgs", "bs4"))
 
 # =========================
 # CONFIDENCE LEVELS
@@ -63,140 +63,309 @@ CURRENT_YEAR = CURRENT_DATE.year
 CURRENT_MONTH = CURRENT_DATE.month
 
 # =========================
-# FACT-CHECKING FUNCTIONS
+# RULE ENGINE
 # =========================
+# Text checks are declared as data and compiled once into a single matcher.
+#   mode "each":  one issue per (non-overlapping) match
+#   mode "once":  one issue if the rule matches anywhere
+#   mode "count": presence only - feeds an aggregate check (Wikipedia-only)
+# "lowered" rules are matched against text.lower() (plain substring checks)
+
+POLICY_CLAIM_ISSUE = {
+    "type": "UNVERIFIABLE_POLICY_CLAIM",
+    "severity": "HIGH",
+    "message": "Policy/regulation claims require official source attribution",
+    "confidence_penalty": 0.3
+}
+
+GENERIC_FILLER_ISSUE = {
+    "type": "GENERIC_FILLER",
+    "severity": "MEDIUM",
+    "message": "Response contains generic filler claims without specific evidence",
+    "confidence_penalty": 0.15
+}
+
+CONTEXT_MISMATCH_ISSUE = {
+    "type": "CONTEXT_MISMATCH",
+    "severity": "HIGH",
+    "message": "Response describes PyTorch incorrectly - it's a deep learning framework, not a general programming language",
+    "confidence_penalty": 0.35
+}
+
+
+def _date_issue(match) -> Dict:
+    date_str = match.group(1)
+
+    # Check if date is in future
+    if "2027" in date_str or "2028" in date_str or "2030" in date_str:
+        return {
+            "type": "FUTURE_DATE",
+            "text": date_str,
+            "severity": "CRITICAL",
+            "message": f"Date '{date_str}' is in the future - appears to be hallucinated",
+            "confidence_penalty": 0.3
+        }
+    if "2025" in date_str and CURRENT_YEAR >= 2026:
+        return {
+            "type": "OUTDATED_DATE",
+            "text": date_str,
+            "severity": "MEDIUM",
+            "message": f"Date '{date_str}' may be outdated",
+            "confidence_penalty": 0.2
+        }
+    return None
+
+
+def _github_issue(match) -> Dict:
+    ref = match.group(0)
+    return {
+        "type": "UNVERIFIABLE_GITHUB_REF",
+        "text": ref,
+        "severity": "HIGH",
+        "message": f"GitHub reference '{ref}' is unverifiable - should be verified or removed",
+        "confidence_penalty": 0.25
+    }
+
+
+# Strong Wikipedia indicators (plain substrings of the lowercased text)
+WIKI_INDICATORS = [
+    'wikipedia', 'wiki article', 'from wikipedia',
+    'according to wikipedia', 'the wikipedia article',
+    'wiki.* says', 'wikipedia.org'
+]
+
+# Strong official/non-wiki indicators
+OFFICIAL_INDICATORS = [
+    'official', 'documentation', 'github.com', 'official site',
+    'technical documentation', 'research', 'study', 'paper',
+    'source code', 'api', '.org', '.gov', 'repository'
+]
+
+# Every rule lists lowercase "triggers" that a match starts with ("once" and
+# "count" rules: that at least one match starts with) - plain strings, or
+# trigger_patterns (regex fragments starting with a literal) when a string
+# won't do. The combined matcher only looks for triggers; the rule's own
+# regex then confirms the match in place.
+QUALITY_RULES = [
+    # Date accuracy: "As of [DATE]"
+    {"name": "as_of_date", "check": "date_accuracy", "mode": "each", "ignore_case": False,
+     "pattern": r"As of\s+(\w+\s+\d+,?\s*\d{4})", "triggers": ["as of"], "issue": _date_issue},
+
+    # Unverifiable claims: "GitHub - username/repo", policy changes without source
+    {"name": "github_ref", "check": "unverifiable_claims", "mode": "each", "ignore_case": False,
+     "pattern": r"GitHub\s*-\s*[\w\-]+/[\w\-]+", "triggers": ["github"], "issue": _github_issue},
+    {"name": "policy_announcement", "check": "unverifiable_claims", "mode": "once", "ignore_case": True,
+     "pattern": r"(?:imposing|announcing|implementing)\s+(?:a|an)?\s*(?:\d+%\s*)?(?:tariff|tax|fee|penalty)",
+     "triggers": ["imposing", "announcing", "implementing"], "issue": POLICY_CLAIM_ISSUE},
+    {"name": "policy_change", "check": "unverifiable_claims", "mode": "once", "ignore_case": True,
+     "pattern": r"(?:is\s+)?(?:imposing|raising|lowering)\s+(?:tariff|tax|fee)",
+     "triggers": ["imposing", "raising", "lowering"], "issue": POLICY_CLAIM_ISSUE},
+
+    # Generic filler: "X small examples", "comprehensive list of ..."
+    {"name": "counted_examples", "check": "generic_filler", "mode": "once", "ignore_case": True,
+     "pattern": r"(\d+)\s+(?:small|simple|basic|quick)\s+(?:examples|tutorials|guides|scripts)",
+     "triggers": list("0123456789"), "issue": GENERIC_FILLER_ISSUE},
+    {"name": "comprehensive_examples", "check": "generic_filler", "mode": "once", "ignore_case": True,
+     "pattern": r"comprehensive\s+(?:list|collection)\s+of\s+(?:Python|code).*examples",
+     "triggers": ["comprehensive"], "issue": GENERIC_FILLER_ISSUE},
+    {"name": "complete_list", "check": "generic_filler", "mode": "once", "ignore_case": True,
+     "pattern": r"(?:here\s+)?(?:is|are)\s+(?:a|the)\s+(?:comprehensive|complete|full)\s+(?:list|guide|collection)",
+     "trigger_patterns": [r"is\s+(?:a|the)\s", r"are\s+(?:a|the)\s"], "issue": GENERIC_FILLER_ISSUE},
+
+    # Context mismatch phrases (only applied to PyTorch queries)
+    {"name": "hello_world", "check": "context_mismatch", "mode": "count", "lowered": True,
+     "pattern": r"hello world", "triggers": ["hello world"]},
+    {"name": "general_programming", "check": "context_mismatch", "mode": "count", "lowered": True,
+     "pattern": r"general programming", "triggers": ["general programming"]},
+
+    # Explicit (capitalised) Wikipedia mention
+    {"name": "wikipedia_mention", "check": "wikipedia_only", "mode": "count", "ignore_case": False,
+     "pattern": r"Wikipedia", "triggers": ["wikipedia"]},
+] + [
+    {"name": f"wiki:{indicator}", "check": "wikipedia_only", "mode": "count", "lowered": True,
+     "pattern": re.escape(indicator), "triggers": [indicator]}
+    for indicator in WIKI_INDICATORS
+] + [
+    {"name": f"official:{indicator}", "check": "wikipedia_only", "mode": "count", "lowered": True,
+     "pattern": re.escape(indicator), "triggers": [indicator]}
+    for indicator in OFFICIAL_INDICATORS
+]
+
+# Characters whose lowercase form changes length or that IGNORECASE matches
+# against ASCII letters, and non-ASCII digits (\d matches them, the "0"-"9"
+# triggers don't). Texts containing them take the rule-by-rule path.
+_CASE_FOLD_HAZARDS = re.compile("[İıſK]")
+_NON_ASCII = re.compile(r"[^\x00-\x7f]+")
+
+
+def _compile_rules(rules: List[Dict]) -> Dict:
+    """Compile each rule on its own and all triggers into one matcher"""
+    by_first_char = {}
+    pattern_rules = []
+    fragments = []
+
+    for index, rule in enumerate(rules):
+        rule["regex"] = re.compile(rule["pattern"], re.IGNORECASE if rule.get("ignore_case") else 0)
+        if rule.get("trigger_patterns"):
+            pattern_rules.append(index)
+            fragments.extend(rule["trigger_patterns"])
+        for trigger in rule.get("triggers", []):
+            by_first_char.setdefault(trigger[0], {}).setdefault(trigger, []).append(index)
+
+    # Every alternative starts with a literal, so the regex engine can skip
+    # ahead on the first character instead of trying each alternative
+    literals = sorted({t for group in by_first_char.values() for t in group}, key=len, reverse=True)
+
+    return {
+        "matcher": re.compile("|".join([re.escape(t) for t in literals] + fragments)),
+        "max_trigger_chars": len(literals[0]),
+        "by_first_char": {ch: list(group.items()) for ch, group in by_first_char.items()},
+        "pattern_rules": pattern_rules,
+    }
+
+
+_COMPILED_RULES = _compile_rules(QUALITY_RULES)
+
+
+def _needs_exact_scan(text: str) -> bool:
+    if text.isascii():
+        return False
+    odd = "".join(_NON_ASCII.findall(text))
+    return bool(_CASE_FOLD_HAZARDS.search(odd)) or any(ch.isdecimal() for ch in odd)
+
 
-def check_date_accuracy(text: str) -> Dict:
+def _record_hit(hits: Dict, last_end: Dict, rule: Dict, text: str, lowered: str, start: int):
+    name = rule["name"]
+    if rule["mode"] == "each":
+        if start < last_end.get(name, 0):
+            return  # overlaps this rule's previous match
+    elif name in hits:
+        return
+    match = rule["regex"].match(lowered if rule.get("lowered") else text, start)
+    if match is not None:
+        hits.setdefault(name, []).append(match)
+        last_end[name] = match.end()
+
+
+def scan_text(text: str) -> Dict[str, List]:
     """
-    Detect and flag date-related issues in text.
-    Returns confidence impact.
+    Run every rule over the text in a single left-to-right pass.
+
+    Returns a dict of rule name -> matches ("each" rules keep every
+    non-overlapping match, other rules just their first one). Rules that
+    don't match are absent.
     """
+    hits = {}
+
+    lowered = text.lower()
+
+    if _needs_exact_scan(text):
+        for rule in QUALITY_RULES:
+            subject = lowered if rule.get("lowered") else text
+            if rule["mode"] == "each":
+                matches = list(rule["regex"].finditer(subject))
+            else:
+                match = rule["regex"].search(subject)
+                matches = [match] if match else []
+            if matches:
+                hits[rule["name"]] = matches
+        return hits
+
+    last_end = {}
+    rules = QUALITY_RULES
+    search = _COMPILED_RULES["matcher"].search
+    by_first_char = _COMPILED_RULES["by_first_char"]
+    pattern_rules = _COMPILED_RULES["pattern_rules"]
+    pos = 0
+
+    while True:
+        found = search(lowered, pos)
+        if found is None:
+            break
+        start = found.start()
+
+        for trigger, indexes in by_first_char.get(lowered[start], ()):
+            if lowered.startswith(trigger, start):
+                for index in indexes:
+                    _record_hit(hits, last_end, rules[index], text, lowered, start)
+        for index in pattern_rules:
+            _record_hit(hits, last_end, rules[index], text, lowered, start)
+
+        pos = start + 1
+
+    return hits
+
+
+def _rule_issues(check: str, hits: Dict[str, List]) -> List[Dict]:
+    """Issues raised by one check's rules, in declaration order"""
     issues = []
-    
-    # Pattern: "As of [DATE]"
-    date_pattern = r"As of\s+(\w+\s+\d+,?\s*\d{4})"
-    matches = re.finditer(date_pattern, text)
-    
-    for match in matches:
-        date_str = match.group(1)
-        
-        # Check if date is in future
-        if "2027" in date_str or "2028" in date_str or "2030" in date_str:
-            issues.append({
-                "type": "FUTURE_DATE",
-                "text": date_str,
-                "severity": "CRITICAL",
-                "message": f"Date '{date_str}' is in the future - appears to be hallucinated",
-                "confidence_penalty": 0.3
-            })
-        elif "2025" in date_str and CURRENT_YEAR >= 2026:
-            issues.append({
-                "type": "OUTDATED_DATE",
-                "text": date_str,
-                "severity": "MEDIUM",
-                "message": f"Date '{date_str}' may be outdated",
-                "confidence_penalty": 0.2
-            })
-    
+    for rule in QUALITY_RULES:
+        if rule["check"] != check or rule["name"] not in hits:
+            continue
+        if rule["mode"] == "each":
+            for match in hits[rule["name"]]:
+                issue = rule["issue"](match)
+                if issue:
+                    issues.append(issue)
+        elif rule["mode"] == "once":
+            issues.append(dict(rule["issue"]))
+    return issues
+
+
+def _check_result(issues: List[Dict]) -> Dict:
     return {
         "has_issues": len(issues) > 0,
         "issues": issues,
         "penalty": sum(i.get("confidence_penalty", 0) for i in issues)
     }
 
+# =========================
+# FACT-CHECKING FUNCTIONS
+# =========================
 
-def check_unverifiable_claims(text: str) -> Dict:
+def check_date_accuracy(text: str, hits: Dict[str, List] = None) -> Dict:
+    """
+    Detect and flag date-related issues in text.
+    Returns confidence impact.
+    """
+    if hits is None:
+        hits = scan_text(text)
+    return _check_result(_rule_issues("date_accuracy", hits))
+
+
+def check_unverifiable_claims(text: str, hits: Dict[str, List] = None) -> Dict:
     """
     Detect unverifiable claims like GitHub repos, policy changes, etc.
     """
-    issues = []
-    
-    # Pattern: "GitHub - username/repo"
-    github_pattern = r"GitHub\s*-\s*[\w\-]+/[\w\-]+"
-    if re.search(github_pattern, text):
-        matches = re.findall(github_pattern, text)
-        for match in matches:
-            issues.append({
-                "type": "UNVERIFIABLE_GITHUB_REF",
-                "text": match,
-                "severity": "HIGH",
-                "message": f"GitHub reference '{match}' is unverifiable - should be verified or removed",
-                "confidence_penalty": 0.25
-            })
-    
-    # Pattern: policy changes without source
-    policy_patterns = [
-        r"(?:imposing|announcing|implementing)\s+(?:a|an)?\s*(?:\d+%\s*)?(?:tariff|tax|fee|penalty)",
-        r"(?:is\s+)?(?:imposing|raising|lowering)\s+(?:tariff|tax|fee)"
-    ]
-    
-    for pattern in policy_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            issues.append({
-                "type": "UNVERIFIABLE_POLICY_CLAIM",
-                "severity": "HIGH",
-                "message": "Policy/regulation claims require official source attribution",
-                "confidence_penalty": 0.3
-            })
-    
-    return {
-        "has_issues": len(issues) > 0,
-        "issues": issues,
-        "penalty": sum(i.get("confidence_penalty", 0) for i in issues)
-    }
+    if hits is None:
+        hits = scan_text(text)
+    return _check_result(_rule_issues("unverifiable_claims", hits))
 
 
-def check_generic_filler(text: str) -> Dict:
+def check_generic_filler(text: str, hits: Dict[str, List] = None) -> Dict:
     """
     Detect generic filler content and inflated claims.
     """
-    issues = []
-    
-    # Pattern: "X small examples" or "100 examples"
-    filler_patterns = [
-        r"(\d+)\s+(?:small|simple|basic|quick)\s+(?:examples|tutorials|guides|scripts)",
-        r"comprehensive\s+(?:list|collection)\s+of\s+(?:Python|code).*examples",
-        r"(?:here\s+)?(?:is|are)\s+(?:a|the)\s+(?:comprehensive|complete|full)\s+(?:list|guide|collection)"
-    ]
-    
-    for pattern in filler_patterns:
-        if re.search(pattern, text, re.IGNORECASE):
-            issues.append({
-                "type": "GENERIC_FILLER",
-                "severity": "MEDIUM",
-                "message": "Response contains generic filler claims without specific evidence",
-                "confidence_penalty": 0.15
-            })
-    
-    return {
-        "has_issues": len(issues) > 0,
-        "issues": issues,
-        "penalty": sum(i.get("confidence_penalty", 0) for i in issues)
-    }
+    if hits is None:
+        hits = scan_text(text)
+    return _check_result(_rule_issues("generic_filler", hits))
 
 
-def check_context_mismatch(text: str, query: str) -> Dict:
+def check_context_mismatch(text: str, query: str, hits: Dict[str, List] = None) -> Dict:
     """
     Check if response properly addresses the query context.
     E.g., describing PyTorch as having "Hello World" examples when it's an ML framework.
     """
     issues = []
-    
+
     # PyTorch context check
     if "pytorch" in query.lower():
-        if "hello world" in text.lower() or "general programming" in text.lower():
-            issues.append({
-                "type": "CONTEXT_MISMATCH",
-                "severity": "HIGH",
-                "message": "Response describes PyTorch incorrectly - it's a deep learning framework, not a general programming language",
-                "confidence_penalty": 0.35
-            })
-    
-    return {
-        "has_issues": len(issues) > 0,
-        "issues": issues,
-        "penalty": sum(i.get("confidence_penalty", 0) for i in issues)
-    }
+        if hits is None:
+            hits = scan_text(text)
+        if "hello_world" in hits or "general_programming" in hits:
+            issues.append(dict(CONTEXT_MISMATCH_ISSUE))
+
+    return _check_result(issues)
 
 
 def evaluate_source_credibility(source: str) -> float:
@@ -235,11 +404,17 @@ def calculate_confidence_level(base_score: float, penalties: float) -> str:
 # WEB VERIFICATION FUNCTIONS
 # =========================
 
-def verify_response_with_web_search(response_text: str, query: str = "") -> Dict:
+def verify_response_with_web_search(response_text: str, query: str = "", sources: Dict = None) -> Dict:
     """
     Verify response content against live web search results.
     Prevents hallucinations by comparing against real data.
     
+    Args:
+        response_text: The answer to verify
+        query: The original query
+        sources: Pre-collected {"results", "pages"} from WebVerifier; collected
+                 here (budgeted, cached, with a deadline) when omitted
+    
     Returns confidence adjustment based on verification success.
     """
     if not WEB_SEARCH_AVAILABLE or not query:
@@ -252,8 +427,23 @@ def verify_response_with_web_search(response_text: str, query: str = "") -> Dict
         }
     
     try:
-        # Search for relevant information
-        search_results = search_web(query, max_results=3)
+        if sources is None:
+            from web_verifier import web_verifier
+            sources = web_verifier.get_sources(query, max_results=3)
+        
+        if sources is None:
+            # Over budget or past the deadline - no verdict either way
+            return {
+                "verified": False,
+                "confidence_adjustment": 0.0,
+                "found_matches": [],
+                "sources_found": [],
+                "has_wikipedia_only": False,
+                "skipped": True
+            }
+        
+        search_results = sources.get("results", [])
+        pages = sources.get("pages", {})
         
         if not search_results:
             return {
@@ -264,14 +454,13 @@ def verify_response_with_web_search(response_text: str, query: str = "") -> Dict
                 "has_wikipedia_only": False
             }
         
-        found_matches = []
         sources_found = []
+        verification_pages = {}
         has_wikipedia_only = True
         
         # Check each search result
         for result in search_results:
             url = result.get("url", "").lower()
-            title = result.get("title", "").lower()
             
             # Skip Wikipedia results - deprioritize
             if "wikipedia" in url or "wiki" in url:
@@ -283,24 +472,20 @@ def verify_response_with_web_search(response_text: str, query: str = "") -> Dict
                 "title": result.get("title"),
                 "credibility": 0.75  # Default for verified web source
             })
-            
-            # Try to fetch and verify content
-            try:
-                page_content = fetch_page(result.get("url", ""))
-                if page_content:
-                    # Check if response content matches fetched page
-                    response_snippets = [s.strip() for s in response_text.split('.') if len(s.strip()) > 10]
-                    page_snippets = [s.strip() for s in page_content.split('.') if len(s.strip()) > 10]
-                    
-                    for snippet in response_snippets[:3]:  # Check first 3 sentences
-                        if any(keyword in page_content.lower() for keyword in snippet.lower().split()[:5]):
-                            found_matches.append({
-                                "snippet": snippet[:100],
-                                "source": result.get("url"),
-                                "match_confidence": 0.85
-                            })
-            except:
-                pass  # Silent fail on fetch, continue
+            if pages.get(result.get("url", "")):
+                verification_pages[result.get("url")] = pages[result.get("url")]
+        
+        # Match every claim in the answer against the fetched pages in one go
+        matched = match_claims(split_claims(response_text), build_page_index(verification_pages))
+        coverage = matched["coverage"]
+        found_matches = [
+            {
+                "snippet": claim["claim"][:100],
+                "source": claim["source"],
+                "match_confidence": claim["overlap"]
+            }
+            for claim in matched["claims"] if claim["supported"]
+        ]
         
         # If only Wikipedia results found, that's a red flag
         if has_wikipedia_only and search_results:
@@ -310,6 +495,7 @@ def verify_response_with_web_search(response_text: str, query: str = "") -> Dict
                 "found_matches": [],
                 "sources_found": sources_found,
                 "has_wikipedia_only": True,
+                "coverage": coverage,
                 "warning": "Information only found on Wikipedia - less reliable source"
             }
         
@@ -320,7 +506,8 @@ def verify_response_with_web_search(response_text: str, query: str = "") -> Dict
                 "confidence_adjustment": 0.15,  # Boost for verified sources
                 "found_matches": found_matches,
                 "sources_found": sources_found,
-                "has_wikipedia_only": False
+                "has_wikipedia_only": False,
+                "coverage": coverage
             }
         elif sources_found:
             return {
@@ -328,7 +515,8 @@ def verify_response_with_web_search(response_text: str, query: str = "") -> Dict
                 "confidence_adjustment": 0.10,  # Small boost for alternative sources found
                 "found_matches": [],
                 "sources_found": sources_found,
-                "has_wikipedia_only": False
+                "has_wikipedia_only": False,
+                "coverage": coverage
             }
         else:
             return {
@@ -336,7 +524,8 @@ def verify_response_with_web_search(response_text: str, query: str = "") -> Dict
                 "confidence_adjustment": -0.10,
                 "found_matches": [],
                 "sources_found": [],
-                "has_wikipedia_only": False
+                "has_wikipedia_only": False,
+                "coverage": coverage
             }
     
     except Exception as e:
@@ -351,35 +540,23 @@ def verify_response_with_web_search(response_text: str, query: str = "") -> Dict
         }
 
 
-def check_for_wikipedia_only(text: str) -> Dict:
+def check_for_wikipedia_only(text: str, hits: Dict[str, List] = None, length: Optional[int] = None) -> Dict:
     """
     Detect if response appears to only cite Wikipedia.
     Wikipedia can have errors - should have secondary sources.
     RETURNS BLOCKING FLAG if Wikipedia-only.
+    With precomputed `hits` and `length` (streaming), `text` is not read.
     """
     issues = []
-    text_lower = text.lower()
-    
-    # Strong Wikipedia indicators
-    wiki_indicators = [
-        'wikipedia', 'wiki article', 'from wikipedia',
-        'according to wikipedia', 'the wikipedia article',
-        'wiki.* says', 'wikipedia.org', 'Jump to content From Wikipedia'
-    ]
-    
-    # Strong official/non-wiki indicators
-    official_indicators = [
-        'official', 'documentation', 'github.com', 'official site',
-        'technical documentation', 'research', 'study', 'paper',
-        'source code', 'api', '.org', '.gov', 'repository'
-    ]
-    
-    # Count mentions
-    wiki_count = sum(1 for indicator in wiki_indicators if indicator in text_lower)
-    official_count = sum(1 for indicator in official_indicators if indicator in text_lower)
+    if hits is None:
+        hits = scan_text(text)
+
+    # Count mentions (each indicator counts once)
+    wiki_count = sum(1 for indicator in WIKI_INDICATORS if f"wiki:{indicator}" in hits)
+    official_count = sum(1 for indicator in OFFICIAL_INDICATORS if f"official:{indicator}" in hits)
     
     # If response is longer than 500 chars and mostly Wikipedia content
-    is_long_response = len(text) > 500
+    is_long_response = (len(text) if length is None else length) > 500
     
     # CRITICAL: Block if Wikipedia-only (no official sources)
     if wiki_count > 2 and official_count == 0:
@@ -399,7 +576,7 @@ def check_for_wikipedia_only(text: str) -> Dict:
             "confidence_penalty": 0.50,
             "should_block": True
         })
-    elif wiki_count > 0 and official_count == 0 and text.count("Wikipedia") > 0:
+    elif wiki_count > 0 and official_count == 0 and "wikipedia_mention" in hits:
         # Explicit Wikipedia mention without alternatives
         issues.append({
             "type": "WIKIPEDIA_ONLY",
@@ -465,17 +642,23 @@ def truncate_wikipedia_response(text: str, max_length: int = 300) -> str:
     return text
 
 
-def get_web_search_replacement(query: str) -> str:
+REPLACEMENT_MAX_RESULTS = 5
+
+
+def get_web_search_replacement(query: str, sources: Optional[Dict]) -> str:
     """
-    When Wikipedia-only would be returned, perform web search instead.
-    Returns verified information from official sources.
+    When Wikipedia-only would be returned, answer from web search instead.
+    Builds the text from already collected sources (web_verifier's
+    {"results", "pages"}); no network here.
     """
     if not WEB_SEARCH_AVAILABLE:
         return f"[Unable to perform web search - offline mode]\n\nFor query: {query}"
     
     try:
-        # Search for information
-        search_results = search_web(query, max_results=5)
+        if sources is None:
+            return f"[Web search unavailable right now for: {query}]\nTry again in a moment."
+        search_results = sources.get("results", [])
+        pages = sources.get("pages", {})
         
         if not search_results:
             return f"[No web search results found for: {query}]\nTry a more specific query."
@@ -497,9 +680,9 @@ def get_web_search_replacement(query: str) -> str:
                 "url": result.get("url", "")
             })
             
-            # Fetch page content
+            # Fetched page content
             try:
-                content = fetch_page(result.get("url", ""))
+                content = pages.get(result.get("url", ""), "")
                 if content and len(content) > 100:
                     # Use first 500 chars as answer
                     collected_info.append(content[:500])
@@ -527,11 +710,14 @@ def get_web_search_replacement(query: str) -> str:
 def replace_wikipedia_with_web_search(response_text: str, query: str) -> Dict:
     """
     Detect if response would be Wikipedia-only.
-    If so, perform web search and return verified results instead.
+    If so, return web search results instead - when they are already
+    cached. Otherwise the search is left to the background verification
+    stage (pending=True), which attaches the replacement to its result.
     
     Returns:
         Dict with:
         - replaced: bool (was replacement done?)
+        - pending: bool (replacement queued for the background stage?)
         - response: str (new response or original)
         - sources: list (verified sources used)
         - message: str (explanation)
@@ -558,8 +744,20 @@ def replace_wikipedia_with_web_search(response_text: str, query: str) -> Dict:
         }
     
     try:
-        # Get web search results
-        web_response = get_web_search_replacement(query)
+        # Cache only: the live search/fetch never runs on the request path
+        sources = None
+        if WEB_SEARCH_AVAILABLE:
+            from web_verifier import web_verifier
+            sources = web_verifier.cached_sources(query, max_results=REPLACEMENT_MAX_RESULTS)
+            if sources is None:
+                return {
+                    "replaced": False,
+                    "pending": True,
+                    "response": response_text,
+                    "sources": [],
+                    "message": "Wikipedia-only response - web search queued"
+                }
+        web_response = get_web_search_replacement(query, sources)
         
         return {
             "replaced": True,
@@ -591,7 +789,7 @@ def enforce_response_length_limit(text: str, max_length: int = 2000) -> str:
 # RESPONSE QUALITY CHECKER
 # =========================
 
-def check_response_quality(text: str, query: str = "", sources: List[str] = None) -> Dict:
+def check_response_quality(text: str, query: str = "", sources: List[str] = None, verify_web: bool = False) -> Dict:
     """
     Comprehensive quality check for a response.
     
@@ -599,6 +797,8 @@ def check_response_quality(text: str, query: str = "", sources: List[str] = None
         text: The response text to validate
         query: The original query (for context checking)
         sources: List of sources used in the response
+        verify_web: Run live web verification inline (off by default - use
+                    web_verifier.submit() to verify in the background instead)
     
     Returns:
         Dictionary with quality assessment and recommendations
@@ -615,38 +815,51 @@ def check_response_quality(text: str, query: str = "", sources: List[str] = None
         "recommendations": []
     }
     
+    # One pass over the text feeds checks 1-5
+    hits = scan_text(text)
+
     # Check 1: Date accuracy
-    date_check = check_date_accuracy(text)
+    date_check = check_date_accuracy(text, hits)
     quality_report["checks"]["date_accuracy"] = date_check
     quality_report["penalties"] += date_check.get("penalty", 0)
     quality_report["issues"].extend(date_check.get("issues", []))
     
     # Check 2: Unverifiable claims
-    verify_check = check_unverifiable_claims(text)
+    verify_check = check_unverifiable_claims(text, hits)
     quality_report["checks"]["unverifiable_claims"] = verify_check
     quality_report["penalties"] += verify_check.get("penalty", 0)
     quality_report["issues"].extend(verify_check.get("issues", []))
     
     # Check 3: Generic filler
-    filler_check = check_generic_filler(text)
+    filler_check = check_generic_filler(text, hits)
     quality_report["checks"]["generic_filler"] = filler_check
     quality_report["penalties"] += filler_check.get("penalty", 0)
     quality_report["issues"].extend(filler_check.get("issues", []))
     
     # Check 4: Context mismatch
-    context_check = check_context_mismatch(text, query)
+    context_check = check_context_mismatch(text, query, hits)
     quality_report["checks"]["context_mismatch"] = context_check
     quality_report["penalties"] += context_check.get("penalty", 0)
     quality_report["issues"].extend(context_check.get("issues", []))
     
     # Check 5: Wikipedia-only sources (NEW)
-    wiki_check = check_for_wikipedia_only(text)
+    wiki_check = check_for_wikipedia_only(text, hits)
     quality_report["checks"]["wikipedia_only"] = wiki_check
     quality_report["penalties"] += wiki_check.get("penalty", 0)
     quality_report["issues"].extend(wiki_check.get("issues", []))
     
-    # Check 6: Web verification (NEW) - Verify against real sources
-    web_verification = verify_response_with_web_search(text, query)
+    # Check 6: Web verification - only inline when explicitly requested
+    if verify_web:
+        web_verification = verify_response_with_web_search(text, query)
+    else:
+        web_verification = {
+            "verified": False,
+            "confidence_adjustment": 0.0,
+            "found_matches": [],
+            "sources_found": [],
+            "has_wikipedia_only": False,
+            "skipped": True
+        }
     quality_report["checks"]["web_verification"] = web_verification
     quality_report["penalties"] += max(0, web_verification.get("confidence_adjustment", 0) * -1)  # Convert adjustment to penalty if negative
     quality_report["verified_sources"] = web_verification.get("sources_found", [])
@@ -733,6 +946,190 @@ def format_quality_report(report: Dict) -> str:
     return "\n".join(output)
 
 
+# =========================
+# STREAMING QUALITY CHECKS
+# =========================
+
+STREAM_PENDING_CHARS = 512   # how far back an unconfirmed candidate may wait for more text
+_TRIGGER_SLACK = 64          # room for trigger_patterns with long whitespace runs
+
+
+def _lower_aligned(text: str) -> str:
+    """text.lower(), keeping one character per character"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+
+class StreamingQualityChecker:
+    """
+    Runs the quality rules over a streamed answer as chunks arrive.
+
+    Each feed() only searches the newly arrived text for triggers (holding
+    back a short tail in case a trigger is cut in half); candidates that
+    can't be confirmed yet wait for more text. feed() returns quality
+    events - new issues and confidence updates - and finish() settles the
+    remaining text and adds the Wikipedia-only check, which needs the whole
+    answer. Results match check_response_quality() except for the rare texts
+    scan_text() handles rule by rule.
+    """
+
+    def __init__(self, query: str = "", base_confidence: float = 0.75):
+        self.query = query
+        self.base_confidence = base_confidence
+        self.hits = {}
+        self.issues = []
+        self.penalties = 0.0
+        self._chars = 0            # answer length so far
+        self._last_end = {}
+        self._window = ""          # text from self._offset on
+        self._lowered = ""
+        self._offset = 0
+        self._scan_pos = 0         # where the next trigger search starts
+        self._pending = []         # (start, rule index) waiting for more text
+        self._holdback = _COMPILED_RULES["max_trigger_chars"] + _TRIGGER_SLACK
+        self._check_context = "pytorch" in (query or "").lower()
+        self._finished = False
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """Add a chunk of the answer; returns new quality events"""
+        if not chunk or self._finished:
+            return []
+        self._chars += len(chunk)
+        self._window += chunk
+        self._lowered += _lower_aligned(chunk)
+        return self._advance(final=False)
+
+    def finish(self) -> List[Dict]:
+        """Check the rest of the answer; returns the last events (always ending with a final confidence)"""
+        if self._finished:
+            return []
+        events = self._advance(final=True)
+        self._finished = True
+
+        wiki_check = check_for_wikipedia_only("", self.hits, length=self._chars)
+        new_issues = [("wikipedia_only", issue) for issue in wiki_check["issues"]]
+        events.extend(self._add_issues(new_issues))
+        events.append(self._confidence_event(final=True))
+        return events
+
+    @property
+    def confidence_level(self) -> str:
+        return calculate_confidence_level(self.base_confidence, self.penalties)
+
+    # -------------------------
+    # Matching
+    # -------------------------
+
+    def _advance(self, final: bool) -> List[Dict]:
+        new_issues = []
+        end = self._offset + len(self._window)
+        limit = end if final else end - self._holdback
+
+        pending, self._pending = self._pending, []
+        for start, index in pending:
+            self._try(start, index, final, new_issues)
+
+        search = _COMPILED_RULES["matcher"].search
+        by_first_char = _COMPILED_RULES["by_first_char"]
+        pattern_rules = _COMPILED_RULES["pattern_rules"]
+        lowered = self._lowered
+        pos = self._scan_pos
+
+        while pos < limit:
+            found = search(lowered, pos - self._offset)
+            if found is None or found.start() + self._offset >= limit:
+                pos = limit
+                break
+            local = found.start()
+            start = local + self._offset
+
+            for trigger, indexes in by_first_char.get(lowered[local], ()):
+                if lowered.startswith(trigger, local):
+                    for index in indexes:
+                        self._try(start, index, final, new_issues)
+            for index in pattern_rules:
+                self._try(start, index, final, new_issues)
+
+            pos = start + 1
+
+        self._scan_pos = max(self._scan_pos, pos)
+        self._trim()
+        return self._add_issues(new_issues)
+
+    def _try(self, start: int, index: int, final: bool, new_issues: List):
+        rule = QUALITY_RULES[index]
+        name = rule["name"]
+        each = rule["mode"] == "each"
+        if each:
+            if start < self._last_end.get(name, 0):
+                return
+            if not final and any(i == index for _, i in self._pending):
+                self._pending.append((start, index))  # keep "each" matches in order
+                return
+        elif name in self.hits:
+            return
+
+        subject = self._lowered if rule.get("lowered") else self._window
+        local = start - self._offset
+        match = rule["regex"].match(subject, local)
+
+        # No match yet, or a match that may still grow - wait for more text
+        if not final and (match is None or (each and match.end() == len(subject))):
+            if len(subject) - local < STREAM_PENDING_CHARS:
+                self._pending.append((start, index))
+                return
+        if match is None:
+            return
+
+        self.hits.setdefault(name, []).append(match)
+        self._last_end[name] = match.end() + self._offset
+
+        if each:
+            issue = rule["issue"](match)
+            if issue:
+                new_issues.append((rule["check"], issue))
+        elif rule["mode"] == "once":
+            new_issues.append((rule["check"], dict(rule["issue"])))
+        elif rule["check"] == "context_mismatch" and self._check_context:
+            self._check_context = False
+            new_issues.append((rule["check"], dict(CONTEXT_MISMATCH_ISSUE)))
+
+    def _trim(self):
+        """Drop text nothing can match against any more"""
+        keep_from = min([start for start, _ in self._pending] + [self._scan_pos])
+        cut = keep_from - self._offset
+        if cut > STREAM_PENDING_CHARS:
+            self._window = self._window[cut:]
+            self._lowered = self._lowered[cut:]
+            self._offset = keep_from
+
+    # -------------------------
+    # Events
+    # -------------------------
+
+    def _add_issues(self, new_issues: List) -> List[Dict]:
+        if not new_issues:
+            return []
+        events = []
+        for check, issue in new_issues:
+            self.issues.append(issue)
+            self.penalties += issue.get("confidence_penalty", 0)
+            events.append({"kind": "issue", "check": check, "issue": issue})
+        events.append(self._confidence_event())
+        return events
+
+    def _confidence_event(self, final: bool = False) -> Dict:
+        return {
+            "kind": "confidence",
+            "confidence_score": round(max(0.0, self.base_confidence - self.penalties), 3),
+            "confidence_level": self.confidence_level,
+            "penalties": round(self.penalties, 3),
+            "final": final,
+        }
+
+
 # =========================
 # RESPONSE WRAPPER
 # =========================
@@ -756,16 +1153,24 @@ def add_confidence_marker(text: str, confidence_level: str, sources: List[str] =
 # WRAPPER FUNCTION FOR INTEGRATION
 # =========================
 
-def check_response(response_text: str, sources: List[Dict] = None, response_type: str = "general", query: str = "") -> Dict:
+def check_response(
+    response_text: str,
+    sources: List[Dict] = None,
+    response_type: str = "general",
+    query: str = "",
+    verify_callback=None,
+) -> Dict:
     """
     Wrapper function that integrates quality checking into response pipeline.
     When Wikipedia-only detected, REPLACES with web search results.
+    Live web verification is queued in the background and never delays the answer.
     
     Args:
         response_text: The response to validate
         sources: List of source dictionaries with 'url', 'title', 'timestamp'
         response_type: Type of response ('web_search', 'groq', 'general')
         query: The original user query (for context checking)
+        verify_callback: Optional callable receiving the web verification result
     
     Returns:
         Dictionary with quality assessment and potentially replaced response
@@ -773,9 +1178,12 @@ def check_response(response_text: str, sources: List[Dict] = None, response_type
     # Extract source strings for quality check
     source_strings = []
     if sources:
-        source_strings = [s.get("url", "") or s.get("title", "") for s in sources if s]
+        source_strings = [
+            (s.get("url", "") or s.get("title", "")) if isinstance(s, dict) else str(s)
+            for s in sources if s
+        ]
     
-    # Run comprehensive quality check (includes web verification)
+    # Run the local quality checks (no network)
     quality_report = check_response_quality(response_text, query, source_strings)
     
     # Check if response is Wikipedia-only and replace if needed
@@ -800,6 +1208,17 @@ def check_response(response_text: str, sources: List[Dict] = None, response_type
     # Include verified sources from web search
     verified_sources = quality_report.get("verified_sources", [])
     
+    # Queue live verification (or the pending Wikipedia replacement) as a post-processing stage
+    verification_id = None
+    replacement_pending = replacement_result.get("pending", False)
+    if WEB_SEARCH_AVAILABLE and query and not is_replaced:
+        from web_verifier import web_verifier
+        verification_id = web_verifier.submit(
+            processed_response, query, callback=verify_callback, replace_wikipedia=replacement_pending
+        )
+        if replacement_pending and verification_id:
+            replacement_message = "Web search results will replace this response (see web_verification_id)"
+    
     # Simplify report for integration
     return {
         "is_valid": is_valid,
@@ -814,6 +1233,7 @@ def check_response(response_text: str, sources: List[Dict] = None, response_type
         "web_verified": True if is_replaced else quality_report.get("checks", {}).get("web_verification", {}).get("verified", False),
         "replaced": is_replaced,  # NEW: Flag if response was replaced with web search
         "replacement_message": replacement_message,
+        "web_verification_id": verification_id,  # poll web_verifier.result(id)
         "response_text": processed_response,  # The actual response to return
         "raw_report": quality_report
     }
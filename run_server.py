@@ -1,23 +1,103 @@
 #!/usr/bin/env python3
-import sys
+"""
+Production launcher for the ASGI app.
+
+Runs uvicorn workers under gunicorn when gunicorn is installed (it restarts
+crashed workers and recycles them gracefully), otherwise uvicorn's own
+multi-process mode. Worker count, keep-alive, backlog and timeouts come
+from Config; uvloop/httptools are used when installed.
+"""
+import importlib.util
 import os
-from app import app
+import sys
+
+from config import Config
+
+config = Config.validate()
+
+
+def _has(module):
+    return importlib.util.find_spec(module) is not None
+
+
+LOOP = "uvloop" if _has("uvloop") else "asyncio"
+HTTP = "httptools" if _has("httptools") else "h11"
+
+# After the graceful period a worker's lifespan shutdown still drains and saves
+# the streams left open (STREAM_DRAIN_TIMEOUT), then closes its clients
+SHUTDOWN_MARGIN = 5
+
+
+def worker_count():
+    """Configured workers, or one per CPU: each worker is an event loop, not a thread"""
+    return config['WEB_CONCURRENCY'] or os.cpu_count() or 1
+
+
+def run_gunicorn(host, port, workers):
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class TunedUvicornWorker(UvicornWorker):
+        # The worker stops waiting for open connections after WEB_GRACEFUL_TIMEOUT...
+        CONFIG_KWARGS = {"loop": LOOP, "http": HTTP, "timeout_graceful_shutdown": config['WEB_GRACEFUL_TIMEOUT']}
+
+    class Server(BaseApplication):
+        def load_config(self):
+            settings = {
+                "bind": f"{host}:{port}",
+                "workers": workers,
+                "worker_class": TunedUvicornWorker,
+                "keepalive": config['WEB_KEEPALIVE'],
+                "backlog": config['WEB_BACKLOG'],
+                # ...and the master only kills it once its lifespan shutdown had time to run
+                "graceful_timeout": config['WEB_GRACEFUL_TIMEOUT'] + config['STREAM_DRAIN_TIMEOUT'] + SHUTDOWN_MARGIN,
+                "timeout": config['WEB_TIMEOUT'],
+                "accesslog": "-" if config['DEBUG'] else None,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Called in each worker after the fork (no preload_app): the master never
+            # imports the app, so workers started by a HUP reload get the new code
+            from app import app
+            return app
+
+    Server().run()
+
+
+def run_uvicorn(host, port, workers):
+    import uvicorn
+
+    uvicorn.run(
+        "app:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop=LOOP,
+        http=HTTP,
+        backlog=config['WEB_BACKLOG'],
+        timeout_keep_alive=config['WEB_KEEPALIVE'],
+        timeout_graceful_shutdown=config['WEB_GRACEFUL_TIMEOUT'],
+        log_level=config['LOG_LEVEL'].lower(),
+    )
+
 
 if __name__ == '__main__':
-    # Force single-threaded to avoid threading issues
-    port = int(os.environ.get('PORT', 5000))
-    print(f"\n[INFO] Starting Flask on 127.0.0.1:{port}...", file=sys.stderr)
-    
+    host = config['HOST']
+    port = int(os.environ.get('PORT', 8080))
+    workers = worker_count()
+    server = "gunicorn" if _has("gunicorn") and sys.platform != "win32" else "uvicorn"
+    print(f"\n[INFO] Starting {server} on {host}:{port} with {workers} worker(s) (loop={LOOP}, http={HTTP})",
+          file=sys.stderr)
+
     try:
-        app.run(
-            host='127.0.0.1',
-            port=port,
-            debug=False,
-            use_reloader=False,
-            threaded=False
-        )
+        if server == "gunicorn":
+            run_gunicorn(host, port, workers)
+        else:
+            run_uvicorn(host, port, workers)
     except Exception as e:
-        print(f"[ERROR] Failed to start Flask: {e}", file=sys.stderr)
+        print(f"[ERROR] Failed to start server: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc()
         sys.exit(1)
@@ -0,0 +1,143 @@
+"""
+Incremental SSE decoder for Groq (OpenAI-compatible) chat completion streams.
+Works on raw bytes and pulls delta.content out of each event without a full
+JSON parse in the common case.
+"""
+
+import json
+import re
+import time
+from typing import Generator, Iterable, List
+
+# Fast JSON path (optional dependency)
+try:
+    import orjson
+    _loads = orjson.loads
+    ORJSON_AVAILABLE = True
+except ImportError:
+    _loads = json.loads
+    ORJSON_AVAILABLE = False
+
+DATA_PREFIX = b"data:"
+DONE_MARKER = b"[DONE]"
+
+# "content":"..." inside the delta object; handles escaped quotes
+_CONTENT_RE = re.compile(rb'"delta"\s*:\s*\{[^{}]*?"content"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def extract_content(payload: bytes):
+    """
+    Return delta.content from one event payload, or None.
+    Uses a regex slice for the common shape and falls back to a full parse.
+    """
+    match = _CONTENT_RE.search(payload)
+    if match:
+        raw = match.group(1)
+        if b"\\" in raw:
+            return _loads(b'"' + raw + b'"')
+        return raw.decode("utf-8")
+
+    if b'"content"' not in payload:
+        return None
+
+    # Unusual layout (nested objects before content, etc.) - parse it properly
+    try:
+        data = _loads(payload)
+        return data["choices"][0].get("delta", {}).get("content")
+    except Exception:
+        return None
+
+
+class GroqSSEDecoder:
+    """Feed raw response bytes in, get content tokens out"""
+
+    def __init__(self):
+        self._buffer = b""
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """
+        Consume a chunk of bytes and return any complete tokens.
+
+        Partial lines are kept until the rest of the line arrives.
+        """
+        if self.done or not chunk:
+            return []
+
+        data = self._buffer + chunk
+        last_newline = data.rfind(b"\n")
+        if last_newline == -1:
+            self._buffer = data
+            return []
+
+        self._buffer = data[last_newline + 1:]
+        tokens = []
+
+        for line in data[:last_newline].split(b"\n"):
+            if not line.startswith(DATA_PREFIX):
+                continue
+
+            payload = line[5:].strip()
+            if payload == DONE_MARKER:
+                self.done = True
+                break
+
+            token = extract_content(payload)
+            if token:
+                tokens.append(token)
+
+        return tokens
+
+    def decode(self, chunks: Iterable[bytes]) -> Generator[str, None, None]:
+        """Decode an iterable of byte chunks into a token generator"""
+        for chunk in chunks:
+            yield from self.feed(chunk)
+            if self.done:
+                return
+
+        # Stream ended without a trailing newline
+        if self._buffer and not self.done:
+            tail, self._buffer = self._buffer, b""
+            yield from self.feed(tail + b"\n")
+
+
+def coalesce_tokens(
+    tokens: Iterable[str],
+    max_chars: int = 32,
+    max_delay: float = 0.03,
+    flush_first: bool = True,
+) -> Generator[str, None, None]:
+    """
+    Batch small tokens into larger pieces.
+
+    A batch is yielded once it reaches max_chars or its oldest token has waited
+    max_delay seconds. The first token is yielded alone (flush_first) so
+    time-to-first-token is unaffected.
+
+    There is no timer: max_delay is only checked when the next token
+    arrives, so if the upstream pauses, the batch waits for the pause to end
+    (or for the stream to end). Only use this where that is acceptable.
+    """
+    batch = []
+    size = 0
+    started = 0.0
+    first = flush_first
+
+    for token in tokens:
+        if first:
+            first = False
+            yield token
+            continue
+
+        if not batch:
+            started = time.monotonic()
+        batch.append(token)
+        size += len(token)
+
+        if size >= max_chars or time.monotonic() - started >= max_delay:
+            yield "".join(batch)
+            batch = []
+            size = 0
+
+    if batch:
+        yield "".join(batch)
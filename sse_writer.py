@@ -0,0 +1,98 @@
+"""
+Coalescing SSE frame writer for streamed answers.
+Batches tokens into text frames flushed every N ms or M bytes and keeps the
+transcript in a list instead of growing a string per token.
+"""
+
+import json
+import time
+from json.encoder import encode_basestring_ascii
+from typing import Optional
+
+# Precomputed envelope - same bytes as json.dumps({'type': 'text', 'text': ...})
+_TEXT_PREFIX = 'data: {"type": "text", "text": '
+_FRAME_SUFFIX = '}\n\n'
+
+
+def _prefix(event_type: str) -> str:
+    return 'data: {"type": ' + encode_basestring_ascii(event_type) + ', "text": '
+
+
+def sse_event(event_type: str, **fields) -> str:
+    """Format a single (non-text) SSE event"""
+    return f"data: {json.dumps({'type': event_type, **fields})}\n\n"
+
+
+def text_frame(text: str) -> str:
+    """Format a text frame using the precomputed envelope"""
+    return _TEXT_PREFIX + encode_basestring_ascii(text) + _FRAME_SUFFIX
+
+
+class SSEWriter:
+    """
+    Accumulates streamed text and decides when to emit a frame.
+
+    The first chunk is always flushed immediately so time-to-first-token is
+    not affected; after that a frame goes out once flush_bytes of text are
+    pending, or - with flush_ms set - once a chunk arrives flush_ms or more
+    after the last frame. Pending text also goes out with the next event
+    and at the end of the stream.
+
+    The writer has no timer: it only runs when a chunk arrives, so flush_ms
+    bounds the delay between chunks, not across an upstream pause. It is
+    off (0) by default; flush_bytes=0 sends a frame per chunk.
+    """
+
+    def __init__(self, flush_ms: int = 0, flush_bytes: int = 256, event_type: str = "text"):
+        self.flush_interval = flush_ms / 1000.0
+        self.flush_bytes = flush_bytes
+        self._prefix = _TEXT_PREFIX if event_type == "text" else _prefix(event_type)
+        self.first_frame_at = None
+        self._pending = []
+        self._pending_size = 0
+        self._last_flush = 0.0
+        self._transcript = []
+        self.frames = 0
+        self.chunks = 0
+
+    def write(self, chunk: str) -> Optional[str]:
+        """Add a chunk; returns a frame when the flush policy says so"""
+        if not chunk:
+            return None
+
+        self.chunks += 1
+        self._transcript.append(chunk)
+        self._pending.append(chunk)
+        self._pending_size += len(chunk)
+
+        if (
+            self.frames == 0
+            or self._pending_size >= self.flush_bytes
+            or (self.flush_interval and time.monotonic() - self._last_flush >= self.flush_interval)
+        ):
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Emit whatever text is pending as one frame"""
+        if not self._pending:
+            return None
+
+        text = self._pending[0] if len(self._pending) == 1 else "".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        self._last_flush = time.monotonic()
+        if self.first_frame_at is None:
+            self.first_frame_at = self._last_flush
+        self.frames += 1
+        return self._prefix + encode_basestring_ascii(text) + _FRAME_SUFFIX
+
+    def event(self, event_type: str, **fields) -> str:
+        """Flush pending text, then append a non-text event"""
+        pending = self.flush() or ""
+        return pending + sse_event(event_type, **fields)
+
+    @property
+    def transcript(self) -> str:
+        """Everything written so far"""
+        return "".join(self._transcript)
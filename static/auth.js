@@ -245,7 +245,10 @@
 
   async function handleLogout() {
     try {
-      await fetch("/auth/logout", { method: "POST" });
+      await fetch("/auth/logout", {
+        method: "POST",
+        headers: currentToken ? { "Authorization": `Bearer ${currentToken}` } : {}
+      });
       localStorage.removeItem("auth_token");
       currentUser = null;
       currentToken = null;
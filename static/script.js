@@ -384,16 +384,19 @@
     }
   }
 
+  function applyConnectivity(data) {
+    detectiveStatus.online = data.online !== false;
+    if (autoModeEnabled) {
+      currentMode = detectiveStatus.online ? "online" : "offline";
+    }
+    updateModeButton();
+  }
+
   async function checkConnectivity() {
     try {
       const res = await fetch("/status/connectivity");
       if (!res.ok) throw new Error(`HTTP ${res.status}`);
-      const data = await res.json();
-      detectiveStatus.online = data.online || true;
-      if (autoModeEnabled) {
-        currentMode = detectiveStatus.online ? "online" : "offline";
-      }
-      updateModeButton();
+      applyConnectivity(await res.json());
     } catch (err) {
       console.error("Failed to check connectivity:", err);
       detectiveStatus.online = false; // Assume offline on error
@@ -457,10 +460,21 @@
     modeBtn.setAttribute("aria-pressed", displayClass === "offline" ? "true" : "false");
   }
 
-  // Start periodic connectivity checks (every 15 seconds)
+  // The server pushes connectivity changes; EventSource reconnects on its own
   function startConnectivityMonitoring() {
-    checkConnectivity(); // Initial check
-    setInterval(checkConnectivity, 15000); // Check every 15 seconds
+    if (!window.EventSource) {
+      checkConnectivity();
+      return;
+    }
+    const source = new EventSource("/status/connectivity/stream");
+    source.onmessage = (e) => {
+      try {
+        const data = JSON.parse(e.data);
+        if (data.type === "connectivity") applyConnectivity(data);
+      } catch (err) {
+        console.error("Bad connectivity event:", err);
+      }
+    };
   }
 
   /* =====================
@@ -556,54 +570,99 @@
       const token = window.__auth?.getCurrentToken?.();
       if (token) headers["Authorization"] = `Bearer ${token}`;
       
-      const response = await fetch("/ask", {
+      let fullText = "";
+      let draftText = "";
+      let lastEventId = null;
+      let finished = false;
+
+      const handleEvent = (event) => {
+        if (event.type === "draft") {
+          // Search-free draft, replaced as soon as the sourced answer starts
+          if (!fullText) {
+            draftText += event.text;
+            assistantBubble.innerHTML = markdownToHtml(draftText);
+            chatBox.scrollTop = chatBox.scrollHeight;
+          }
+        } else if (event.type === "text") {
+          fullText += event.text;
+          assistantBubble.innerHTML = markdownToHtml(fullText);
+          // syntax highlight if available
+          try {
+            if (window.hljs) {
+              assistantBubble.querySelectorAll("pre code").forEach(block => {
+                hljs.highlightElement(block);
+              });
+            }
+          } catch (_) {}
+          chatBox.scrollTop = chatBox.scrollHeight;
+        } else if (event.type === "quality") {
+          // Streaming quality checks: issues as they are found, then confidence updates
+          if (event.kind === "issue") {
+            console.warn("Quality:", event.issue.severity, event.issue.message);
+          } else if (event.kind === "confidence") {
+            assistantBubble.dataset.confidence = event.confidence_level;
+            assistantBubble.title = `Confidence: ${event.confidence_level} (${event.confidence_score})`;
+          }
+        } else if (event.type === "status") {
+          console.log("Status:", event.text);
+        } else if (event.type === "done" || event.type === "error") {
+          finished = true;
+        }
+      };
+
+      const readStream = async (response) => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split("\n");
+          for (let i = 0; i < lines.length - 1; i++) {
+            const line = lines[i].trim();
+            if (!line) continue;
+            if (line.startsWith("id: ")) {
+              // "<stream id>:<frame id>" - where to pick up if the connection drops
+              lastEventId = line.substring(4);
+            } else if (line.startsWith("data: ")) {
+              const data = line.substring(6);
+              try {
+                handleEvent(JSON.parse(data));
+              } catch (err) {
+                console.error("Stream parse error:", err);
+              }
+            }
+          }
+          buffer = lines[lines.length - 1];
+        }
+      };
+
+      let response = await fetch("/ask", {
         method: "POST",
         headers,
         body: JSON.stringify({ message: text, chat_id: currentChat })
       });
-
       if (!response.ok) throw new Error(`HTTP ${response.status}`);
 
-      const reader = response.body.getReader();
-      const decoder = new TextDecoder();
-      let fullText = "";
-      let buffer = "";
-
-      while (true) {
-        const { value, done } = await reader.read();
-        if (done) break;
-        buffer += decoder.decode(value, { stream: true });
-        const lines = buffer.split("\n");
-        for (let i = 0; i < lines.length - 1; i++) {
-          const line = lines[i].trim();
-          if (!line) continue;
-          if (line.startsWith("data: ")) {
-            const data = line.substring(6);
-            try {
-              const event = JSON.parse(data);
-              if (event.type === "text") {
-                fullText += event.text;
-                assistantBubble.innerHTML = markdownToHtml(fullText);
-                // syntax highlight if available
-                try {
-                  if (window.hljs) {
-                    assistantBubble.querySelectorAll("pre code").forEach(block => {
-                      hljs.highlightElement(block);
-                    });
-                  }
-                } catch (_) {}
-                chatBox.scrollTop = chatBox.scrollHeight;
-              } else if (event.type === "status") {
-                console.log("Status:", event.text);
-              } else if (event.type === "done") {
-                // optionally handle done
-              }
-            } catch (err) {
-              console.error("Stream parse error:", err);
-            }
-          }
+      // Dropped mid-answer (mobile network...): resume from the last frame
+      // instead of asking again - the server keeps the stream for a while
+      for (let attempt = 1; ; attempt++) {
+        try {
+          await readStream(response);
+        } catch (err) {
+          console.warn("Stream interrupted:", err);
+        }
+        if (finished) break;
+        if (!lastEventId || attempt > 3) throw new Error("Stream interrupted");
+        await new Promise(resolve => setTimeout(resolve, 500 * attempt));
+        try {
+          response = await fetch("/ask/resume", { headers: { ...headers, "Last-Event-ID": lastEventId } });
+        } catch (err) {
+          continue;  // still offline, try again
         }
-        buffer = lines[lines.length - 1];
+        if (!response.ok) throw new Error(`Resume failed: HTTP ${response.status}`);
       }
 
       if (thinkingIndicator) thinkingIndicator.classList.remove("show");
@@ -0,0 +1,269 @@
+"""
+Stream Pump
+Runs a blocking SSE frame generator on its own thread and hands frames to
+the async response through a bounded buffer. A slow client stalls the
+generator (and with it the upstream read) instead of queueing unbounded
+frames, and a client that goes away closes the generator, which cancels
+the upstream Groq/Ollama request.
+
+Resumable pumps (with a stream_id) number their frames ("id: <stream>:<n>")
+and keep them for replay: a client whose connection drops can reattach
+with its Last-Event-ID within the resume grace period and get the missed
+tail, then the rest of the live answer, without a new generation.
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import AsyncGenerator, Dict, Generator, Optional
+
+from sse_writer import sse_event
+
+STREAM_BUFFER_FRAMES = int(os.getenv("STREAM_BUFFER_FRAMES", "32"))       # frames produced but not yet sent
+DISCONNECT_POLL = float(os.getenv("STREAM_DISCONNECT_POLL_MS", "500")) / 1000
+RESUME_GRACE = float(os.getenv("STREAM_RESUME_GRACE", "0"))   # seconds a dropped resumable stream waits for its client
+REPLAY_MAX_STREAM_BYTES = int(os.getenv("REPLAY_MAX_STREAM_BYTES", str(256 * 1024)))   # replay kept per stream
+_SLOT_WAIT = 0.25   # how often a blocked producer re-checks for cancellation
+
+logger = logging.getLogger(__name__)
+
+
+class PumpStats:
+    """Disconnects, resumes, backpressure stalls and how long producers spent stalled"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            "streams": 0, "completed": 0, "disconnected": 0, "resumed": 0, "replayed_frames": 0,
+            "cancelled": 0, "backpressure_stalls": 0, "stalled_seconds": 0.0,
+        }
+
+    def add(self, key: str, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, stalled_seconds=round(self.stats["stalled_seconds"], 3))
+
+
+pump_stats = PumpStats()
+
+
+class StreamPump:
+    """
+    One generation: a producer thread iterating `frames` into a frame log,
+    and any number of async consumers (frames()) reading the log from a
+    position. The producer stays at most `max_buffered` frames ahead of
+    the furthest consumer; the log is trimmed to `max_bytes` only up to
+    the slowest one, so no attached consumer ever skips a frame.
+
+    When the last consumer goes away the generator is closed - at once, or
+    for a resumable pump after `grace` seconds without a new consumer.
+    """
+
+    def __init__(
+        self,
+        frames: Generator[str, None, None],
+        max_buffered: int = STREAM_BUFFER_FRAMES,
+        poll: float = DISCONNECT_POLL,
+        stream_id: Optional[str] = None,
+        grace: float = RESUME_GRACE,
+        max_bytes: int = REPLAY_MAX_STREAM_BYTES,
+    ):
+        self._frames = frames
+        self.max_buffered = max_buffered
+        self.poll = poll
+        self.stream_id = stream_id
+        self.grace = grace if stream_id else 0
+        self.max_bytes = max_bytes
+        self._cond = threading.Condition()
+        self._log = deque()   # (id, wire frame), oldest trimmed past max_bytes once every consumer has it
+        self._positions: Dict[asyncio.Event, int] = {}   # attached consumer's wake event -> last id it was sent
+        self._loop = None
+        self._started = False
+        self._cancelled = threading.Event()
+        self.produced = 0   # id of the last frame produced
+        self.sent = 0       # highest id handed to a client
+        self.bytes = 0
+        self.consumers = 0
+        self.done = False
+        self.last_active = time.monotonic()
+
+    # -------------------------
+    # Producer (own thread)
+    # -------------------------
+
+    def _wait_for_room(self) -> bool:
+        with self._cond:
+            if self.produced - self.sent < self.max_buffered:
+                return True
+            pump_stats.add("backpressure_stalls")
+            stalled = time.monotonic()
+            while self.produced - self.sent >= self.max_buffered and not self._cancelled.is_set():
+                self._cond.wait(_SLOT_WAIT)
+            pump_stats.add("stalled_seconds", time.monotonic() - stalled)
+            return not self._cancelled.is_set()
+
+    def _append(self, frame: str):
+        with self._cond:
+            frame_id = self.produced + 1
+            wire = f"id: {self.stream_id}:{frame_id}\n{frame}" if self.stream_id else frame
+            self._log.append((frame_id, wire))
+            self.bytes += len(wire)
+            self.produced = frame_id
+            self.last_active = time.monotonic()
+            self._trim()
+        self._wake()
+
+    def _trim(self):
+        # Under self._cond. Never drop what an attached client hasn't been sent yet
+        floor = min(self._positions.values(), default=self.sent)
+        while self.bytes > self.max_bytes and len(self._log) > 1 and self._log[0][0] <= floor:
+            self.bytes -= len(self._log.popleft()[1])
+
+    def _wake(self):
+        for event in list(self._positions):
+            try:
+                self._loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Event loop closed under us (shutdown): nobody is listening any more
+                self._cancelled.set()
+
+    def _produce(self):
+        try:
+            for frame in self._frames:
+                if self._cancelled.is_set() or not self._wait_for_room():
+                    break
+                self._append(frame)
+        except Exception as e:
+            logger.error(f"[STREAM] Producer failed: {e}", exc_info=True)
+        finally:
+            # On cancel this raises GeneratorExit at the generator's current
+            # yield, which unwinds into the upstream stream and closes it
+            self._frames.close()
+            with self._cond:
+                self.done = True
+                self.last_active = time.monotonic()
+            self._wake()
+
+    def cancel(self):
+        if not self._cancelled.is_set():
+            self._cancelled.set()
+            pump_stats.add("cancelled")
+        with self._cond:
+            self._cond.notify_all()
+
+    def _expire(self):
+        """Grace period over: nobody came back for the stream"""
+        if not self.consumers and not self.done:
+            logger.info(f"[STREAM] {self.stream_id} not resumed within {self.grace:.0f}s, cancelling upstream")
+            self.cancel()
+
+    # -------------------------
+    # Consumers (event loop)
+    # -------------------------
+
+    def can_resume(self, after: int) -> bool:
+        """Are all frames after `after` still here (or yet to come)?"""
+        with self._cond:
+            first = self._log[0][0] if self._log else self.produced + 1
+            return not self._cancelled.is_set() and first <= after + 1 <= self.produced + 1
+
+    def _read(self, position: int):
+        """Frames after `position`; None when some of them were already trimmed"""
+        with self._cond:
+            if not self._log or self._log[-1][0] <= position:
+                return []
+            if position + 1 < self._log[0][0]:
+                return None
+            return list(itertools.islice(self._log, position + 1 - self._log[0][0], None))
+
+    def _ack(self, wake: asyncio.Event, frame_id: int):
+        with self._cond:
+            self._positions[wake] = frame_id
+            if frame_id > self.sent:
+                self.sent = frame_id
+                self._cond.notify_all()
+
+    async def frames(self, request=None, after: int = 0, join: bool = False) -> AsyncGenerator[str, None]:
+        """
+        Async iterator of the frames after id `after` (0 = from the start).
+        With a `request`, the client is checked for a disconnect every
+        `poll` seconds, even while no frames are arriving. `join` marks a
+        coalesced request sharing the stream (not a resume of it).
+        """
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        with self._cond:
+            self.consumers += 1
+            self._positions[wake] = after
+            self.last_active = time.monotonic()
+        if not self._started:
+            self._started = True
+            pump_stats.add("streams")
+            threading.Thread(target=self._produce, name="stream-pump", daemon=True).start()
+        elif not join:
+            pump_stats.add("resumed")
+            pump_stats.add("replayed_frames", max(0, self.sent - after))
+
+        position = after
+        finished = False
+        last_check = time.monotonic()
+        try:
+            while True:
+                wake.clear()
+                done = self.done
+                batch = self._read(position)
+                if batch is None:
+                    # Attached after its frames were trimmed: skipping them would corrupt the answer
+                    logger.warning(f"[STREAM] {self.stream_id} frames after {position} already trimmed")
+                    yield sse_event('error', text='Stream expired, please ask again')
+                    return
+                for frame_id, wire in batch:
+                    yield wire
+                    position = frame_id
+                    self._ack(wake, frame_id)
+
+                if not batch:
+                    if done:
+                        finished = True
+                        return
+                    try:
+                        await asyncio.wait_for(wake.wait(), self.poll)
+                    except asyncio.TimeoutError:
+                        pass
+
+                if request is not None and time.monotonic() - last_check >= self.poll:
+                    last_check = time.monotonic()
+                    if await request.is_disconnected():
+                        return
+        finally:
+            with self._cond:
+                self.consumers -= 1
+                del self._positions[wake]
+                self._trim()   # a slow consumer may have been holding back the trim
+                self.last_active = time.monotonic()
+                last = self.consumers == 0
+            if finished:
+                pump_stats.add("completed")
+            else:
+                # Client gone (our check, or the server cancelling the response)
+                pump_stats.add("disconnected")
+                if last and not self.done:
+                    if self.grace:
+                        logger.info(f"[STREAM] {self.stream_id} dropped after frame {position}, "
+                                    f"holding {self.grace:.0f}s for a resume")
+                        self._loop.call_later(self.grace, self._expire)
+                    else:
+                        logger.info(f"[STREAM] Client disconnected after {position} frames, cancelling upstream")
+                        self.cancel()
+
+
+def get_pump_stats() -> Dict:
+    return pump_stats.get_stats()
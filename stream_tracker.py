@@ -0,0 +1,161 @@
+"""
+Stream Tracker
+Keeps track of in-flight /ask streams so a stopping worker can refuse new
+ones, give the active ones a deadline to finish, and save whatever answer
+text the stragglers had produced instead of losing it.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ActiveStream:
+    """One in-flight answer: where it is saved and the writer producing it"""
+
+    def __init__(self, tracker: "StreamTracker", chat_id: str, user_id, save: Callable):
+        self.tracker = tracker
+        self.chat_id = chat_id
+        self.user_id = user_id
+        self.writer = None   # SSEWriter of the answer being streamed, once there is one
+        self.started = time.monotonic()
+        self._save = save
+        self._lock = threading.Lock()
+        self._saved = False
+        self.abandoned = False
+
+    @property
+    def tokens(self) -> int:
+        """Answer chunks streamed so far (Groq/Ollama send about one token per chunk)"""
+        return self.writer.chunks if self.writer is not None else 0
+
+    def save(self, content: Optional[str] = None) -> bool:
+        """
+        Persist the answer exactly once - from the stream when it finishes,
+        or from the shutdown flush if it doesn't. Defaults to the writer's
+        transcript so far.
+        """
+        if content is None:
+            content = self.writer.transcript if self.writer is not None else ""
+        with self._lock:
+            if self._saved or not content:
+                return False
+            self._saved = True
+        self._save(self.chat_id, self.user_id, "assistant", content)
+        return True
+
+    def abandon(self):
+        """The client went away mid-answer and the upstream request was cancelled"""
+        self.abandoned = True
+        self.tracker._abandoned(self)
+
+    def close(self):
+        self.tracker._finish(self)
+
+
+class StreamTracker:
+    """Registry of active streams plus the draining switch"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = set()
+        self.accepting = True
+        self.stats = {
+            "started": 0, "completed": 0, "rejected_draining": 0, "flushed_on_shutdown": 0,
+            "abandoned": 0, "tokens_saved_estimate": 0,
+        }
+        # Length of answers that ran to the end, for the tokens-saved estimate
+        self._answer_tokens = 0
+        self._answers = 0
+
+    def admit(self) -> bool:
+        """May a new stream start? False while draining (answer 503 so the client retries elsewhere)"""
+        if self.accepting:
+            return True
+        with self._lock:
+            self.stats["rejected_draining"] += 1
+        return False
+
+    def open(self, chat_id: str, user_id, save: Callable) -> ActiveStream:
+        """
+        Register a stream. Call it from inside the response generator, so
+        close() in its finally is guaranteed to run once it has been opened.
+        """
+        with self._lock:
+            stream = ActiveStream(self, chat_id, user_id, save)
+            self._active.add(stream)
+            self.stats["started"] += 1
+            return stream
+
+    def _finish(self, stream: ActiveStream):
+        with self._lock:
+            if stream in self._active:
+                self._active.discard(stream)
+                self.stats["completed"] += 1
+                if not stream.abandoned and stream.tokens:
+                    self._answer_tokens += stream.tokens
+                    self._answers += 1
+
+    def _abandoned(self, stream: ActiveStream):
+        with self._lock:
+            self.stats["abandoned"] += 1
+            if self._answers:
+                # Tokens an average answer would still have generated
+                average = self._answer_tokens / self._answers
+                self.stats["tokens_saved_estimate"] += max(0, round(average) - stream.tokens)
+
+    @property
+    def active(self) -> int:
+        return len(self._active)
+
+    def stop_accepting(self):
+        self.accepting = False
+
+    async def drain(self, timeout: float, poll: float = 0.1) -> int:
+        """
+        Stop accepting new streams and wait up to `timeout` seconds for the
+        active ones to finish (they run in worker threads, so poll).
+
+        Returns:
+            number of streams still running at the deadline
+        """
+        self.stop_accepting()
+        deadline = time.monotonic() + timeout
+        if self.active:
+            logger.info(f"[SHUTDOWN] Draining {self.active} active stream(s), up to {timeout:.0f}s")
+        while self.active and time.monotonic() < deadline:
+            await asyncio.sleep(poll)
+        return self.active
+
+    def flush_pending(self) -> int:
+        """Save the partial answers of streams that are still running"""
+        with self._lock:
+            pending = list(self._active)
+        flushed = 0
+        for stream in pending:
+            try:
+                if stream.save():
+                    flushed += 1
+            except Exception as e:
+                logger.error(f"[SHUTDOWN] Could not save partial answer for chat {stream.chat_id}: {e}")
+        with self._lock:
+            self.stats["flushed_on_shutdown"] += flushed
+        return flushed
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            average = round(self._answer_tokens / self._answers) if self._answers else 0
+            return dict(self.stats, active=len(self._active), accepting=self.accepting, avg_answer_tokens=average)
+
+
+# Global instance
+stream_tracker = StreamTracker()
+
+
+def get_stream_tracker():
+    """Get the global stream tracker instance"""
+    return stream_tracker
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Test claim-to-source matching used by web verification"""
+
+import time
+
+from claim_matcher import build_page_index, match_claims, split_claims
+
+PAGE = (
+    "PyTorch is an open source machine learning framework developed by Meta AI. "
+    "It provides tensor computation with strong GPU acceleration and deep neural "
+    "networks built on a tape-based autograd system. PyTorch 2.0 introduced "
+    "torch.compile, which speeds up models by compiling them ahead of execution. "
+)
+OTHER_PAGE = "Bananas are rich in potassium and grow in tropical climates around the world. " * 3
+
+ANSWER = (
+    "PyTorch is an open source machine learning framework from Meta AI. "
+    "PyTorch 2.0 introduced torch.compile to speed up models. "
+    "It was first released on the Moon in 1850 by astronauts. "
+    "Sure!"
+)
+
+
+def test_claims_are_matched_to_the_right_source():
+    claims = split_claims(ANSWER)
+    assert len(claims) == 3  # "Sure!" is not a claim
+
+    matched = match_claims(claims, build_page_index({"https://pytorch.org": PAGE, "https://fruit.example": OTHER_PAGE}))
+    supported = [c for c in matched["claims"] if c["supported"]]
+
+    assert [c["source"] for c in supported] == ["https://pytorch.org"] * 2
+    assert not matched["claims"][2]["supported"]
+    assert matched["coverage"]["claims"] == 3
+    assert matched["coverage"]["supported"] == 2
+    assert matched["coverage"]["support_by_source"] == {"https://pytorch.org": 2, "https://fruit.example": 0}
+
+
+def test_no_pages_means_no_coverage():
+    matched = match_claims(split_claims(ANSWER), build_page_index({"https://empty.example": ""}))
+    assert matched["coverage"]["supported"] == 0
+    assert matched["coverage"]["coverage"] == 0.0
+
+
+def _legacy_matches(response_text, pages, sentences):
+    """The old per-keyword scan, which re-lowercases the page for every keyword"""
+    found = []
+    for url, page_content in pages.items():
+        response_snippets = [s.strip() for s in response_text.split('.') if len(s.strip()) > 10]
+        page_snippets = [s.strip() for s in page_content.split('.') if len(s.strip()) > 10]
+        for snippet in response_snippets[:sentences]:
+            if any(keyword in page_content.lower() for keyword in snippet.lower().split()[:5]):
+                found.append((snippet, url))
+    return found
+
+
+def test_claim_matching_performance():
+    print("=" * 70)
+    print("CLAIM MATCHING BENCHMARK")
+    print("=" * 70)
+
+    pages = {f"https://source{i}.example": (PAGE + OTHER_PAGE) * 25 for i in range(3)}
+    answer = ANSWER * 10
+    rounds = 50
+
+    timings = {}
+    for label, sentences in (("legacy, first 3 sentences", 3), ("legacy, every sentence", 1000)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            _legacy_matches(answer, pages, sentences)
+        timings[label] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        match_claims(split_claims(answer), build_page_index(pages))
+    timings["term sets, every claim"] = time.perf_counter() - start
+
+    print(f"Pages: {len(pages)} x {len(next(iter(pages.values())))} chars, answer: {len(answer)} chars")
+    for label, elapsed in timings.items():
+        print(f"{label:28s} {elapsed / rounds * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    test_claims_are_matched_to_the_right_source()
+    test_no_pages_means_no_coverage()
+    test_claim_matching_performance()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Test the async connectivity monitor and its cached status"""
+
+import asyncio
+import socket
+import time
+
+import connectivity
+from connectivity import ConnectivityChecker
+
+REAL_TARGETS = connectivity.PROBE_TARGETS
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_probe_uses_first_reachable_target():
+    async def run():
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        connectivity.PROBE_TARGETS = [("127.0.0.1", closed_port()), ("127.0.0.1", port)]
+        try:
+            return await ConnectivityChecker().probe()
+        finally:
+            server.close()
+
+    online, latency_ms = asyncio.run(run())
+    connectivity.PROBE_TARGETS = REAL_TARGETS
+    assert online and latency_ms is not None
+
+
+def test_monitor_publishes_changes_and_status_is_cached():
+    async def run():
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        connectivity.PROBE_TARGETS = [("127.0.0.1", port)]
+
+        checker = ConnectivityChecker(check_interval=0.05)
+        checker.start_monitoring()
+        changes = checker.changes(heartbeat=1)
+        seen = [await changes.__anext__()]          # current (not yet probed)
+        seen.append(await changes.__anext__())      # first probe: online
+
+        connectivity.PROBE_TARGETS = [("127.0.0.1", closed_port())]
+        seen.append(await changes.__anext__())      # went offline
+
+        start = time.perf_counter()
+        for _ in range(10_000):
+            checker.get_status()
+        per_read = (time.perf_counter() - start) / 10_000
+
+        await checker.stop_monitoring()
+        server.close()
+        return seen, per_read
+
+    seen, per_read = asyncio.run(run())
+    connectivity.PROBE_TARGETS = REAL_TARGETS
+    assert seen[0]["checked_at"] is None
+    assert seen[1]["online"] and seen[1]["latency_ms"] is not None
+    assert not seen[2]["online"] and seen[2]["status"] == "Offline"
+    print(f"Cached status read: {per_read * 1e6:.2f} µs")
+    assert per_read < 50e-6
+
+
+if __name__ == "__main__":
+    test_probe_uses_first_reachable_target()
+    test_monitor_publishes_changes_and_status_is_cached()
@@ -0,0 +1,62 @@
+"""
+Test relevance-ranked context packing for browsing prompts
+"""
+import sys
+sys.path.insert(0, '.')
+
+from context_budget import pack_context, split_passages, estimate_tokens
+
+BOILERPLATE = "Home About Contact Subscribe to our newsletter for the latest deals and offers. " * 12
+
+PAGES = [
+    {
+        "url": "https://example.com/news",
+        "title": "Site news",
+        "content": BOILERPLATE + (
+            "The James Webb Space Telescope launched on December 25, 2021 aboard an Ariane 5 rocket. "
+            "It observes primarily in the infrared and orbits the Sun near the second Lagrange point. "
+        ),
+    },
+    {
+        "url": "https://example.org/recipes",
+        "title": "Recipes",
+        "content": "Preheat the oven to 200 degrees and knead the dough for ten minutes until smooth. " * 10,
+    },
+]
+
+
+def test_relevant_passage_past_cutoff_is_kept():
+    """The answer sits after 800+ chars of boilerplate and must still be packed"""
+    assert PAGES[0]["content"].index("James Webb") > 800
+
+    packed = pack_context("When did the James Webb telescope launch?", PAGES, budget_tokens=150)
+    print(f"Packed context (~{packed['tokens']} tokens):\n{packed['context']}")
+
+    assert "December 25, 2021" in packed["context"]
+    assert "knead the dough" not in packed["context"]
+    assert packed["sources"] == ["https://example.com/news"]
+
+
+def test_budget_is_respected():
+    for budget in (50, 150, 400):
+        packed = pack_context("james webb launch", PAGES, budget_tokens=budget)
+        assert packed["tokens"] <= budget
+        print(f"Budget {budget}: used {packed['tokens']} tokens, {packed['passages_used']} passages")
+
+    truncated = "\n---\n".join(page["content"][:800] for page in PAGES)
+    packed = pack_context("james webb launch", PAGES, budget_tokens=150)
+    print(f"Blind truncation: ~{estimate_tokens(truncated)} tokens vs packed ~{packed['tokens']}")
+    assert packed["tokens"] < estimate_tokens(truncated)
+
+
+def test_split_passages_covers_text():
+    text = "First sentence here. " * 50 + "x" * 2000
+    passages = split_passages(text)
+    assert all(len(p) <= 800 for p in passages)
+    assert sum(len(p) for p in passages) >= len(text) * 0.95
+
+
+if __name__ == "__main__":
+    test_relevant_passage_past_cutoff_is_kept()
+    test_budget_is_respected()
+    test_split_passages_covers_text()
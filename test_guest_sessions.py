@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Test token-only guests, lazy row materialization and the guest reaper"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from database import Base, SessionLocal, save_message
+from models import Chat, Message, User
+from auth import create_guest_session, is_guest_id, materialize_guest, register_user, verify_token
+from guest_reaper import GuestReaper
+
+
+def use_fresh_database():
+    """Point the shared session factory at an in-memory database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+
+
+def count(model):
+    db = SessionLocal()
+    try:
+        return db.query(model).count()
+    finally:
+        db.close()
+
+
+def test_guest_session_writes_nothing():
+    use_fresh_database()
+    for _ in range(50):
+        session = create_guest_session()
+        assert is_guest_id(session["user_id"])
+        assert verify_token(session["token"]) == (session["user_id"], True)
+    assert count(User) == 0
+
+
+def test_row_is_created_once_on_first_saved_message():
+    use_fresh_database()
+    guest_id = create_guest_session()["user_id"]
+
+    # Read-only routes look the guest up without creating the row
+    assert materialize_guest(guest_id, create=False) is None
+    assert count(User) == 0
+
+    row_id = materialize_guest(guest_id)
+    assert materialize_guest(guest_id) == row_id
+    assert materialize_guest(guest_id, create=False) == row_id
+    assert save_message("chat-1", row_id, "user", "hello")
+    assert count(User) == 1
+    assert count(Message) == 1
+
+
+def test_reaper_deletes_inactive_guests_in_batches():
+    use_fresh_database()
+    old = datetime.utcnow() - timedelta(days=60)
+
+    db = SessionLocal()
+    for i in range(7):
+        db.add(User(username=f"guest_old{i}", email=f"guest_old{i}@guest.local", password_hash="", created_at=old))
+    db.add(User(username="guest_active", email="guest_active@guest.local", password_hash="", created_at=old))
+    db.add(User(username="alice", email="alice@example.com", password_hash="x", created_at=old))
+    db.commit()
+    ids = {u.username: u.id for u in db.query(User).all()}
+    db.close()
+
+    save_message("old-chat", ids["guest_old0"], "user", "stale")
+    save_message("live-chat", ids["guest_active"], "user", "still here")
+    db = SessionLocal()
+    db.query(Message).filter(Message.content == "stale").update({"created_at": old})
+    db.commit()
+    db.close()
+
+    reaper = GuestReaper(retention_days=30, batch_size=3)
+    assert reaper.reap_once() == 7
+
+    db = SessionLocal()
+    try:
+        assert sorted(u.username for u in db.query(User).all()) == ["alice", "guest_active"]
+        assert [c.title for c in db.query(Chat).all()] == ["live-chat"]
+        assert [m.content for m in db.query(Message).all()] == ["still here"]
+    finally:
+        db.close()
+
+
+def test_registered_users_are_never_reaped():
+    use_fresh_database()
+    old = datetime.utcnow() - timedelta(days=60)
+
+    payload, error = register_user("mallory", "Mallory@Guest.Local", "password123")
+    assert payload is None and error == "Email domain is reserved"
+    payload, error = register_user("Guest_0123456789abcdef", "mallory@example.com", "password123")
+    assert payload is None and error == "Username is reserved"
+
+    # Accounts that predate the check, or look like guests but have a password
+    db = SessionLocal()
+    db.add(User(username="bob", email="bob@guest.local", password_hash="hash", created_at=old))
+    db.add(User(username="guest_bob", email="guest_bob@guest.local", password_hash="hash", created_at=old))
+    db.add(User(username="carol", email="carol@guest.local", password_hash="", created_at=old))
+    db.add(User(username="guestXdave", email="dave@guest.local", password_hash="", created_at=old))  # "_" is no wildcard
+    db.add(User(username="guest_old", email="guest_old@guest.local", password_hash="", created_at=old))
+    db.commit()
+    db.close()
+
+    assert GuestReaper(retention_days=30).reap_once() == 1
+    db = SessionLocal()
+    try:
+        assert sorted(u.username for u in db.query(User).all()) == ["bob", "carol", "guestXdave", "guest_bob"]
+    finally:
+        db.close()
+
+
+def test_guest_never_resolves_to_a_registered_account():
+    use_fresh_database()
+    guest_id = create_guest_session()["user_id"]
+    # An account that took the guest's name before names were reserved
+    db = SessionLocal()
+    db.add(User(username=guest_id, email="squatter@example.com", password_hash="hash"))
+    db.commit()
+    squatter = db.query(User.id).filter(User.username == guest_id).scalar()
+    db.close()
+
+    assert materialize_guest(guest_id, create=False) is None
+    assert materialize_guest(guest_id) != squatter
+
+
+if __name__ == "__main__":
+    test_guest_session_writes_nothing()
+    test_row_is_created_once_on_first_saved_message()
+    test_reaper_deletes_inactive_guests_in_batches()
+    test_registered_users_are_never_reaped()
+    test_guest_never_resolves_to_a_registered_account()
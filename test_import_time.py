@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark: run `python -X importtime -c "import <module>"` for
+the entry modules, print the slowest imports, and check that the heavy
+optional libraries stay off the startup path.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Loaded on first use (or by the post-start warm-up), never at import
+HEAVY_MODULES = {"ddgs", "bs4", "sympy", "numpy", "PyPDF2", "docx", "flask"}
+
+ENTRY_MODULES = ["app", "main", "auth", "browse_pipeline", "response_quality", "knowledge_base", "response_formatter"]
+
+
+def import_profile(module):
+    """
+    Returns:
+        (list of (cumulative_us, self_us, name) or None if the module can't
+        be imported here, error text)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    return rows, None
+
+
+def report(module, rows, top=10):
+    total_ms = max(cumulative for cumulative, _, _ in rows) / 1000
+    print(f"\n{module}: {total_ms:.1f} ms, {len(rows)} modules")
+    for cumulative, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms cumulative  {self_us / 1000:7.1f} ms self  {name}")
+
+
+def missing_dependency(error):
+    """The third-party module named by a ModuleNotFoundError (None for any other failure)"""
+    match = re.match(r"ModuleNotFoundError: No module named '([\w.]+)'", error or "")
+    if not match:
+        return None
+    name = match.group(1).split(".")[0]
+    # One of our own modules missing is a broken import, not an absent dependency
+    local = os.path.exists(os.path.join(ROOT, f"{name}.py")) or os.path.isdir(os.path.join(ROOT, name))
+    return None if local else name
+
+
+def test_heavy_modules_stay_off_the_import_path():
+    checked = 0
+    missing = set()
+    for module in ENTRY_MODULES:
+        rows, error = import_profile(module)
+        if rows is None:
+            dependency = missing_dependency(error)
+            assert dependency, f"importing {module} fails: {error}"
+            print(f"\n{module}: skipped, {dependency} is not installed")
+            missing.add(dependency)
+            continue
+        report(module, rows)
+        top_level = {name.split(".")[0] for _, _, name in rows}
+        loaded = HEAVY_MODULES & top_level
+        assert not loaded, f"importing {module} pulls in {sorted(loaded)}"
+        checked += 1
+    if not checked:
+        pytest.skip(f"no entry module can be imported without {', '.join(sorted(missing))}")
+
+
+if __name__ == "__main__":
+    test_heavy_modules_stay_off_the_import_path()
@@ -0,0 +1,118 @@
+"""
+Test dynamic model routing by request class, prompt length and headroom
+"""
+import sys
+sys.path.insert(0, '.')
+
+import groq_client
+from model_router import (
+    ModelRouter,
+    FAST_MODEL,
+    STRONG_MODEL,
+    BALANCED_MODEL,
+    LOCAL_MODEL,
+    STEP_DOWN_ORDER,
+)
+from upstream_registry import upstreams, OPEN, CLOSED
+
+# Routing policy is tested without a real key; only a missing key reroutes to Ollama
+groq_client.GROQ_API_KEY = groq_client.GROQ_API_KEY or "test-key"
+
+
+def test_model_routing():
+    """Test category and prompt-length routing with full headroom"""
+    router = ModelRouter()
+    groq_client._request_times.clear()
+    groq_client._upstream_limits.clear()
+
+    test_cases = [
+        ("hello", None, FAST_MODEL),
+        ("what is the capital of France?", None, FAST_MODEL),
+        ("create a python function that calculates fibonacci", "code", STRONG_MODEL),
+        ("compare pros and cons of remote work", "analysis", STRONG_MODEL),
+        ("x" * 500, "general", BALANCED_MODEL),
+        ("x" * 5000, "general", STRONG_MODEL),
+    ]
+
+    print("=" * 60)
+    print("TESTING MODEL ROUTING")
+    print("=" * 60)
+
+    for prompt, category, expected in test_cases:
+        decision = router.route(prompt, category)
+        status = "✓ PASS" if decision["model"] == expected else "✗ FAIL"
+        print(f"\n{status}")
+        print(f"  Prompt: {prompt[:50]}")
+        print(f"  Expected: {expected}")
+        print(f"  Routed: {decision['model']} ({decision['reason']})")
+        assert decision["model"] == expected
+
+
+def test_step_down_on_low_headroom():
+    """Routes step down to cheaper models as the rate-limit budget runs out"""
+    router = ModelRouter()
+    groq_client._request_times.clear()
+    groq_client._upstream_limits.clear()
+
+    # 20% of upstream requests left -> one tier down
+    groq_client._upstream_limits.update({"limit-requests": 100.0, "remaining-requests": 20.0})
+    decision = router.route("debug this python code", "code")
+    print(f"\nLow headroom: {decision['model']} ({decision['reason']})")
+    assert decision["model"] == STEP_DOWN_ORDER[1] != STRONG_MODEL
+    assert decision["reason"].endswith("+low_headroom")
+
+    # Already on the cheapest tier: nothing to step down to, and no reason claims otherwise
+    decision = router.route("hello", None)
+    assert decision["model"] == FAST_MODEL
+    assert "headroom" not in decision["reason"]
+
+    # 5% left -> cheapest model
+    groq_client._upstream_limits.update({"remaining-requests": 5.0})
+    decision = router.route("debug this python code", "code")
+    print(f"Critical headroom: {decision['model']} ({decision['reason']})")
+    assert decision["model"] == FAST_MODEL
+
+    groq_client._upstream_limits.clear()
+
+
+def test_step_down_order_has_no_repeats():
+    assert len(STEP_DOWN_ORDER) == len(set(STEP_DOWN_ORDER))
+    assert STEP_DOWN_ORDER[0] == STRONG_MODEL and STEP_DOWN_ORDER[-1] == FAST_MODEL
+
+
+def test_route_stats():
+    """Latency and token cost are recorded per route"""
+    router = ModelRouter()
+    decision = router.route("hello", "greeting")
+    router.record(decision, latency=0.4, first_token_latency=0.1, completion_tokens=20)
+    router.record(decision, latency=0.6, first_token_latency=0.3, completion_tokens=0)
+
+    stats = router.get_stats()[f"greeting->{FAST_MODEL}"]
+    print(f"\nRoute stats: {stats}")
+    assert stats["calls"] == 2
+    assert stats["errors"] == 1
+    assert stats["avg_latency"] == 0.5
+    assert stats["cost_usd"] > 0
+
+
+def test_reroute_to_ollama_while_groq_circuit_is_open():
+    """An open Groq circuit sends requests to local Ollama instead of failing"""
+    router = ModelRouter()
+    upstreams.get("groq").force(OPEN)
+    try:
+        decision = router.route("explain recursion", "general")
+        print(f"\nGroq circuit open: {decision['model']} ({decision['reason']})")
+        assert decision["model"] == LOCAL_MODEL
+        assert decision["reason"] == "groq_circuit_open"
+    finally:
+        upstreams.get("groq").force(CLOSED)
+
+    assert router.route("explain recursion", "general")["model"] != LOCAL_MODEL
+
+
+if __name__ == "__main__":
+    test_model_routing()
+    test_step_down_on_low_headroom()
+    test_step_down_order_has_no_repeats()
+    test_route_stats()
+    test_reroute_to_ollama_while_groq_circuit_is_open()
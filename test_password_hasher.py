@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test the bounded password hashing pool"""
+
+import asyncio
+import threading
+import time
+
+from password_hasher import HasherBusy, PasswordHasher
+
+FAST_METHOD = "pbkdf2:sha256:1000"
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(method=FAST_METHOD)
+    pw_hash = hasher.hash("correct horse")
+
+    assert pw_hash.startswith(FAST_METHOD + "$")
+    assert hasher.verify(pw_hash, "correct horse")
+    assert not hasher.verify(pw_hash, "wrong")
+    assert not hasher.verify("", "anything")  # guests have no password
+
+
+def test_needs_rehash_when_work_factor_changes():
+    old = PasswordHasher(method="pbkdf2:sha256:1000")
+    new = PasswordHasher(method="pbkdf2:sha256:2000")
+    pw_hash = old.hash("secret")
+
+    assert not old.needs_rehash(pw_hash)
+    assert new.needs_rehash(pw_hash)
+    assert new.verify(pw_hash, "secret")  # old hashes still verify until upgraded
+    assert not new.needs_rehash(new.hash("secret"))
+
+
+def test_default_method_keeps_existing_hashes():
+    # Accounts were hashed with werkzeug's default; they must not be rehashed on login
+    from werkzeug.security import generate_password_hash
+    assert not PasswordHasher().needs_rehash(generate_password_hash("secret"))
+
+
+def test_burst_beyond_limit_is_rejected():
+    hasher = PasswordHasher(method=FAST_METHOD, workers=1, max_pending=2)
+    release = threading.Event()
+    blockers = [hasher._submit(release.wait) for _ in range(2)]
+
+    try:
+        hasher.hash("one too many")
+        assert False, "expected HasherBusy"
+    except HasherBusy:
+        pass
+
+    release.set()
+    for future in blockers:
+        future.result()
+    assert hasher.verify(hasher.hash("ok"), "ok")  # slots are released again
+    assert hasher.get_stats()["rejected_busy"] == 1
+
+
+def test_event_loop_stays_responsive_during_hashing():
+    hasher = PasswordHasher(method="pbkdf2:sha256:600000", workers=2)
+
+    async def run():
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        beat = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        await asyncio.gather(*(hasher.hash_async("pw") for _ in range(4)))
+        elapsed = time.perf_counter() - start
+        beat.cancel()
+        return ticks, elapsed
+
+    ticks, elapsed = asyncio.run(run())
+    print(f"4 hashes in {elapsed * 1e3:.0f} ms, event loop ticked {ticks} times")
+    # A blocked loop would tick ~0 times while hashing
+    assert ticks >= elapsed / 0.005 * 0.5
+
+
+if __name__ == "__main__":
+    test_hash_and_verify()
+    test_needs_rehash_when_work_factor_changes()
+    test_default_method_keeps_existing_hashes()
+    test_burst_beyond_limit_is_rejected()
+    test_event_loop_stays_responsive_during_hashing()
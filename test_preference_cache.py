@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Test the per-user preference cache in front of the database"""
+
+import time
+
+from preference_cache import PreferenceCache
+
+PREFS = {"response_format": "formatted", "use_emojis": True, "specializations": {"Python": "expert"}}
+
+
+class CountingLoader:
+    """Stands in for the database read, counting round-trips"""
+
+    def __init__(self, prefs=PREFS):
+        self.prefs = prefs
+        self.calls = 0
+
+    def __call__(self, user_id):
+        self.calls += 1
+        return dict(self.prefs)
+
+
+def test_reads_hit_the_database_once_per_ttl():
+    cache = PreferenceCache(ttl=60)
+    loader = CountingLoader()
+
+    for _ in range(100):
+        assert cache.get_or_load(1, loader)["use_emojis"] is True
+    assert loader.calls == 1
+    assert cache.get_stats()["hits"] == 99
+
+
+def test_entries_expire():
+    cache = PreferenceCache(ttl=0.01)
+    loader = CountingLoader()
+
+    cache.get_or_load(1, loader)
+    time.sleep(0.02)
+    cache.get_or_load(1, loader)
+    assert loader.calls == 2
+
+
+def test_invalidate_drops_entry_and_notifies_listeners():
+    cache = PreferenceCache(ttl=60)
+    loader = CountingLoader()
+    published = []
+    cache.add_invalidation_listener(published.append)
+
+    cache.get_or_load(7, loader)
+    cache.invalidate(7)
+    cache.get_or_load(7, loader)
+    assert loader.calls == 2
+    assert published == [7]
+
+    # Invalidations received from another worker are not re-published
+    cache.invalidate(7, propagate=False)
+    assert published == [7]
+
+
+def test_load_racing_an_update_is_not_cached():
+    cache = PreferenceCache(ttl=60)
+
+    def stale_loader(user_id):
+        cache.invalidate(user_id)  # update lands while the old row is being read
+        return {"use_emojis": True}
+
+    assert cache.get_or_load(3, stale_loader) == {"use_emojis": True}
+    assert cache.get(3) is None
+
+
+def test_invalidations_leave_no_state_behind():
+    cache = PreferenceCache(ttl=60)
+    for user_id in range(1000):
+        cache.invalidate(user_id)
+        cache.get_or_load(user_id, CountingLoader())
+    assert cache._versions == {} and cache._loading == {}
+
+
+def test_callers_cannot_modify_cached_preferences():
+    cache = PreferenceCache(ttl=60)
+    prefs = cache.get_or_load(1, CountingLoader())
+    prefs["use_emojis"] = False
+    prefs["specializations"]["Rust"] = "beginner"
+
+    assert cache.get(1) == PREFS
+
+
+def test_size_is_bounded():
+    cache = PreferenceCache(ttl=60, max_entries=10)
+    loader = CountingLoader()
+    for user_id in range(25):
+        cache.get_or_load(user_id, loader)
+    assert cache.get_stats()["entries"] == 10
+    assert cache.get(24) is not None and cache.get(0) is None
+
+
+def test_cached_read_cost():
+    cache = PreferenceCache(ttl=60)
+    cache.get_or_load(1, CountingLoader())
+
+    rounds = 100_000
+    start = time.perf_counter()
+    for _ in range(rounds):
+        cache.get_or_load(1, None)
+    per_read = (time.perf_counter() - start) / rounds
+
+    print(f"Cached preference read: {per_read * 1e6:.2f} µs")
+    assert per_read < 50e-6
+
+
+if __name__ == "__main__":
+    test_reads_hit_the_database_once_per_ttl()
+    test_entries_expire()
+    test_invalidate_drops_entry_and_notifies_listeners()
+    test_load_racing_an_update_is_not_cached()
+    test_invalidations_leave_no_state_behind()
+    test_callers_cannot_modify_cached_preferences()
+    test_size_is_bounded()
+    test_cached_read_cost()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Test provider failover between Groq and local Ollama, and its latency"""
+
+import sys
+sys.path.insert(0, '.')
+
+import time
+
+from providers import FailoverStream, Provider, failover_stats
+
+
+class FakeProvider(Provider):
+    def __init__(self, name, tokens=(), down=None, delay=0.0):
+        self.name = name
+        self.tokens = list(tokens)
+        self.down = down
+        self.delay = delay
+        self.calls = 0
+
+    def unavailable_reason(self):
+        return self.down
+
+    def stream(self, prompt, system_prompt=None, model=None):
+        self.calls += 1
+        time.sleep(self.delay)  # e.g. a connect timeout before giving up
+        yield from self.tokens
+
+    def complete(self, prompt, system_prompt=None, model=None):
+        return "".join(self.stream(prompt)) or None
+
+
+def test_incomplete_provider_fails_when_created():
+    class StreamOnly(Provider):
+        def unavailable_reason(self):
+            return None
+
+        def stream(self, prompt, system_prompt=None, model=None):
+            yield "token"
+
+    try:
+        StreamOnly()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("a provider without complete() was instantiated")
+
+
+def test_primary_answers_without_failover():
+    groq, ollama = FakeProvider("groq", ["Hi", "!"]), FakeProvider("ollama", ["local"])
+    stream = FailoverStream("hello", chain=[groq, ollama])
+
+    assert "".join(stream) == "Hi!"
+    assert stream.provider is groq and not stream.failed_over
+    assert ollama.calls == 0
+
+
+def test_unavailable_primary_is_skipped_without_a_call():
+    groq = FakeProvider("groq", ["never"], down="circuit_open")
+    ollama = FakeProvider("ollama", ["local ", "answer"])
+    stream = FailoverStream("hello", chain=[groq, ollama])
+
+    assert "".join(stream) == "local answer"
+    assert groq.calls == 0
+    assert stream.failed_over and stream.skipped == ["groq:circuit_open"]
+    print(f"Failover latency (circuit open): {stream.failover_latency * 1000:.2f} ms")
+    assert stream.failover_latency < 0.01
+
+
+def test_silent_primary_fails_over_after_its_attempt():
+    before = failover_stats.get_stats()["failovers"]
+    groq = FakeProvider("groq", [], delay=0.05)
+    ollama = FakeProvider("ollama", ["local"])
+    stream = FailoverStream("hello", chain=[groq, ollama])
+
+    assert list(stream) == ["local"]
+    assert stream.skipped == ["groq:no_output"]
+    print(f"Failover latency (failed attempt): {stream.failover_latency * 1000:.2f} ms")
+    assert 0.05 <= stream.failover_latency < 0.1
+
+    stats = failover_stats.get_stats()
+    assert stats["failovers"] == before + 1
+    assert stats["paths"]["groq->ollama"] >= 1
+
+
+def test_everything_down_yields_nothing():
+    stream = FailoverStream("hello", chain=[FakeProvider("groq", down="offline"), FakeProvider("ollama", down="disabled")])
+    assert list(stream) == []
+    assert stream.provider is None and not stream.failed_over
+
+
+if __name__ == "__main__":
+    test_incomplete_provider_fails_when_created()
+    test_primary_answers_without_failover()
+    test_unavailable_primary_is_skipped_without_a_call()
+    test_silent_primary_fails_over_after_its_attempt()
+    test_everything_down_yields_nothing()
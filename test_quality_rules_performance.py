@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Test the compiled quality rule engine against the legacy per-check regex loops"""
+
+import re
+import time
+
+from response_quality import (
+    CURRENT_YEAR,
+    check_context_mismatch,
+    check_date_accuracy,
+    check_for_wikipedia_only,
+    check_generic_filler,
+    check_unverifiable_claims,
+    scan_text,
+)
+
+# =========================
+# LEGACY IMPLEMENTATION (before the rule engine)
+# =========================
+
+def legacy_date_accuracy(text):
+    issues = []
+    for match in re.finditer(r"As of\s+(\w+\s+\d+,?\s*\d{4})", text):
+        date_str = match.group(1)
+        if "2027" in date_str or "2028" in date_str or "2030" in date_str:
+            issues.append({"type": "FUTURE_DATE", "text": date_str, "severity": "CRITICAL",
+                           "message": f"Date '{date_str}' is in the future - appears to be hallucinated",
+                           "confidence_penalty": 0.3})
+        elif "2025" in date_str and CURRENT_YEAR >= 2026:
+            issues.append({"type": "OUTDATED_DATE", "text": date_str, "severity": "MEDIUM",
+                           "message": f"Date '{date_str}' may be outdated", "confidence_penalty": 0.2})
+    return issues
+
+
+def legacy_unverifiable_claims(text):
+    issues = []
+    github_pattern = r"GitHub\s*-\s*[\w\-]+/[\w\-]+"
+    if re.search(github_pattern, text):
+        for match in re.findall(github_pattern, text):
+            issues.append({"type": "UNVERIFIABLE_GITHUB_REF", "text": match, "severity": "HIGH",
+                           "message": f"GitHub reference '{match}' is unverifiable - should be verified or removed",
+                           "confidence_penalty": 0.25})
+    policy_patterns = [
+        r"(?:imposing|announcing|implementing)\s+(?:a|an)?\s*(?:\d+%\s*)?(?:tariff|tax|fee|penalty)",
+        r"(?:is\s+)?(?:imposing|raising|lowering)\s+(?:tariff|tax|fee)"
+    ]
+    for pattern in policy_patterns:
+        if re.search(pattern, text, re.IGNORECASE):
+            issues.append({"type": "UNVERIFIABLE_POLICY_CLAIM", "severity": "HIGH",
+                           "message": "Policy/regulation claims require official source attribution",
+                           "confidence_penalty": 0.3})
+    return issues
+
+
+def legacy_generic_filler(text):
+    issues = []
+    filler_patterns = [
+        r"(\d+)\s+(?:small|simple|basic|quick)\s+(?:examples|tutorials|guides|scripts)",
+        r"comprehensive\s+(?:list|collection)\s+of\s+(?:Python|code).*examples",
+        r"(?:here\s+)?(?:is|are)\s+(?:a|the)\s+(?:comprehensive|complete|full)\s+(?:list|guide|collection)"
+    ]
+    for pattern in filler_patterns:
+        if re.search(pattern, text, re.IGNORECASE):
+            issues.append({"type": "GENERIC_FILLER", "severity": "MEDIUM",
+                           "message": "Response contains generic filler claims without specific evidence",
+                           "confidence_penalty": 0.15})
+    return issues
+
+
+def legacy_context_mismatch(text, query):
+    if "pytorch" in query.lower():
+        if "hello world" in text.lower() or "general programming" in text.lower():
+            return [{"type": "CONTEXT_MISMATCH"}]
+    return []
+
+
+def legacy_wikipedia_counts(text):
+    text_lower = text.lower()
+    wiki_indicators = [
+        'wikipedia', 'wiki article', 'from wikipedia',
+        'according to wikipedia', 'the wikipedia article',
+        'wiki.* says', 'wikipedia.org', 'Jump to content From Wikipedia'
+    ]
+    official_indicators = [
+        'official', 'documentation', 'github.com', 'official site',
+        'technical documentation', 'research', 'study', 'paper',
+        'source code', 'api', '.org', '.gov', 'repository'
+    ]
+    wiki_count = sum(1 for indicator in wiki_indicators if indicator in text_lower)
+    official_count = sum(1 for indicator in official_indicators if indicator in text_lower)
+    return wiki_count, official_count, text.count("Wikipedia") > 0
+
+
+def legacy_all(text, query):
+    return (
+        legacy_date_accuracy(text),
+        legacy_unverifiable_claims(text),
+        legacy_generic_filler(text),
+        legacy_context_mismatch(text, query),
+        legacy_wikipedia_counts(text),
+    )
+
+
+# =========================
+# FIXTURES
+# =========================
+
+SAMPLES = [
+    "",
+    "As of March 5, 2027 the library was rewritten. As of January 1 2025 it was stable.",
+    "See GitHub - someone/repo and GitHub-other/thing-2 for details.",
+    "The government is imposing tariff rules and announcing a 25% tax on imports.",
+    "Here is a comprehensive list of Python scripts and examples. 10 simple examples follow.",
+    "PyTorch has a Hello World program for general programming tasks.",
+    "According to Wikipedia, the wiki article says this. From Wikipedia, wikipedia.org lists it.",
+    "The official site has technical documentation, research papers and the API repository on github.com.",
+    "Jump to content From Wikipedia, the free encyclopedia",
+    "wiki.* says something literal",
+    "Rapid capital growth (see the study at example.gov).",
+    "Café — naïve résumé: here are the full guides. 3 quick scripts ✨",
+    "İstanbul research: ٣ simple examples, the ſtudy of Kelvin (K) APIs",
+    "this\tis the\ncomplete   list; They ARE A Complete Collection",
+]
+
+FILLER = (
+    "PyTorch is a deep learning framework built around tensors and automatic "
+    "differentiation. Models are composed from modules and trained with optimizers. "
+)
+
+
+def _long_response(chars=12_000):
+    body = FILLER * (chars // len(FILLER) + 1)
+    # a few hits spread through the text
+    return (
+        body[: chars // 3] + " As of June 1, 2025 the API changed. "
+        + body[chars // 3: 2 * chars // 3] + " Here is the complete guide from Wikipedia. "
+        + body[2 * chars // 3: chars]
+    )
+
+
+# =========================
+# TESTS
+# =========================
+
+def _new_all(text, query):
+    hits = scan_text(text)
+    wiki = check_for_wikipedia_only(text, hits)
+    return (
+        check_date_accuracy(text, hits)["issues"],
+        check_unverifiable_claims(text, hits)["issues"],
+        check_generic_filler(text, hits)["issues"],
+        [{"type": i["type"]} for i in check_context_mismatch(text, query, hits)["issues"]],
+        (wiki["wiki_indicators"], wiki["official_indicators"], "wikipedia_mention" in hits),
+    )
+
+
+def test_rule_engine_matches_legacy():
+    texts = SAMPLES + [" ".join(SAMPLES), _long_response()]
+    for text in texts:
+        for query in ("pytorch basics", "weather"):
+            assert _new_all(text, query) == legacy_all(text, query), text[:80]
+
+
+def test_overlapping_rules_all_fire():
+    """Rules hidden inside another rule's match are still found"""
+    text = "Here is a comprehensive list of Python code examples"
+    assert len(check_generic_filler(text)["issues"]) == 2
+    text = "They are imposing tariff changes"
+    assert len(check_unverifiable_claims(text)["issues"]) == 2
+
+
+def test_rule_engine_performance():
+    print("=" * 70)
+    print("QUALITY RULE ENGINE BENCHMARK")
+    print("=" * 70)
+
+    text = _long_response()
+    rounds = 200
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        legacy_all(text, "pytorch basics")
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        _new_all(text, "pytorch basics")
+    new = time.perf_counter() - start
+
+    per_call = 1e3 / rounds
+    print(f"Response length: {len(text)} chars")
+    print(f"Legacy per-check regex loops: {legacy * per_call:.3f} ms/response")
+    print(f"Compiled single-pass engine:  {new * per_call:.3f} ms/response")
+    print(f"Speedup: {legacy / new:.1f}x")
+
+
+if __name__ == "__main__":
+    test_rule_engine_matches_legacy()
+    test_overlapping_rules_all_fire()
+    test_rule_engine_performance()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Test resumable /ask streams: frame ids, replay after a drop, TTL and memory bounds"""
+
+import asyncio
+import threading
+import time
+
+from replay_buffer import ReplayBuffer, parse_last_event_id
+from stream_pump import StreamPump
+
+
+class Upstream:
+    """Stands in for a Groq stream: counts generations and whether it was cut short"""
+
+    def __init__(self, chunks=50, delay=0.002):
+        self.chunks = chunks
+        self.delay = delay
+        self.generations = 0
+        self.completed = threading.Event()
+        self.closed = threading.Event()
+
+    def stream(self):
+        self.generations += 1
+        try:
+            for i in range(self.chunks):
+                time.sleep(self.delay)
+                yield f"data: {i}\n\n"
+            self.completed.set()
+        finally:
+            self.closed.set()
+
+
+def frame_id(wire):
+    return parse_last_event_id(wire.split("\n", 1)[0][len("id: "):])[1]
+
+
+def test_parse_last_event_id():
+    assert parse_last_event_id("abc_-12:42") == ("abc_-12", 42)
+    assert parse_last_event_id("abc") is None
+    assert parse_last_event_id("abc:x") is None
+    assert parse_last_event_id("") is None
+
+
+def test_dropped_stream_resumes_without_regenerating():
+    upstream = Upstream()
+    pump = StreamPump(upstream.stream(), max_buffered=8, stream_id="s1", grace=5)
+
+    async def run():
+        first = []
+        async for wire in pump.frames():
+            first.append(wire)
+            if len(first) == 10:
+                break   # connection dropped
+        await asyncio.sleep(0.05)
+
+        # The client only really received 7 of them: resume from its last id
+        last_seen = frame_id(first[6])
+        assert pump.can_resume(last_seen)
+        start = time.monotonic()
+        rest = [wire async for wire in pump.frames(after=last_seen)]
+        return first[:7], rest, time.monotonic() - start
+
+    received, rest, elapsed = asyncio.run(run())
+    print(f"Resumed: {len(rest)} frames replayed/streamed in {elapsed * 1000:.0f} ms")
+    assert [w.split("\n", 1)[1] for w in received + rest] == [f"data: {i}\n\n" for i in range(50)]
+    assert [frame_id(w) for w in received + rest] == list(range(1, 51))
+    assert upstream.generations == 1 and upstream.completed.is_set()
+
+
+def test_unresumed_stream_is_cancelled_after_grace():
+    upstream = Upstream(chunks=10000)
+    pump = StreamPump(upstream.stream(), max_buffered=4, stream_id="s2", grace=0.1)
+
+    async def run():
+        async for _ in pump.frames():
+            break
+        await asyncio.sleep(0.3)
+
+    asyncio.run(run())
+    assert upstream.closed.wait(1)
+    assert not upstream.completed.is_set()
+    assert not pump.can_resume(1)
+
+
+def test_trimmed_frames_cannot_be_resumed():
+    upstream = Upstream(chunks=100, delay=0)
+    pump = StreamPump(upstream.stream(), max_buffered=8, stream_id="s3", max_bytes=200)
+
+    async def run():
+        return [wire async for wire in pump.frames()]
+
+    frames = asyncio.run(run())
+    assert len(frames) == 100
+    assert pump.bytes <= 200 + len(frames[-1])
+    assert not pump.can_resume(0)
+    assert pump.can_resume(99)
+
+
+def test_slow_consumer_keeps_its_frames_while_trimming():
+    upstream = Upstream(chunks=100, delay=0)
+    pump = StreamPump(upstream.stream(), max_buffered=8, stream_id="s4", max_bytes=200)
+
+    async def reader(delay):
+        frames = []
+        async for wire in pump.frames():
+            frames.append(wire)
+            await asyncio.sleep(delay)
+        return frames
+
+    async def run():
+        return await asyncio.gather(reader(0), reader(0.002))
+
+    fast, slow = asyncio.run(run())
+    assert [frame_id(w) for w in fast] == list(range(1, 101))
+    assert [frame_id(w) for w in slow] == list(range(1, 101))
+    assert pump.bytes <= 200 + len(fast[-1])
+
+
+def test_attaching_past_trimmed_frames_ends_with_an_error():
+    upstream = Upstream(chunks=100, delay=0)
+    pump = StreamPump(upstream.stream(), max_buffered=8, stream_id="s5", max_bytes=200)
+
+    async def run():
+        [wire async for wire in pump.frames()]
+        return [wire async for wire in pump.frames(after=0)]
+
+    late = asyncio.run(run())
+    assert len(late) == 1 and '"type": "error"' in late[0]
+
+
+class FakePump:
+    def __init__(self, stream_id, size, done=True, idle=0.0):
+        self.stream_id = stream_id
+        self.bytes = size
+        self.done = done
+        self.consumers = 0
+        self.last_active = time.monotonic() - idle
+
+
+def test_replay_buffer_ttl_and_memory_cap():
+    buffer = ReplayBuffer(ttl=60, max_bytes=1000)
+    buffer.add(FakePump("old", 100, idle=120))
+    buffer.add(FakePump("live", 400, done=False))
+    buffer.add(FakePump("a", 400))
+    buffer.sweep(force=True)
+    assert buffer.get("old") is None        # idle past the TTL
+    assert buffer.get("live") is not None
+
+    buffer.add(FakePump("b", 400))
+    buffer.sweep(force=True)
+    # Over the cap: the oldest finished stream goes, the live one stays
+    assert buffer.get("a") is None
+    assert buffer.get("live") is not None and buffer.get("b") is not None
+    stats = buffer.get_stats()
+    assert stats["expired"] == 1 and stats["evicted_for_memory"] == 1
+    assert stats["bytes"] == 800
+
+
+if __name__ == "__main__":
+    test_parse_last_event_id()
+    test_dropped_stream_resumes_without_regenerating()
+    test_unresumed_stream_is_cancelled_after_grace()
+    test_trimmed_frames_cannot_be_resumed()
+    test_slow_consumer_keeps_its_frames_while_trimming()
+    test_attaching_past_trimmed_frames_ends_with_an_error()
+    test_replay_buffer_ttl_and_memory_cap()
+    print("All replay buffer tests passed")
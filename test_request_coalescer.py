@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Test single-flight coalescing of identical /ask questions"""
+
+import asyncio
+import time
+
+from request_coalescer import RequestCoalescer, normalize_query
+from stream_pump import StreamPump, get_pump_stats
+
+
+class Upstream:
+    """Stands in for search + Groq: counts how many generations were started"""
+
+    def __init__(self, chunks=40, delay=0.005):
+        self.chunks = chunks
+        self.delay = delay
+        self.generations = 0
+
+    def stream(self):
+        self.generations += 1
+        for i in range(self.chunks):
+            time.sleep(self.delay)
+            yield f"data: {i}\n\n"
+
+
+def test_normalize_query():
+    assert normalize_query("  What is   the Capital of France?? ") == "what is the capital of france"
+    assert normalize_query("what is the capital of france") == normalize_query("What is the capital of France.")
+    assert normalize_query("2+2") != normalize_query("2+3")
+
+
+def ask(coalescer, upstream, key):
+    """What /ask does: join an in-flight generation, or lead a new one"""
+    flight = coalescer.join(key)
+    if flight is not None:
+        return flight.pump.frames(join=True)
+    pump = StreamPump(upstream.stream(), max_buffered=8)
+    coalescer.lead(key, pump)
+    return pump.frames()
+
+
+def test_burst_of_identical_questions_shares_one_generation():
+    coalescer = RequestCoalescer()
+    upstream = Upstream()
+    expected = [f"data: {i}\n\n" for i in range(upstream.chunks)]
+
+    async def client(delay):
+        await asyncio.sleep(delay)
+        return [frame async for frame in ask(coalescer, upstream, ("popular question", None))]
+
+    async def run():
+        # 200 users within the generation window, arriving at staggered times
+        return await asyncio.gather(*(client(i * 0.0008) for i in range(200)))
+
+    before = get_pump_stats()
+    start = time.monotonic()
+    results = asyncio.run(run())
+    elapsed = time.monotonic() - start
+    stats = coalescer.get_stats()
+    print(f"200 requests -> {upstream.generations} upstream generation(s) in {elapsed:.2f}s, "
+          f"{stats['upstream_calls_saved']} saved")
+    assert upstream.generations == 1
+    # Late joiners replay from the first frame
+    assert all(frames == expected for frames in results)
+    assert stats == {"leaders": 1, "joined": 199, "in_flight": 0, "upstream_calls_saved": 199}
+    # Joiners are neither resumes nor replays
+    after = get_pump_stats()
+    assert after["resumed"] == before["resumed"] and after["replayed_frames"] == before["replayed_frames"]
+
+
+def test_finished_and_different_questions_do_not_coalesce():
+    coalescer = RequestCoalescer()
+    upstream = Upstream(chunks=5, delay=0)
+
+    async def run():
+        await asyncio.gather(
+            *(collect(ask(coalescer, upstream, key)) for key in [("a", None), ("b", None), ("a", ("plain",))])
+        )
+        # Asked again after the first answer finished: a fresh generation
+        await collect(ask(coalescer, upstream, ("a", None)))
+
+    async def collect(frames):
+        return [frame async for frame in frames]
+
+    asyncio.run(run())
+    assert upstream.generations == 4
+    assert coalescer.get_stats()["joined"] == 0
+
+
+if __name__ == "__main__":
+    test_normalize_query()
+    test_burst_of_identical_questions_shares_one_generation()
+    test_finished_and_different_questions_do_not_coalesce()
+    print("All coalescing tests passed")
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Test the single-pass response formatter against golden output"""
+
+import json
+import os
+import re
+import time
+
+from response_formatter import StreamingFormatter, format_response
+
+GOLDEN_FILE = os.path.join(os.path.dirname(__file__), "test_data", "formatter_golden.json")
+
+
+def _load_golden():
+    with open(GOLDEN_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_golden_corpus():
+    """Output is identical to the multi-pass formatter it replaced"""
+    for case in _load_golden():
+        output = format_response(case["text"], case["preferences"], case["confidence_level"], case["sources"])
+        assert output == case["expected"], case["name"]
+
+
+def _stream(text, preferences, size, **kwargs):
+    formatter = StreamingFormatter(preferences, **kwargs)
+    fragments = [formatter.feed(text[i:i + size]) for i in range(0, len(text), size)]
+    fragments.append(formatter.finish())
+    return fragments
+
+
+def test_streaming_matches_golden_corpus():
+    """Streamed fragments add up to format_response() without the confidence marker"""
+    for case in _load_golden():
+        expected = format_response(case["text"], case["preferences"])
+        for size in (1, 7, 64):
+            assert "".join(_stream(case["text"], case["preferences"], size)) == expected, (case["name"], size)
+
+
+def test_streaming_emits_completed_lines_early():
+    text = "Overview\nthe first line is over.\nThe second line is still being writ"
+    formatter = StreamingFormatter({"use_emojis": False})
+    assert formatter.feed(text) == "Overview\n\nthe first line is over."
+    assert formatter.finish() == "\nThe second line is still being writ"
+
+
+def test_streaming_passes_through_overlong_lines():
+    text = "word " * 100
+    fragments = _stream(text, {}, 10, max_line_chars=50)
+    assert fragments[5]  # sent before the line ended
+    assert "".join(fragments) == text
+
+
+# =========================
+# LEGACY IMPLEMENTATION (multi-pass, for the benchmark)
+# =========================
+
+def _legacy_structure_into_lists(text, use_numbered=True, use_bullets=True):
+    result = []
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if not stripped:
+            result.append("")
+            continue
+        if re.match(r'^[\d]+[\.\)]\s+', stripped) or re.match(r'^[-•]\s+', stripped):
+            result.append(line)
+            continue
+        if len(stripped) > 120 and any(word in stripped.lower() for word in [',', 'and', 'also', 'additionally']):
+            parts = re.split(r',\s+|(?<=\w)\s+(?:and|also|additionally|furthermore|moreover)\s+', stripped)
+            if len(parts) > 1:
+                for i, part in enumerate(parts):
+                    part = part.strip()
+                    if part:
+                        result.append(f"• {part}" if use_bullets else f"{i+1}. {part}" if use_numbered else f"- {part}")
+                continue
+        result.append(line)
+    return '\n'.join(result)
+
+
+def _legacy_add_visual_separators(text):
+    lines = text.split('\n')
+    result = []
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        result.append(line)
+        if stripped and len(stripped) < 60 and stripped[0].isupper():
+            if i + 1 < len(lines) and lines[i + 1].strip():
+                result.append("")
+        if len(stripped) > 150 and '.' in stripped:
+            if i + 1 < len(lines) and lines[i + 1].strip():
+                result.append("")
+    return '\n'.join(result)
+
+
+def _legacy_emphasize_key_points(text):
+    for pattern, replacement in [
+        (r'\b(important|critical|must|required|note|remember|key)\b', r'**\1**'),
+        (r'\b(warning|caution|attention)\b', r'⚠️ \1'),
+        (r'\b(success|completed|done|finished)\b', r'✅ \1'),
+    ]:
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    return text
+
+
+def _legacy_add_relevant_emojis(text):
+    emoji_map = {
+        r'step[\s\d]+': '📍', r'example': '💡', r'note': '📝', r'code': '💻',
+        r'question': '❓', r'answer': '✅', r'error': '❌', r'warning': '⚠️',
+        r'tip': '💡', r'important': '⭐', r'summary': '📊', r'list': '📋',
+        r'check': '✓', r'number': '🔢',
+    }
+    result = text
+    for pattern, emoji in emoji_map.items():
+        new_lines = []
+        for line in result.split('\n'):
+            if re.search(pattern, line, re.IGNORECASE) and emoji not in line:
+                line = emoji + ' ' + line
+            new_lines.append(line)
+        result = '\n'.join(new_lines)
+    return result
+
+
+def legacy_format(text):
+    text = _legacy_structure_into_lists(text)
+    text = _legacy_add_visual_separators(text)
+    text = _legacy_emphasize_key_points(text)
+    return _legacy_add_relevant_emojis(text)
+
+
+def test_formatter_performance():
+    print("=" * 70)
+    print("RESPONSE FORMATTER BENCHMARK")
+    print("=" * 70)
+
+    corpus = "\n\n".join(dict.fromkeys(case["text"] for case in _load_golden()))
+    text = corpus * (50_000 // len(corpus) + 1)
+    assert legacy_format(text) == format_response(text, {"include_confidence": False})
+
+    rounds = 10
+    start = time.perf_counter()
+    for _ in range(rounds):
+        legacy_format(text)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        format_response(text, {"include_confidence": False})
+    new = time.perf_counter() - start
+
+    print(f"Response: {len(text)} chars, {text.count(chr(10)) + 1} lines")
+    print(f"Multi-pass formatter:  {legacy / rounds * 1e3:.2f} ms")
+    print(f"Single-pass formatter: {new / rounds * 1e3:.2f} ms")
+    print(f"Speedup: {legacy / new:.1f}x")
+
+
+if __name__ == "__main__":
+    test_golden_corpus()
+    test_streaming_matches_golden_corpus()
+    test_streaming_emits_completed_lines_early()
+    test_streaming_passes_through_overlong_lines()
+    test_formatter_performance()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Replay recorded Groq streams through the SSE decoder and compare with the old line parser"""
+
+import codecs
+import glob
+import json
+import os
+import time
+
+from sse_decoder import GroqSSEDecoder, coalesce_tokens, ORJSON_AVAILABLE
+
+RECORDINGS = glob.glob(os.path.join(os.path.dirname(__file__) or ".", "test_data", "*.sse"))
+CHUNK_SIZE = 1024      # roughly what requests hands back per read on a live stream
+ROUNDS = 200
+
+
+def _chunks(raw: bytes, size: int = CHUNK_SIZE):
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+def legacy_decode(chunks):
+    """The previous iter_lines(decode_unicode=True) + json.loads loop"""
+    pending = ""
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        pending += utf8.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if not line or not line.startswith("data: "):
+                continue
+            data_str = line[6:]
+            if data_str == "[DONE]":
+                return
+            try:
+                data = json.loads(data_str)
+                delta = data["choices"][0].get("delta", {})
+                token = delta.get("content")
+                if token:
+                    yield token
+            except Exception:
+                continue
+
+
+def new_decode(chunks):
+    return GroqSSEDecoder().decode(chunks)
+
+
+def _time(decoder, chunks):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for _token in decoder(chunks):
+            pass
+    return time.perf_counter() - start
+
+
+def test_sse_decoder_matches_legacy():
+    """Both parsers produce the same tokens for every recording"""
+    assert RECORDINGS, "no recorded streams found in test_data/"
+    for path in RECORDINGS:
+        with open(path, "rb") as f:
+            raw = f.read()
+        for size in (1, 7, 64, CHUNK_SIZE, len(raw)):
+            chunks = _chunks(raw, size)
+            assert list(new_decode(chunks)) == list(legacy_decode(chunks)), (path, size)
+
+
+def test_coalesce_tokens_preserves_text():
+    """Coalescing changes chunk boundaries, never the text"""
+    with open(RECORDINGS[0], "rb") as f:
+        chunks = _chunks(f.read())
+    tokens = list(new_decode(chunks))
+    batches = list(coalesce_tokens(iter(tokens), max_chars=32, max_delay=1.0))
+    assert "".join(batches) == "".join(tokens)
+    assert batches[0] == tokens[0]
+    assert len(batches) < len(tokens)
+
+
+def test_sse_decoder_performance():
+    print('=' * 70)
+    print('GROQ SSE DECODER BENCHMARK')
+    print(f'orjson available: {ORJSON_AVAILABLE}')
+    print('=' * 70)
+
+    for path in RECORDINGS:
+        with open(path, "rb") as f:
+            chunks = _chunks(f.read())
+        tokens = sum(1 for _ in new_decode(chunks))
+
+        legacy = _time(legacy_decode, chunks)
+        new = _time(new_decode, chunks)
+
+        print(f'\nRecording: {os.path.basename(path)} ({tokens} tokens x {ROUNDS} rounds)')
+        print(f'  Legacy parser: {legacy * 1e6 / (tokens * ROUNDS):.2f} µs/token')
+        print(f'  Byte decoder:  {new * 1e6 / (tokens * ROUNDS):.2f} µs/token')
+        print(f'  Speedup: {legacy / new:.1f}x')
+
+
+if __name__ == '__main__':
+    test_sse_decoder_matches_legacy()
+    test_coalesce_tokens_preserves_text()
+    test_sse_decoder_performance()
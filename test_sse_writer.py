@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Test the coalescing SSE writer used by /ask"""
+
+import json
+import time
+
+from sse_writer import SSEWriter, text_frame
+
+TOKENS = [" token", " stream", ",", " \"quoted\"", " café", "\n", " end."] * 300
+
+
+def _parse(frames):
+    text = ""
+    for frame in frames:
+        assert frame.startswith("data: ") and frame.endswith("\n\n")
+        event = json.loads(frame[6:])
+        assert event["type"] == "text"
+        text += event["text"]
+    return text
+
+
+def test_frames_match_json_dumps():
+    """Precomputed envelope produces exactly what json.dumps produced before"""
+    for chunk in ["plain", "quote \" and \\ backslash", "newline\n", "unicode é ✨"]:
+        assert text_frame(chunk) == "data: " + json.dumps({'type': 'text', 'text': chunk}) + "\n\n"
+
+
+def test_writer_coalesces_without_losing_text():
+    writer = SSEWriter(flush_ms=10_000, flush_bytes=64)
+    frames = [frame for token in TOKENS if (frame := writer.write(token))]
+    frames.append(writer.flush())
+
+    assert _parse(frames) == "".join(TOKENS)
+    assert writer.transcript == "".join(TOKENS)
+    assert frames[0] == text_frame(TOKENS[0])  # first token is never delayed
+    assert writer.frames < len(TOKENS) / 5
+
+
+def test_default_writer_coalesces_by_size_only():
+    writer = SSEWriter()
+    frames = [frame for token in TOKENS if (frame := writer.write(token))]
+    time.sleep(0.03)
+    assert writer.write(" late") is None   # no time-based flush unless flush_ms is set
+    frames.append(writer.flush())
+
+    assert _parse(frames) == "".join(TOKENS) + " late"
+    assert all(len(json.loads(frame[6:])["text"]) < 256 + 10 for frame in frames)
+    assert writer.frames < len(TOKENS) / 20
+
+    unbuffered = SSEWriter(flush_bytes=0)
+    assert [unbuffered.write(token) for token in TOKENS[:5]] == [text_frame(token) for token in TOKENS[:5]]
+
+
+def test_writer_performance():
+    print("=" * 70)
+    print("SSE FRAME WRITER BENCHMARK")
+    print("=" * 70)
+
+    rounds = 50
+    start = time.perf_counter()
+    for _ in range(rounds):
+        full_text = ""
+        frames = []
+        for chunk in TOKENS:
+            full_text += chunk
+            frames.append(f"data: {json.dumps({'type': 'text', 'text': chunk})}\n\n")
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        writer = SSEWriter(flush_ms=25, flush_bytes=256)
+        frames = [frame for chunk in TOKENS if (frame := writer.write(chunk))]
+        frames.append(writer.flush())
+        writer.transcript
+    new = time.perf_counter() - start
+
+    per_token = 1e6 / (rounds * len(TOKENS))
+    print(f"Per-token json.dumps + concat: {legacy * per_token:.2f} µs/token")
+    print(f"Coalescing writer:            {new * per_token:.2f} µs/token")
+    print(f"Speedup: {legacy / new:.1f}x")
+
+
+if __name__ == "__main__":
+    test_frames_match_json_dumps()
+    test_writer_coalesces_without_losing_text()
+    test_default_writer_coalesces_by_size_only()
+    test_writer_performance()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Test backpressure and disconnect handling of the SSE stream pump"""
+
+import asyncio
+import threading
+import time
+
+from stream_pump import StreamPump, get_pump_stats
+from stream_tracker import StreamTracker
+from sse_writer import SSEWriter
+
+
+class Upstream:
+    """Stands in for a Groq stream: counts chunks pulled and whether it was closed"""
+
+    def __init__(self, chunks=1000, delay=0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.pulled = 0
+        self.closed = threading.Event()
+
+    def stream(self):
+        try:
+            for i in range(self.chunks):
+                if self.delay:
+                    time.sleep(self.delay)
+                self.pulled += 1
+                yield f"data: {i}\n\n"
+        finally:
+            self.closed.set()
+
+
+class FakeRequest:
+    def __init__(self):
+        self.gone = False
+
+    async def is_disconnected(self):
+        return self.gone
+
+
+def test_all_frames_delivered_in_order():
+    upstream = Upstream(chunks=200)
+
+    async def run():
+        return [frame async for frame in StreamPump(upstream.stream(), max_buffered=8).frames(FakeRequest())]
+
+    frames = asyncio.run(run())
+    assert frames == [f"data: {i}\n\n" for i in range(200)]
+    assert upstream.closed.is_set()
+
+
+def test_slow_client_applies_backpressure():
+    upstream = Upstream(chunks=1000)
+    pump = StreamPump(upstream.stream(), max_buffered=8)
+
+    async def run():
+        ahead = []
+        async for _ in pump.frames():
+            await asyncio.sleep(0.002)   # slow client
+            ahead.append(pump.produced - pump.sent)
+            if pump.sent >= 50:
+                break
+        return ahead
+
+    ahead = asyncio.run(run())
+    upstream.closed.wait(2)
+    print(f"Max frames buffered ahead of the client: {max(ahead)}; chunks pulled upstream: {upstream.pulled}")
+    assert max(ahead) <= 8
+    assert upstream.pulled < 70   # not 1000: the upstream read stalled with the client
+    assert upstream.closed.is_set()
+
+
+def test_disconnect_cancels_upstream_promptly():
+    upstream = Upstream(chunks=10000, delay=0.001)
+    request = FakeRequest()
+    pump = StreamPump(upstream.stream(), max_buffered=4, poll=0.02)
+    before = get_pump_stats()["disconnected"]
+
+    async def run():
+        received = 0
+        async for _ in pump.frames(request):
+            received += 1
+            if received == 20:
+                request.gone = True   # user closed the tab
+        return received
+
+    start = time.monotonic()
+    received = asyncio.run(run())
+    assert upstream.closed.wait(1)
+    elapsed = time.monotonic() - start
+    print(f"Disconnect noticed after {received} frames, upstream closed {elapsed * 1000:.0f} ms after start, "
+          f"{upstream.pulled}/{upstream.chunks} chunks pulled")
+    assert received < 100
+    assert upstream.pulled < 200
+    assert get_pump_stats()["disconnected"] == before + 1
+
+
+def test_abandoned_stream_counts_tokens_saved():
+    tracker = StreamTracker()
+
+    # One complete 100-token answer sets the average
+    done = tracker.open("chat", 1, lambda *args: None)
+    done.writer = SSEWriter()
+    for _ in range(100):
+        done.writer.write("tok ")
+    done.close()
+
+    cut = tracker.open("chat", 1, lambda *args: None)
+    cut.writer = SSEWriter()
+    for _ in range(30):
+        cut.writer.write("tok ")
+    cut.abandon()
+    cut.close()
+
+    stats = tracker.get_stats()
+    assert stats["abandoned"] == 1
+    assert stats["tokens_saved_estimate"] == 70
+    assert stats["avg_answer_tokens"] == 100
+
+
+if __name__ == "__main__":
+    test_all_frames_delivered_in_order()
+    test_slow_client_applies_backpressure()
+    test_disconnect_cancels_upstream_promptly()
+    test_abandoned_stream_counts_tokens_saved()
+    print("All stream pump tests passed")
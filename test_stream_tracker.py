@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test stream draining and the partial-answer flush on shutdown"""
+
+import asyncio
+import threading
+import time
+
+from sse_writer import SSEWriter
+from stream_tracker import StreamTracker
+
+
+class Saved:
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self, chat_id, user_id, role, content):
+        self.rows.append((chat_id, user_id, role, content))
+
+
+def test_answer_is_saved_once():
+    saved = Saved()
+    tracker = StreamTracker()
+    stream = tracker.open("chat", 1, saved)
+    stream.writer = SSEWriter()
+    stream.writer.write("Hello")
+    assert stream.save()
+    assert not stream.save()
+    assert tracker.flush_pending() == 0
+    stream.close()
+    assert saved.rows == [("chat", 1, "assistant", "Hello")]
+    assert tracker.get_stats()["active"] == 0
+
+
+def test_drain_waits_for_active_streams():
+    tracker = StreamTracker()
+    stream = tracker.open("chat", 1, Saved())
+    threading.Timer(0.2, stream.close).start()
+
+    start = time.monotonic()
+    remaining = asyncio.run(tracker.drain(timeout=2, poll=0.01))
+    elapsed = time.monotonic() - start
+    print(f"Drained in {elapsed * 1000:.0f} ms")
+    assert remaining == 0
+    assert 0.15 < elapsed < 1.0
+    assert not tracker.admit()
+    assert tracker.get_stats()["rejected_draining"] == 1
+
+
+def test_stragglers_are_flushed_at_the_deadline():
+    saved = Saved()
+    tracker = StreamTracker()
+    stuck = tracker.open("chat", 1, saved)
+    stuck.writer = SSEWriter()
+    stuck.writer.write("Partial ")
+    stuck.writer.write("answer")
+    tracker.open("other", 2, saved)   # nothing streamed yet: nothing to save
+
+    remaining = asyncio.run(tracker.drain(timeout=0.05, poll=0.01))
+    assert remaining == 2
+    assert tracker.flush_pending() == 1
+    assert saved.rows == [("chat", 1, "assistant", "Partial answer")]
+
+    # The stream finishing late must not save a second copy
+    assert not stuck.save()
+    assert tracker.get_stats()["flushed_on_shutdown"] == 1
+
+
+def test_lifespan_shutdown_saves_an_active_stream():
+    """The app's shutdown drains, stops admitting and saves the partial answer of a stream still running"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    import database
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    database.engine = engine   # init_db() at startup creates the tables here, not in chats.db
+    database.SessionLocal.configure(bind=engine)
+
+    import app
+    saved = Saved()
+    app.config['STREAM_DRAIN_TIMEOUT'] = 0.2
+
+    async def run():
+        async with app.app.router.lifespan_context(app.app):
+            stream = app.stream_tracker.open("chat", 1, saved)
+            stream.writer = SSEWriter()
+            stream.writer.write("Half an ans")
+
+    try:
+        start = time.monotonic()
+        asyncio.run(run())
+        assert time.monotonic() - start < 2
+        assert saved.rows == [("chat", 1, "assistant", "Half an ans")]
+        assert not app.stream_tracker.admit()
+    finally:
+        app.stream_tracker.accepting = True
+
+
+if __name__ == "__main__":
+    test_answer_is_saved_once()
+    test_drain_waits_for_active_streams()
+    test_stragglers_are_flushed_at_the_deadline()
+    test_lifespan_shutdown_saves_an_active_stream()
+    print("All stream tracker tests passed")
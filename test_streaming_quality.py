@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Test the incremental quality checker used on streamed /ask answers"""
+
+import random
+import time
+
+from response_quality import StreamingQualityChecker, check_response_quality
+
+ANSWER = (
+    "PyTorch is a deep learning framework. As of March 5, 2027 the API was redesigned, "
+    "and as of June 1, 2025 it was stable. See GitHub - pytorch/examples for more. "
+    "Here is a comprehensive list of Python code examples, plus 10 simple examples. "
+    "The government is imposing tariff changes. A hello world script is included. "
+    "According to Wikipedia, the wiki article covers this. " * 3
+)
+
+ISSUE_KEYS = ("type", "text", "confidence_penalty")
+
+
+def _chunks(text, sizes):
+    pos = 0
+    while pos < len(text):
+        size = sizes[pos % len(sizes)]
+        yield text[pos:pos + size]
+        pos += size
+
+
+def _stream(text, query, sizes):
+    checker = StreamingQualityChecker(query)
+    events = []
+    for chunk in _chunks(text, sizes):
+        events.extend(checker.feed(chunk))
+    events.extend(checker.finish())
+    return checker, events
+
+
+def _key(issues):
+    return sorted(tuple(str(i.get(k)) for k in ISSUE_KEYS) for i in issues)
+
+
+def test_streaming_matches_batch_checks():
+    rng = random.Random(7)
+    for text in (ANSWER, ANSWER * 4, "Short answer.", ""):
+        batch = check_response_quality(text, "pytorch tutorial")
+        for sizes in ([1], [3, 7], [50], [rng.randint(1, 40) for _ in range(20)]):
+            checker, events = _stream(text, "pytorch tutorial", sizes)
+            assert _key(checker.issues) == _key(batch["issues"]), sizes
+            assert abs(checker.penalties - batch["penalties"]) < 1e-9
+            assert events[-1]["final"] and events[-1]["confidence_level"] == batch["confidence_level"]
+
+
+def test_future_date_reported_while_streaming():
+    text = "As of March 5, 2027 the library changed completely. " + "Filler sentence here. " * 40
+    checker = StreamingQualityChecker()
+    seen_at = None
+    for position, chunk in enumerate(_chunks(text, [4])):
+        for event in checker.feed(chunk):
+            if event["kind"] == "issue" and event["issue"]["type"] == "FUTURE_DATE":
+                seen_at = seen_at if seen_at is not None else position * 4
+    assert seen_at is not None and seen_at < len(text) // 2
+    assert checker.finish()[-1]["final"]
+
+
+def test_streaming_checker_latency():
+    print("=" * 70)
+    print("STREAMING QUALITY CHECKER")
+    print("=" * 70)
+
+    text = ANSWER * 20
+    tokens = list(_chunks(text, [4]))
+
+    start = time.perf_counter()
+    checker = StreamingQualityChecker("pytorch tutorial")
+    for token in tokens:
+        checker.feed(token)
+    fed = time.perf_counter()
+    checker.finish()
+    finished = time.perf_counter()
+
+    start_batch = time.perf_counter()
+    check_response_quality(text, "pytorch tutorial")
+    batch = time.perf_counter() - start_batch
+
+    print(f"Answer: {len(text)} chars in {len(tokens)} chunks")
+    print(f"Per chunk:          {(fed - start) / len(tokens) * 1e6:.1f} µs")
+    print(f"finish():           {(finished - fed) * 1e3:.3f} ms")
+    print(f"Batch check at end: {batch * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    test_streaming_matches_batch_checks()
+    test_future_date_reported_while_streaming()
+    test_streaming_checker_latency()
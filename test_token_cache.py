@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""Test the verified-token cache and denylist, and benchmark verification"""
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+from token_cache import VerifiedTokenCache, token_digest
+
+SECRET = b"test-secret"
+
+
+def _b64(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def encode_hs256(payload: dict) -> str:
+    """Minimal HS256 JWT, enough to exercise the cache without PyJWT"""
+    signing_input = _b64(b'{"alg":"HS256","typ":"JWT"}') + b"." + _b64(json.dumps(payload).encode())
+    signature = hmac.new(SECRET, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + _b64(signature)).decode()
+
+
+def decode_hs256(token: str) -> dict:
+    """Full verification as done on every request before: split, HMAC, compare, parse, check exp"""
+    header, body, signature = token.encode().split(b".")
+    expected = hmac.new(SECRET, header + b"." + body, hashlib.sha256).digest()
+    if not hmac.compare_digest(_b64(expected), signature):
+        raise ValueError("bad signature")
+    json.loads(base64.urlsafe_b64decode(header + b"=" * (-len(header) % 4)))
+    payload = json.loads(base64.urlsafe_b64decode(body + b"=" * (-len(body) % 4)))
+    if payload["exp"] <= time.time():
+        raise ValueError("expired")
+    return payload
+
+
+def verify(cache, token):
+    """Same flow as auth.verify_token"""
+    digest = token_digest(token)
+    cached = cache.get(digest)
+    if cached:
+        return cached
+    if cache.is_revoked(digest):
+        return None, False
+    try:
+        payload = decode_hs256(token)
+    except Exception:
+        return None, False
+    cache.put(digest, payload["user_id"], payload.get("is_guest", False), payload["exp"])
+    return payload["user_id"], payload.get("is_guest", False)
+
+
+def test_cached_token_is_served_without_reverification():
+    cache = VerifiedTokenCache()
+    token = encode_hs256({"user_id": 5, "is_guest": False, "exp": time.time() + 3600})
+
+    assert verify(cache, token) == (5, False)
+    assert verify(cache, token) == (5, False)
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_cache_honours_exp():
+    cache = VerifiedTokenCache()
+    token = encode_hs256({"user_id": 5, "exp": time.time() + 0.05})
+
+    assert verify(cache, token) == (5, False)
+    time.sleep(0.06)
+    assert cache.get(token_digest(token)) is None
+    assert verify(cache, token) == (None, False)
+
+
+def test_max_age_caps_trust_in_long_lived_tokens():
+    cache = VerifiedTokenCache(max_age=0.01)
+    token = encode_hs256({"user_id": 5, "exp": time.time() + 7 * 86400})
+    verify(cache, token)
+    time.sleep(0.02)
+    assert cache.get(token_digest(token)) is None
+
+
+def test_revoked_token_is_denied_and_notified():
+    cache = VerifiedTokenCache()
+    published = []
+    cache.add_revocation_listener(lambda digest, exp: published.append(digest))
+    token = encode_hs256({"user_id": 5, "exp": time.time() + 3600})
+    other = encode_hs256({"user_id": 6, "exp": time.time() + 3600})
+
+    verify(cache, token)
+    verify(cache, other)
+    cache.revoke(token_digest(token), time.time() + 3600)
+
+    assert verify(cache, token) == (None, False)
+    assert verify(cache, other) == (6, False)
+    assert published == [token_digest(token)]
+
+
+def test_denylist_forgets_expired_tokens():
+    cache = VerifiedTokenCache(max_revoked=10)
+    for i in range(50):
+        cache.revoke(token_digest(f"old-{i}"), time.time() - 1)
+    assert cache.get_stats()["denylist"] <= 10
+    assert not cache.is_revoked(token_digest("old-49"))
+
+
+def test_cache_size_is_bounded():
+    cache = VerifiedTokenCache(max_entries=8)
+    for user_id in range(20):
+        verify(cache, encode_hs256({"user_id": user_id, "exp": time.time() + 3600}))
+    assert cache.get_stats()["entries"] == 8
+
+
+def test_verification_performance():
+    print("=" * 70)
+    print("TOKEN VERIFICATION BENCHMARK")
+    print("=" * 70)
+
+    token = encode_hs256({"user_id": 42, "is_guest": False, "exp": time.time() + 7 * 86400})
+    cache = VerifiedTokenCache()
+    rounds = 20_000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode_hs256(token)
+    full = (time.perf_counter() - start) / rounds
+
+    verify(cache, token)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        verify(cache, token)
+    cached = (time.perf_counter() - start) / rounds
+
+    print(f"Full HS256 verification: {full * 1e6:.2f} µs")
+    print(f"Cached fast path:        {cached * 1e6:.2f} µs ({full / cached:.1f}x)")
+    assert cached < full
+
+
+if __name__ == "__main__":
+    test_cached_token_is_served_without_reverification()
+    test_cache_honours_exp()
+    test_max_age_caps_trust_in_long_lived_tokens()
+    test_revoked_token_is_denied_and_notified()
+    test_denylist_forgets_expired_tokens()
+    test_cache_size_is_bounded()
+    test_verification_performance()
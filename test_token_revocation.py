@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Test that a logout on one worker revokes the token on every worker"""
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+import auth
+from auth import create_token, revoke_token, sync_revocations, verify_token
+from database import Base, SessionLocal
+from models import RevokedToken
+from token_cache import token_cache, token_digest
+
+
+def use_fresh_database():
+    """Point the shared session factory at an in-memory database"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal.configure(bind=engine)
+    token_cache.clear()
+    sync_revocations(force=True)
+
+
+def test_logout_is_stored_for_all_workers():
+    use_fresh_database()
+    token = create_token(42)
+    assert verify_token(token) == (42, False)
+
+    assert revoke_token(token)
+    assert verify_token(token) == (None, False)
+    db = SessionLocal()
+    try:
+        assert [row.digest for row in db.query(RevokedToken).all()] == [token_digest(token).hex()]
+    finally:
+        db.close()
+
+
+def test_revocation_from_another_worker_reaches_the_cache():
+    use_fresh_database()
+    token = create_token(7)
+    assert verify_token(token) == (7, False)   # now served from this worker's cache
+
+    # Another worker handles the logout: only the shared table changes
+    digest = token_digest(token)
+    assert auth._store_revocation(digest, auth.jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])["exp"])
+    assert verify_token(token) == (7, False)   # until the next sync (at most REVOCATION_SYNC_INTERVAL)
+
+    sync_revocations(force=True)
+    assert verify_token(token) == (None, False)
+
+
+def test_invalid_token_is_not_reported_revoked():
+    use_fresh_database()
+    assert not revoke_token("not-a-jwt")
+
+
+if __name__ == "__main__":
+    test_logout_is_stored_for_all_workers()
+    test_revocation_from_another_worker_reaches_the_cache()
+    test_invalid_token_is_not_reported_revoked()
+    print("All token revocation tests passed")
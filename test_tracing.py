@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Test request tracing: spans, structured trace logs, stage histograms and /metrics output"""
+
+import json
+import logging
+import time
+
+import tracing
+from tracing import NULL_TRACE, StageMetrics, Trace
+
+
+class Captured(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+
+
+def test_trace_records_spans_and_logs_one_json_line():
+    handler = Captured()
+    logging.getLogger("tracing").addHandler(handler)
+    logging.getLogger("tracing").setLevel(logging.INFO)
+    try:
+        trace = Trace("unit")
+        with trace.span("sanitize_input"):
+            pass
+        with trace.span("search_web") as span:
+            time.sleep(0.01)
+            span["results"] = 3
+        try:
+            with trace.span("fetch_page", url="https://example.com"):
+                raise TimeoutError()
+        except TimeoutError:
+            pass
+        start = time.monotonic()
+        trace.record("time_to_first_token", start - 0.2, start)
+        trace.finish(outcome="ok")
+        trace.finish()   # idempotent
+    finally:
+        logging.getLogger("tracing").removeHandler(handler)
+
+    assert len(handler.records) == 1
+    logged = json.loads(handler.records[0])
+    assert logged["name"] == "unit" and logged["outcome"] == "ok" and logged["trace_id"] == trace.trace_id
+    spans = {span["name"]: span for span in logged["spans"]}
+    assert spans["search_web"]["results"] == 3 and spans["search_web"]["duration_ms"] >= 10
+    assert spans["fetch_page"]["error"] == "TimeoutError"
+    assert 199 <= spans["time_to_first_token"]["duration_ms"] <= 201
+
+    stats = tracing.stage_metrics.get_stats()["unit"]
+    assert set(stats) == {"sanitize_input", "search_web", "fetch_page", "time_to_first_token", "total"}
+    assert stats["search_web"]["count"] == 1
+
+
+def test_quantiles_and_prometheus_text():
+    metrics = StageMetrics(window=1000)
+    for ms in range(1, 1001):
+        metrics.observe("ask", "search_web", ms / 1000)
+    stats = metrics.get_stats()["ask"]["search_web"]
+    assert (stats["p50_ms"], stats["p95_ms"], stats["p99_ms"]) == (501.0, 951.0, 991.0)
+
+    text = metrics.render_prometheus()
+    assert "# TYPE littlefox_stage_duration_seconds histogram" in text
+    assert 'littlefox_stage_duration_seconds_bucket{trace="ask",stage="search_web",le="0.1"} 100' in text
+    assert 'littlefox_stage_duration_seconds_bucket{trace="ask",stage="search_web",le="+Inf"} 1000' in text
+    assert 'littlefox_stage_duration_seconds_count{trace="ask",stage="search_web"} 1000' in text
+    assert 'littlefox_stage_latency_seconds{trace="ask",stage="search_web",quantile="0.99"} 0.991000' in text
+    assert text.endswith("\n")
+
+
+def test_null_trace_and_span_overhead():
+    with NULL_TRACE.span("anything") as span:
+        span["x"] = 1
+    NULL_TRACE.finish()
+
+    trace = Trace("overhead")
+    n = 20000
+    start = time.perf_counter()
+    for _ in range(n):
+        with trace.span("stage"):
+            pass
+    per_span = (time.perf_counter() - start) / n
+    print(f"Span overhead: {per_span * 1e6:.2f} µs")
+    assert per_span < 50e-6
+
+
+if __name__ == "__main__":
+    test_trace_records_spans_and_logs_one_json_line()
+    test_quantiles_and_prometheus_text()
+    test_null_trace_and_span_overhead()
+    print("All tracing tests passed")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Test per-upstream circuit breakers, rolling stats and half-open probes"""
+
+import time
+
+from upstream_registry import CLOSED, HALF_OPEN, OPEN, Upstream, UpstreamRegistry
+
+
+def fail(registry, name, times):
+    for _ in range(times):
+        try:
+            with registry.track(name):
+                raise ConnectionError("refused")
+        except ConnectionError:
+            pass
+
+
+def test_consecutive_failures_open_the_circuit():
+    registry = UpstreamRegistry()
+    registry.register("groq", failure_threshold=3, reset_timeout=60)
+
+    fail(registry, "groq", 2)
+    assert registry.get("groq").state == CLOSED
+    fail(registry, "groq", 1)
+    assert registry.get("groq").state == OPEN
+
+    # Open circuit: calls are refused without touching the network
+    assert not registry.allow("groq")
+    assert not registry.available("groq")
+    assert registry.get("groq").snapshot()["short_circuited"] == 1
+
+
+def test_half_open_lets_one_trial_call_through():
+    upstream = Upstream("ollama", failure_threshold=1, reset_timeout=0.05)
+    upstream.record_failure(0.01, ConnectionError())
+    assert upstream.state == OPEN
+
+    time.sleep(0.06)
+    assert upstream.allow()            # the trial call
+    assert upstream.state == HALF_OPEN
+    assert not upstream.allow()        # everyone else keeps failing fast
+
+    upstream.record_success(0.02)
+    assert upstream.state == CLOSED and upstream.allow()
+
+
+def test_failed_trial_reopens_with_backoff():
+    upstream = Upstream("ddg", failure_threshold=1, reset_timeout=0.05)
+    upstream.record_failure(0.01)
+    time.sleep(0.06)
+    assert upstream.allow()
+    upstream.record_failure(0.01)
+
+    assert upstream.state == OPEN
+    assert upstream.reset_timeout == 0.1
+
+
+def test_background_probe_closes_recovered_circuit():
+    healthy = {"value": False}
+    registry = UpstreamRegistry()
+    upstream = registry.register("groq", probe=lambda: healthy["value"], failure_threshold=1, reset_timeout=0.01)
+    fail(registry, "groq", 1)
+
+    time.sleep(0.02)
+    registry.probe_due()
+    assert upstream.state == OPEN      # probe failed, backed off
+
+    healthy["value"] = True
+    time.sleep(0.03)
+    registry.probe_due()
+    assert upstream.state == CLOSED
+
+
+def test_stream_closed_early_counts_as_success():
+    registry = UpstreamRegistry()
+
+    def stream():
+        with registry.track("groq"):
+            yield "a"
+            yield "b"
+
+    tokens = stream()
+    next(tokens)
+    tokens.close()
+    snapshot = registry.get("groq").snapshot()
+    assert snapshot["calls"] == 1 and snapshot["failures"] == 0
+
+
+def test_rolling_stats():
+    upstream = Upstream("ollama", failure_threshold=100)
+    for i in range(20):
+        upstream.record_success(0.010 * (i + 1))
+    upstream.record_failure(0.5)
+
+    snapshot = upstream.snapshot()
+    assert snapshot["window_calls"] == 21
+    assert snapshot["error_rate"] == round(1 / 21, 3)
+    assert snapshot["p50_ms"] == 110.0
+    assert snapshot["p95_ms"] == 200.0
+
+
+if __name__ == "__main__":
+    test_consecutive_failures_open_the_circuit()
+    test_half_open_lets_one_trial_call_through()
+    test_failed_trial_reopens_with_backoff()
+    test_background_probe_closes_recovered_circuit()
+    test_stream_closed_early_counts_as_success()
+    test_rolling_stats()
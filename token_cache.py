@@ -0,0 +1,137 @@
+"""
+Verified Token Cache
+Remembers recently verified JWTs (by digest, until their exp) so repeat
+requests with the same long-lived token skip signature verification, and
+keeps a compact denylist of revoked tokens.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+MAX_CACHED_TOKENS = int(os.getenv("TOKEN_CACHE_MAX_TOKENS", "4096"))
+# Upper bound on how long a verification is trusted, whatever the token's exp
+TOKEN_CACHE_MAX_AGE = float(os.getenv("TOKEN_CACHE_MAX_AGE", "900"))
+MAX_REVOKED_TOKENS = int(os.getenv("TOKEN_DENYLIST_MAX", "100000"))
+
+
+def token_digest(token: str) -> bytes:
+    """16-byte digest: raw tokens are never kept in memory"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class VerifiedTokenCache:
+    """
+    digest -> (valid_until, user_id, is_guest) for tokens whose signature
+    has been checked, plus digest -> exp for revoked tokens. Denylist
+    entries are dropped once the token would have expired anyway.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MAX_CACHED_TOKENS,
+        max_age: float = TOKEN_CACHE_MAX_AGE,
+        max_revoked: int = MAX_REVOKED_TOKENS,
+    ):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.max_revoked = max_revoked
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._listeners: List[Callable] = []
+        self.stats = {"hits": 0, "misses": 0, "revoked": 0}
+
+    def get(self, digest: bytes) -> Optional[Tuple[object, bool]]:
+        """(user_id, is_guest) for a cached, unexpired token, else None"""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            if entry[0] <= time.time():
+                del self._entries[digest]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.stats["hits"] += 1
+            return entry[1], entry[2]
+
+    def put(self, digest: bytes, user_id, is_guest: bool, exp: Optional[float]):
+        """Remember a successful verification until exp (capped at max_age)"""
+        valid_until = time.time() + self.max_age
+        if exp is not None:
+            valid_until = min(valid_until, float(exp))
+        with self._lock:
+            if digest in self._revoked:
+                return
+            self._entries[digest] = (valid_until, user_id, is_guest)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, digest: bytes) -> bool:
+        with self._lock:
+            exp = self._revoked.get(digest)
+            if exp is None:
+                return False
+            if exp <= time.time():
+                del self._revoked[digest]
+                return False
+            return True
+
+    def revoke(self, digest: bytes, exp: Optional[float], propagate: bool = True):
+        """
+        Deny a token until its exp. With propagate=True the revocation
+        listeners are told as well; call with propagate=False when handling
+        a revocation received from another worker.
+        """
+        now = time.time()
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._revoked[digest] = float(exp) if exp is not None else now + self.max_age
+            self.stats["revoked"] += 1
+            if len(self._revoked) > self.max_revoked:
+                self._revoked = {d: e for d, e in self._revoked.items() if e > now}
+                # Still full of live tokens: drop the ones expiring soonest
+                excess = len(self._revoked) - self.max_revoked
+                if excess > 0:
+                    for d in sorted(self._revoked, key=self._revoked.get)[:excess]:
+                        del self._revoked[d]
+            listeners = list(self._listeners) if propagate else []
+
+        for listener in listeners:
+            try:
+                listener(digest, exp)
+            except Exception:
+                pass
+
+    def add_revocation_listener(self, listener: Callable[[bytes, Optional[float]], None]):
+        """
+        Register a callback run with (digest, exp) on every local revocation,
+        e.g. one that publishes it to the other workers, whose subscribers
+        call revoke(digest, exp, propagate=False).
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, entries=len(self._entries), denylist=len(self._revoked))
+
+
+# Global instance
+token_cache = VerifiedTokenCache()
+
+
+def get_token_cache():
+    """Get the global verified-token cache instance"""
+    return token_cache
@@ -0,0 +1,278 @@
+"""
+Request Tracing
+Lightweight per-request spans for the /ask pipeline. Each finished trace
+is written as one structured (JSON) log line, its span durations feed
+per-stage histograms served in Prometheus text format, and - when the
+OpenTelemetry API is installed - it is exported as an OTel trace too.
+
+Traces are passed explicitly rather than kept in a context variable:
+/ask stages run on the event loop, the stream pump thread and the
+browse/fetch pools.
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("true", "1", "yes")
+TRACE_LOG = os.getenv("TRACE_LOG", "true").lower() in ("true", "1", "yes")   # one JSON line per trace
+OTEL_ENABLED = os.getenv("OTEL_TRACING", "true").lower() in ("true", "1", "yes") \
+    and importlib.util.find_spec("opentelemetry") is not None
+
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+QUANTILE_WINDOW = 1024   # recent samples per stage the quantiles are computed over
+METRIC_PREFIX = "littlefox"
+
+logger = logging.getLogger("tracing")
+
+
+class Span:
+    __slots__ = ("name", "start", "end", "attributes")
+
+    def __init__(self, name: str, start: float, end: float, attributes: Dict):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.attributes = attributes
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Trace:
+    """Spans of one request, timed with time.monotonic()"""
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex
+        self.attributes = attributes
+        self.started = time.monotonic()
+        self.started_wall = time.time()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._finished = False
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time a block as a span (recorded even if it raises)"""
+        start = time.monotonic()
+        try:
+            yield attributes
+        except Exception as e:
+            attributes["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, start, **attributes)
+
+    def record(self, name: str, start: float, end: Optional[float] = None, **attributes):
+        """Add a span measured elsewhere (monotonic timestamps; end defaults to now)"""
+        span = Span(name, start, time.monotonic() if end is None else end, attributes)
+        with self._lock:
+            self.spans.append(span)
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self, **attributes):
+        """Close the trace: histograms, structured log, OTel export (once)"""
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            spans = list(self.spans)
+        self.attributes.update(attributes)
+        total = Span(self.name, self.started, time.monotonic(), self.attributes)
+
+        for span in spans:
+            stage_metrics.observe(self.name, span.name, span.duration)
+        stage_metrics.observe(self.name, "total", total.duration)
+
+        if TRACE_LOG:
+            logger.info(json.dumps(self._to_dict(total, spans), default=str))
+        if OTEL_ENABLED:
+            try:
+                _export_otel(self, total, spans)
+            except Exception as e:
+                logger.debug(f"OpenTelemetry export failed: {e}")
+
+    def _to_dict(self, total: Span, spans: List[Span]) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "duration_ms": round(total.duration * 1000, 2),
+            **self.attributes,
+            "spans": [
+                {
+                    "name": span.name,
+                    "start_ms": round((span.start - self.started) * 1000, 2),
+                    "duration_ms": round(span.duration * 1000, 2),
+                    **span.attributes,
+                }
+                for span in sorted(spans, key=lambda s: s.start)
+            ],
+        }
+
+
+class NullTrace:
+    """Stands in when tracing is off, so call sites need no checks"""
+
+    trace_id = None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        yield attributes
+
+    def record(self, name: str, start: float, end: Optional[float] = None, **attributes):
+        pass
+
+    def set(self, **attributes):
+        pass
+
+    def finish(self, **attributes):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+def start_trace(name: str, **attributes):
+    return Trace(name, **attributes) if TRACING_ENABLED else NULL_TRACE
+
+
+# =========================
+# OPENTELEMETRY
+# =========================
+
+def _otel_value(value):
+    return value if isinstance(value, (str, bool, int, float)) else str(value)
+
+
+def _export_otel(trace: Trace, total: Span, spans: List[Span]):
+    """Replay the finished trace into the OTel API (a no-op unless an SDK/exporter is configured)"""
+    from opentelemetry import trace as otel_trace
+
+    def wall_ns(monotonic: float) -> int:
+        return int((trace.started_wall + monotonic - trace.started) * 1e9)
+
+    tracer = otel_trace.get_tracer("littlefox")
+    attributes = {k: _otel_value(v) for k, v in total.attributes.items()}
+    root = tracer.start_span(trace.name, start_time=wall_ns(total.start), attributes=attributes)
+    context = otel_trace.set_span_in_context(root)
+    for span in spans:
+        child = tracer.start_span(
+            span.name,
+            context=context,
+            start_time=wall_ns(span.start),
+            attributes={k: _otel_value(v) for k, v in span.attributes.items()},
+        )
+        child.end(end_time=wall_ns(span.end))
+    root.end(end_time=wall_ns(total.end))
+
+
+# =========================
+# STAGE HISTOGRAMS
+# =========================
+
+class StageMetrics:
+    """
+    Per (trace, stage): cumulative histogram buckets, sum and count, plus
+    a window of recent samples for p50/p95/p99.
+    """
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS, window: int = QUANTILE_WINDOW):
+        self.buckets = buckets
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages: Dict[Tuple[str, str], Dict] = {}
+
+    def observe(self, trace: str, stage: str, seconds: float):
+        with self._lock:
+            entry = self._stages.get((trace, stage))
+            if entry is None:
+                entry = self._stages[(trace, stage)] = {
+                    "counts": [0] * len(self.buckets), "sum": 0.0, "count": 0, "recent": deque(maxlen=self.window),
+                }
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry["counts"][i] += 1
+            entry["sum"] += seconds
+            entry["count"] += 1
+            entry["recent"].append(seconds)
+
+    def _snapshot(self):
+        with self._lock:
+            return {
+                key: (list(entry["counts"]), entry["sum"], entry["count"], sorted(entry["recent"]))
+                for key, entry in sorted(self._stages.items())
+            }
+
+    def get_stats(self) -> Dict:
+        """{trace: {stage: {count, p50_ms, p95_ms, p99_ms}}}"""
+        stats: Dict[str, Dict] = {}
+        for (trace, stage), (_, _, count, recent) in self._snapshot().items():
+            stats.setdefault(trace, {})[stage] = {
+                "count": count,
+                **{f"p{int(q * 100)}_ms": round(_quantile(recent, q) * 1000, 1) for q in QUANTILES},
+            }
+        return stats
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition (format 0.0.4)"""
+        snapshot = self._snapshot()
+        histogram = f"{METRIC_PREFIX}_stage_duration_seconds"
+        summary = f"{METRIC_PREFIX}_stage_latency_seconds"
+        lines = [
+            f"# HELP {histogram} Duration of request pipeline stages.",
+            f"# TYPE {histogram} histogram",
+        ]
+        for (trace, stage), (counts, total, count, _) in snapshot.items():
+            labels = f'trace="{_escape(trace)}",stage="{_escape(stage)}"'
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{histogram}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+            lines.append(f'{histogram}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{histogram}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{histogram}_count{{{labels}}} {count}")
+
+        lines += [
+            f"# HELP {summary} Pipeline stage latency quantiles over the last {self.window} requests.",
+            f"# TYPE {summary} summary",
+        ]
+        for (trace, stage), (_, total, count, recent) in snapshot.items():
+            labels = f'trace="{_escape(trace)}",stage="{_escape(stage)}"'
+            for q in QUANTILES:
+                lines.append(f'{summary}{{{labels},quantile="{q}"}} {_quantile(recent, q):.6f}')
+            lines.append(f"{summary}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{summary}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _quantile(sorted_values, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Global instance
+stage_metrics = StageMetrics()
+
+
+def get_stage_metrics():
+    """Get the global stage metrics instance"""
+    return stage_metrics
+
+
+def render_metrics() -> str:
+    return stage_metrics.render_prometheus()
@@ -0,0 +1,262 @@
+"""
+Upstream Registry
+Per-upstream circuit breakers (Groq, DuckDuckGo, Ollama) with rolling
+latency/error stats and half-open probes, so a dead dependency is skipped
+or rerouted instead of costing every request a full timeout.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))   # consecutive failures that open a circuit
+ERROR_RATE_THRESHOLD = 0.5   # ...or this error rate over the window
+MIN_WINDOW_CALLS = 10        # calls needed before the error rate counts
+RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "15"))        # open -> half-open after this many seconds
+MAX_RESET_TIMEOUT = 300.0    # backoff cap for circuits that keep failing their probes
+STATS_WINDOW = 100           # calls kept for rolling stats
+PROBE_INTERVAL = 1.0         # how often the prober looks for circuits due a probe
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+logger = logging.getLogger(__name__)
+
+
+class Upstream:
+    """Circuit breaker plus rolling stats for one dependency"""
+
+    def __init__(
+        self,
+        name: str,
+        probe: Optional[Callable[[], bool]] = None,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self._probe_started = 0.0   # non-zero while a half-open trial call is in flight
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=STATS_WINDOW)   # (latency, ok)
+        self.totals = {"calls": 0, "failures": 0, "short_circuited": 0, "opened": 0}
+
+    def _probe_due(self, now: float) -> bool:
+        return now - self.opened_at >= self.reset_timeout
+
+    def available(self) -> bool:
+        """Would a call be let through right now? (no side effects)"""
+        with self._lock:
+            return self.state == CLOSED or (self.state == OPEN and self._probe_due(time.monotonic())) \
+                or (self.state == HALF_OPEN and not self._probe_started)
+
+    def allow(self) -> bool:
+        """
+        Ask to make a call. Closed: yes. Open: no (fail fast) until the reset
+        timeout passes, then exactly one trial call is let through.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self._probe_due(now):
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and (not self._probe_started or now - self._probe_started > self.reset_timeout):
+                self._probe_started = now
+                return True
+            self.totals["short_circuited"] += 1
+            return False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self._window.append((latency, True))
+            self.totals["calls"] += 1
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"[UPSTREAM] {self.name} recovered, closing circuit")
+            self.state = CLOSED
+            self.reset_timeout = self.base_reset_timeout
+            self._probe_started = 0.0
+
+    def record_failure(self, latency: float, error: Optional[BaseException] = None):
+        with self._lock:
+            self._window.append((latency, False))
+            self.totals["calls"] += 1
+            self.totals["failures"] += 1
+            self.consecutive_failures += 1
+            self.last_error = repr(error) if error else None
+
+            if self.state == HALF_OPEN:
+                # Failed trial: stay open, back off before the next one
+                self.reset_timeout = min(self.reset_timeout * 2, MAX_RESET_TIMEOUT)
+                self._open()
+            elif self.state == CLOSED and (
+                self.consecutive_failures >= self.failure_threshold or self._error_rate() >= ERROR_RATE_THRESHOLD
+            ):
+                self._open()
+
+    def _open(self):
+        if self.state != OPEN:
+            self.totals["opened"] += 1
+            logger.warning(f"[UPSTREAM] {self.name} circuit open for {self.reset_timeout:.0f}s: {self.last_error}")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._probe_started = 0.0
+
+    def _error_rate(self) -> float:
+        if len(self._window) < MIN_WINDOW_CALLS:
+            return 0.0
+        return sum(1 for _, ok in self._window if not ok) / len(self._window)
+
+    def force(self, state: str):
+        """Admin override: force the circuit open or closed"""
+        with self._lock:
+            if state == OPEN:
+                self.last_error = "forced open"
+                self._open()
+            else:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                self.reset_timeout = self.base_reset_timeout
+                self._probe_started = 0.0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            latencies = sorted(latency for latency, _ in self._window)
+            failures = sum(1 for _, ok in self._window if not ok)
+            retry_in = max(0.0, self.opened_at + self.reset_timeout - time.monotonic()) if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "window_calls": len(latencies),
+                "error_rate": round(failures / len(latencies), 3) if latencies else 0.0,
+                "p50_ms": _percentile_ms(latencies, 0.50),
+                "p95_ms": _percentile_ms(latencies, 0.95),
+                "retry_in": round(retry_in, 1),
+                "last_error": self.last_error,
+                "has_probe": self.probe is not None,
+                **self.totals,
+            }
+
+
+def _percentile_ms(sorted_latencies, fraction: float) -> Optional[float]:
+    if not sorted_latencies:
+        return None
+    index = min(len(sorted_latencies) - 1, int(len(sorted_latencies) * fraction))
+    return round(sorted_latencies[index] * 1000, 1)
+
+
+def raise_for_server_error(response):
+    """Inside track(): 5xx means the upstream is unhealthy; 4xx is the caller's problem"""
+    if response.status_code >= 500:
+        response.raise_for_status()
+
+
+class UpstreamRegistry:
+    """All upstreams by name, plus the background half-open prober"""
+
+    def __init__(self):
+        self._upstreams: Dict[str, Upstream] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, probe: Optional[Callable[[], bool]] = None, **options) -> Upstream:
+        """Create (or return) the upstream; clients call this at import time"""
+        with self._lock:
+            upstream = self._upstreams.get(name)
+            if upstream is None:
+                upstream = self._upstreams[name] = Upstream(name, probe=probe, **options)
+            elif probe is not None:
+                upstream.probe = probe
+            return upstream
+
+    def get(self, name: str) -> Upstream:
+        return self._upstreams.get(name) or self.register(name)
+
+    def allow(self, name: str) -> bool:
+        return self.get(name).allow()
+
+    def available(self, name: str) -> bool:
+        return self.get(name).available()
+
+    @contextmanager
+    def track(self, name: str):
+        """
+        Time the block and record it against the upstream: an exception is a
+        failure (re-raised), anything else - including a consumer closing a
+        stream early - is a success.
+        """
+        upstream = self.get(name)
+        start = time.monotonic()
+        try:
+            yield upstream
+        except Exception as e:
+            upstream.record_failure(time.monotonic() - start, e)
+            raise
+        except BaseException:
+            upstream.record_success(time.monotonic() - start)
+            raise
+        else:
+            upstream.record_success(time.monotonic() - start)
+
+    # -------------------------
+    # Half-open probes
+    # -------------------------
+
+    def probe_due(self):
+        """Run the probe of every open circuit whose reset timeout has passed"""
+        for upstream in list(self._upstreams.values()):
+            if upstream.probe is None or upstream.state != OPEN or not upstream.available():
+                continue
+            if not upstream.allow():
+                continue
+            start = time.monotonic()
+            try:
+                healthy = upstream.probe()
+                error = None if healthy else RuntimeError("probe reported unhealthy")
+            except Exception as e:
+                healthy, error = False, e
+            if healthy:
+                upstream.record_success(time.monotonic() - start)
+            else:
+                upstream.record_failure(time.monotonic() - start, error)
+
+    def _run(self):
+        while not self._stop.wait(PROBE_INTERVAL):
+            try:
+                self.probe_due()
+            except Exception as e:
+                logger.error(f"[UPSTREAM] Probe loop error: {e}")
+
+    def start_probes(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="upstream-probes", daemon=True)
+            self._thread.start()
+
+    def stop_probes(self):
+        self._stop.set()
+
+    def snapshot(self) -> Dict:
+        return {name: upstream.snapshot() for name, upstream in sorted(self._upstreams.items())}
+
+
+# Global instance
+upstreams = UpstreamRegistry()
+
+
+def get_upstream_registry():
+    """Get the global upstream registry instance"""
+    return upstreams
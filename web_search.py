@@ -2,6 +2,7 @@ import time
 import requests
 from bs4 import BeautifulSoup
 from ddgs import DDGS
+from upstream_registry import upstreams
 
 # ---------------------------------------
 # HTTP settings
@@ -15,9 +16,12 @@ HEADERS = {
 }
 
 REQUEST_TIMEOUT = 6
-MAX_PAGE_CHARS = 3000
+MAX_PAGE_CHARS = 12000  # passages are ranked and budgeted downstream (context_budget)
 SEARCH_DELAY = 0.2  # avoid DDG rate limiting
 
+# No active probe: after the reset timeout one real search is the trial call
+upstreams.register("ddg")
+
 # ---------------------------------------
 # Block low-signal / junk domains
 # ---------------------------------------
@@ -46,7 +50,10 @@ def search_web(query: str, max_results: int = 3):
     blacklist = ("wikipedia.org", "reddit.com", "quora.com")
     results = []
 
-    with DDGS() as ddgs:
+    if not upstreams.allow("ddg"):
+        return results  # circuit open: skip search instead of waiting on DDG
+
+    with upstreams.track("ddg"), DDGS() as ddgs:
         for r in ddgs.text(query, max_results=max_results * 2):
             url = r.get("href", "")
             if not url:
@@ -0,0 +1,205 @@
+"""
+Asynchronous Web Verification
+Runs the live search/fetch behind response verification off the request
+path, with a search budget, a per-query source cache and a deadline.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Optional
+
+WEB_VERIFY_ENABLED = os.getenv("WEB_VERIFY_ENABLED", "true").lower() in ("true", "1", "yes")
+SEARCHES_PER_MINUTE = int(os.getenv("WEB_VERIFY_PER_MINUTE", "10"))
+CACHE_TTL = int(os.getenv("WEB_VERIFY_CACHE_TTL", "600"))
+DEADLINE = float(os.getenv("WEB_VERIFY_DEADLINE", "6"))
+
+MAX_CACHED_QUERIES = 256
+MAX_STORED_RESULTS = 512
+
+
+class WebVerifier:
+    """Budgeted, cached collection of verification sources plus a background queue"""
+
+    def __init__(
+        self,
+        searches_per_minute: int = SEARCHES_PER_MINUTE,
+        cache_ttl: int = CACHE_TTL,
+        deadline: float = DEADLINE,
+        max_workers: int = 2,
+    ):
+        self.searches_per_minute = searches_per_minute
+        self.cache_ttl = cache_ttl
+        self.deadline = deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="verify")
+        self._fetch_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="verify-fetch")
+        self._lock = threading.Lock()
+        self._search_times = []
+        self._cache = OrderedDict()     # (query, max_results) -> (timestamp, sources)
+        self._results = OrderedDict()   # verification id -> result dict
+        self.stats = {"searches": 0, "cache_hits": 0, "over_budget": 0, "timeouts": 0}
+
+    # -------------------------
+    # Source collection
+    # -------------------------
+
+    def _take_budget(self) -> bool:
+        now = time.time()
+        with self._lock:
+            self._search_times = [t for t in self._search_times if now - t < 60]
+            if len(self._search_times) >= self.searches_per_minute:
+                self.stats["over_budget"] += 1
+                return False
+            self._search_times.append(now)
+            self.stats["searches"] += 1
+            return True
+
+    def _cached(self, key) -> Optional[Dict]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and time.time() - entry[0] < self.cache_ttl:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return entry[1]
+        return None
+
+    def _collect(self, query: str, max_results: int) -> Optional[Dict]:
+        from web_search import search_web, fetch_page
+
+        key = (query.strip().lower(), max_results)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        if not self._take_budget():
+            return None
+
+        started = time.monotonic()
+        results = search_web(query, max_results=max_results) or []
+
+        # Wikipedia pages are never used as verification sources - don't fetch them
+        urls = [
+            r.get("url", "") for r in results
+            if r.get("url") and "wikipedia" not in r.get("url", "").lower()
+        ]
+        pages = {}
+        futures = {self._fetch_executor.submit(fetch_page, url): url for url in urls}
+        remaining = max(0.5, self.deadline - (time.monotonic() - started))
+        try:
+            for future in as_completed(futures, timeout=remaining):
+                try:
+                    pages[futures[future]] = future.result()
+                except Exception:
+                    pages[futures[future]] = ""
+        except FutureTimeout:
+            pass
+
+        sources = {"results": results, "pages": pages}
+        with self._lock:
+            self._cache[key] = (time.time(), sources)
+            while len(self._cache) > MAX_CACHED_QUERIES:
+                self._cache.popitem(last=False)
+        return sources
+
+    def cached_sources(self, query: str, max_results: int = 3) -> Optional[Dict]:
+        """Sources already collected for a query, without searching (None on a miss)"""
+        if not WEB_VERIFY_ENABLED or not query:
+            return None
+        return self._cached((query.strip().lower(), max_results))
+
+    def get_sources(self, query: str, max_results: int = 3, deadline: Optional[float] = None) -> Optional[Dict]:
+        """
+        Search results and fetched pages for a query, waiting at most
+        `deadline` seconds. Returns None when over budget or too slow
+        (a slow collection keeps running and fills the cache).
+        """
+        if not WEB_VERIFY_ENABLED or not query:
+            return None
+
+        cached = self._cached((query.strip().lower(), max_results))
+        if cached is not None:
+            return cached
+
+        future = self._executor.submit(self._collect, query, max_results)
+        try:
+            return future.result(timeout=deadline or self.deadline)
+        except FutureTimeout:
+            self.stats["timeouts"] += 1
+            return None
+        except Exception:
+            return None
+
+    # -------------------------
+    # Background verification
+    # -------------------------
+
+    def submit(
+        self,
+        text: str,
+        query: str,
+        callback: Optional[Callable[[Dict], None]] = None,
+        replace_wikipedia: bool = False,
+    ) -> Optional[str]:
+        """
+        Queue verification of a finished answer. Returns a verification id
+        (poll with result()) or None when verification is disabled.
+        With `replace_wikipedia` (a Wikipedia-only answer) the result also
+        carries the web search answer to show instead, as "replacement".
+        """
+        if not WEB_VERIFY_ENABLED or not query:
+            return None
+
+        verification_id = uuid.uuid4().hex
+        with self._lock:
+            self._results[verification_id] = {"pending": True}
+            while len(self._results) > MAX_STORED_RESULTS:
+                self._results.popitem(last=False)
+
+        def run():
+            from response_quality import (
+                REPLACEMENT_MAX_RESULTS, get_web_search_replacement, verify_response_with_web_search,
+            )
+            try:
+                if replace_wikipedia:
+                    sources = self._collect(query, REPLACEMENT_MAX_RESULTS)
+                    result = {
+                        "verified": sources is not None,
+                        "confidence_adjustment": 0.0,
+                        "replacement": get_web_search_replacement(query, sources),
+                    }
+                else:
+                    sources = self._collect(query, 3)
+                    result = verify_response_with_web_search(text, query, sources=sources)
+            except Exception as e:
+                result = {"verified": False, "confidence_adjustment": 0.0, "error": str(e)}
+            result["pending"] = False
+            with self._lock:
+                if verification_id in self._results:
+                    self._results[verification_id] = result
+            if callback:
+                try:
+                    callback(result)
+                except Exception:
+                    pass
+
+        self._executor.submit(run)
+        return verification_id
+
+    def result(self, verification_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._results.get(verification_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._fetch_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+web_verifier = WebVerifier()
+
+
+def get_web_verifier():
+    """Get the global web verifier instance"""
+    return web_verifier